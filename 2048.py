@@ -1,17 +1,66 @@
 # ==== Importing all necessary libraries
 from tkinter import *
-import random
-import time
+from types import SimpleNamespace
+import sys
+import engine2048
+import ai2048
+import latency
+import ntuple2048
+import replay2048
 # ==== creating main class
 class Play_2048(Tk):
 
     # ==== adding necessary class variables
     game_board = []
+    board = 0
     new_random_tiles = [2, 2, 2, 2, 2, 2, 4]
     score = 0
     high_score = 0
     game_score = 0
     highest_score = 0
+    ai_player = None
+    ai_kind = None
+    ai_running = False
+    ai_delay = 50
+    ai_budget_ms = 100
+    spawned_cell = None
+    recorder = None
+    replay_path = None
+    finished = False
+    end_job = None
+    animation_job = None
+    animation_before = 0
+    animation_moving = []
+    animation_merged = set()
+    animation_frames = 6
+    animation_frame_ms = 15
+
+    # ==== canvas layout and tile colors
+    cellwidth = 210
+    cellheight = 210
+    bg_color = {2: '#eee4da',
+        4: '#ede0c8',
+        8: '#edc850',
+        16: '#edc53f',
+        32: '#f67c5f',
+        64: '#f65e3b',
+        128: '#edcf72',
+        256: '#edcc61',
+        512: '#f2b179',
+        1024: '#f59563',
+        2048: '#edc22e',}
+    color = {2: '#776e65',
+        4: '#f9f6f2',
+        8: '#f9f6f2',
+        16: '#f9f6f2',
+        32: '#f9f6f2',
+        64: '#f9f6f2',
+        128: '#f9f6f2',
+        256: '#f9f6f2',
+        512: '#776e65',
+        1024: '#f9f6f2',
+        2048: '#f9f6f2',}
+    spawn_bg_color = {2: "#e0f2f8", 4: "#b8dbe5"}
 
     # ==== creating user window
     def __init__(self, *args, **kwargs):
@@ -21,6 +70,8 @@ class Play_2048(Tk):
         self.game_score.set("0")
         self.highest_score = StringVar(self)
         self.highest_score.set("0")
+        self.animate = BooleanVar(self)
+        self.animate.set(False)
 
         # ==== adding new game , score and highest score option
         self.button_frame = Frame(self)
@@ -33,300 +84,287 @@ class Play_2048(Tk):
         Label(self.button_frame, text="Record:", font=("times new roman", 15)).grid(row=0, column=3)
         Label(self.button_frame, textvariable=self.highest_score, font=("times new roman", 15)).grid(row=0, column=4)
         Label(self.button_frame, text="All the Best!", font=("times new roman",15)).grid(row=0,column=5)
+        Checkbutton(self.button_frame, text="Animate", variable=self.animate, font=("times new roman", 15),
+                    takefocus=0).grid(row=0, column=6)
+        self.ai_status = StringVar(self)
+        self.ai_status.set("Press A to watch the AI play, N for the n-tuple player")
+        Label(self.button_frame, textvariable=self.ai_status, font=("times new roman", 12)).grid(row=1, column=0, columnspan=7)
 
         self.canvas = Canvas(self, width=820, height=820, borderwidth=10, highlightthickness=0)
         self.canvas.pack(side="top", fill="both", expand="false")
+        self.create_cells()
 
         # ==== create new game
         self.new_game()
 
+    # ==== allocate every canvas item once, later frames only reconfigure them
+    def create_cells(self):
+        self.square = {}
+        self.number = {}
+        self.cell_coords = {}
+        self.cell_style = [None] * 16
+        for row in range(4):
+            for column in range(4):
+                x1 = column * self.cellwidth
+                y1 = row * self.cellheight
+                x2 = x1 + self.cellwidth - 10
+                y2 = y1 + self.cellheight - 10
+                self.cell_coords[row, column] = (x1, y1, x2, y2)
+                self.canvas.create_rectangle(x1, y1, x2, y2, fill="azure4", tags="background", outline="")
+        for row in range(4):
+            for column in range(4):
+                x1, y1, x2, y2 = self.cell_coords[row, column]
+                self.square[row, column] = self.canvas.create_rectangle(x1, y1, x2, y2, tags="rect", outline="",
+                                                                        width=0, state="hidden")
+                self.number[row, column] = self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text="")
+
     # ==== add new tiles
     def new_tiles(self):
-        index = random.randint(0, 6)
-        x = -1
-        y = -1
-
-        # ==== check while game is not over
-        while self.full() == False:
-            x = random.randint(0, 3)
-            y = random.randint(0, 3)
-
-            if (self.game_board[x][y] == 0):
-                self.game_board[x][y] = self.new_random_tiles[index]
-                x1 = y * 210
-                y1 = x * 210
-                x2 = x1 + 210 - 10
-                y2 = y1 + 210 - 10
-                num = self.game_board[x][y]
-                if num == 2:
-                    self.square[x, y] = self.canvas.create_rectangle(x1, y1, x2, y2, fill="#e0f2f8", tags="rect",
-                                                                     outline="", width=0)
-                    self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, font=("Arial", 36), fill="#f78a8a", text="2")
-                elif num == 4:
-                    self.square[x, y] = self.canvas.create_rectangle(x1, y1, x2, y2, fill="#b8dbe5", tags="rect",
-                                                                     outline="", width=0)
-                    self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, font=("Arial", 36), fill="#f78a8a", text="4")
-
-                break
+        board = engine2048.spawn_tile(self.board, self.recorder.spawn_rng(), self.new_random_tiles)
+        if board == self.board:
+            return
+        # ==== the spawned tile is the only nibble that changed
+        self.spawned_cell = ((board ^ self.board).bit_length() - 1) // 4
+        self.board = board
+        self.game_board = engine2048.to_grid(board)
 
     # ==== check board is full or not
     def full(self):
-        for i in range(0, 4):
-            for j in range(0, 4):
-                if (self.game_board[i][j] == 0):
-                    return False
-        return True
+        return engine2048.is_full(self.board)
 
-    # ==== showing game board
-    def show_board(self):
-        cellwidth = 210
-        cellheight = 210
-        self.square = {}
+    # ==== showing game board, only cells that differ from `before` are touched
+    def show_board(self, before=None):
+        if before is None:
+            cells = range(16)
+        else:
+            changed = before ^ self.board
+            cells = [cell for cell in range(16) if (changed >> (4 * cell)) & 0xF]
+            # ==== last spawn highlight has to be cleared even if the value stayed
+            cells += [cell for cell, style in enumerate(self.cell_style) if style and style[3]]
+            if self.spawned_cell is not None:
+                cells.append(self.spawned_cell)
+
+        for cell in cells:
+            row, column = divmod(cell, 4)
+            num = self.game_board[row][column]
+            if num == 0:
+                self.show_number0(row, column)
+            else:
+                self.show_number(row, column, num, spawned=cell == self.spawned_cell)
 
-        for column in range(4):
-            for row in range(4):
-                x1 = column * cellwidth
-                y1 = row * cellheight
-                x2 = x1 + cellwidth - 10
-                y2 = y1 + cellheight - 10
-                num = self.game_board[row][column]
-                if num == 0:
-                    self.show_number0(row, column, x1, y1, x2, y2)
-                else:
-                    self.show_number(row, column, x1, y1, x2, y2, num)
+    # ==== reconfigure one cell, skipped if it already looks right
+    def show_cell(self, row, column, style):
+        cell = 4 * row + column
+        if self.cell_style[cell] == style:
+            return
+        self.cell_style[cell] = style
+        fill, text, text_color, spawned = style
+        if fill is None:
+            self.canvas.itemconfigure(self.square[row, column], state="hidden")
+            self.canvas.itemconfigure(self.number[row, column], text="")
+            return
+        font = ("Arial", 36) if spawned or not text.isdigit() else ("Arial", 36, 'bold')
+        self.canvas.itemconfigure(self.square[row, column], fill=fill, state="normal")
+        self.canvas.itemconfigure(self.number[row, column], text=text, fill=text_color, font=font)
 
     # ==== show board block when it is empty
-    def show_number0(self, row, column, a, b, c, d):
-        self.square[row, column] = self.canvas.create_rectangle(a, b, c, d, fill="azure4", tags="rect", outline="")
+    def show_number0(self, row, column):
+        self.show_cell(row, column, (None, "", None, False))
 
     # ==== show board number
-    def show_number(self, row, column, a, b, c, d, num):
-        bg_color = {'2': '#eee4da',
-        '4': '#ede0c8',
-        '8': '#edc850',
-        '16': '#edc53f',
-        '32': '#f67c5f',
-        '64': '#f65e3b',
-        '128': '#edcf72',
-        '256': '#edcc61',
-        '512': '#f2b179',
-        '1024': '#f59563',
-        '2048': '#edc22e',}
-        color = {'2': '#776e65',
-        '4': '#f9f6f2',
-        '8': '#f9f6f2',
-        '16': '#f9f6f2',
-        '32': '#f9f6f2',
-        '64': '#f9f6f2',
-        '128': '#f9f6f2',
-        '256': '#f9f6f2',
-        '512': '#776e65',
-        '1024': '#f9f6f2',
-        '2048': '#f9f6f2',}
-        self.square[row, column] = self.canvas.create_rectangle(a, b, c, d, fill=bg_color[str(num)], tags="rect", outline="")
-        self.canvas.create_text((a + c) / 2, (b + d) / 2, font=("Arial", 36,'bold'), fill=color[str(num)], text=str(num))
+    def show_number(self, row, column, num, spawned=False):
+        if spawned and num in self.spawn_bg_color:
+            style = (self.spawn_bg_color[num], str(num), "#f78a8a", True)
+        else:
+            style = (self.bg_color.get(num, '#3c3a32'), str(num), self.color.get(num, '#f9f6f2'), False)
+        self.show_cell(row, column, style)
 
     # ==== moves by user
     def moves(self, event):
-
-        if event.keysym == 'Down':
-            for j in range(0, 4):
-                shift = 0
-                for i in range(3, -1, -1):
-                    if self.game_board[i][j] == 0:
-                        shift += 1
-                    else:
-                        if i - 1 >= 0 and self.game_board[i - 1][j] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i - 1][j] = 0
-                        elif i - 2 >= 0 and self.game_board[i - 1][j] == 0 and self.game_board[i - 2][j] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i - 2][j] = 0
-                        elif i == 3 and self.game_board[2][j] + self.game_board[1][j] == 0 and self.game_board[0][j] == self.game_board[3][j]:
-                            self.game_board[3][j] *= 2
-                            self.score += self.game_board[3][j]
-                            self.game_board[0][j] = 0
-                        if shift > 0:
-                            self.game_board[i + shift][j] = self.game_board[i][j]
-                            self.game_board[i][j] = 0
-            self.show_board()
-            self.new_tiles()
-            self.game_over()
-        elif event.keysym == 'Right':
-            for i in range(0, 4):
-                shift = 0
-                for j in range(3, -1, -1):
-                    if self.game_board[i][j] == 0:
-                        shift += 1
-                    else:
-                        if j - 1 >= 0 and self.game_board[i][j - 1] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i][j - 1] = 0
-                        elif j - 2 >= 0 and self.game_board[i][j - 1] == 0 and self.game_board[i][j - 2] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i][j - 2] = 0
-                        elif j == 3 and self.game_board[i][2] + self.game_board[i][1] == 0 and self.game_board[0][j] == self.game_board[3][
-                            j]:
-                            self.game_board[i][3] *= 2
-                            self.score += self.game_board[i][3]
-                            self.game_board[i][0] = 0
-                        if shift > 0:
-                            self.game_board[i][j + shift] = self.game_board[i][j]
-                            self.game_board[i][j] = 0
-            self.show_board()
-            self.new_tiles()
-            self.game_over()
-        elif event.keysym == 'Left':
-            for i in range(0, 4):
-                shift = 0
-                for j in range(0, 4):
-                    if self.game_board[i][j] == 0:
-                        shift += 1
-                    else:
-                        if j + 1 < 4 and self.game_board[i][j + 1] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i][j + 1] = 0
-                        elif j + 2 < 4 and self.game_board[i][j + 1] == 0 and self.game_board[i][j + 2] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i][j + 2] = 0
-                        elif j == 0 and self.game_board[i][1] + self.game_board[i][2] == 0 and self.game_board[i][3] == self.game_board[i][
-                            0]:
-                            self.game_board[i][0] *= 2
-                            self.score += self.game_board[i][0]
-                            self.game_board[i][3] = 0
-                        if shift > 0:
-                            self.game_board[i][j - shift] = self.game_board[i][j]
-                            self.game_board[i][j] = 0
-            self.show_board()
-            self.new_tiles()
-            self.game_over()
-        elif event.keysym == 'Up':
-            for j in range(0, 4):
-                shift = 0
-                for i in range(0, 4):
-                    if self.game_board[i][j] == 0:
-                        shift += 1
-                    else:
-                        if i + 1 < 4 and self.game_board[i + 1][j] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i + 1][j] = 0
-                        elif i + 2 < 4 and self.game_board[i + 1][j] == 0 and self.game_board[i + 2][j] == self.game_board[i][j]:
-                            self.game_board[i][j] *= 2
-                            self.score += self.game_board[i][j]
-                            self.game_board[i + 2][j] = 0
-                        elif i == 0 and self.game_board[1][j] + self.game_board[2][j] == 0 and self.game_board[3][j] == self.game_board[0][
-                            j]:
-                            self.game_board[0][j] *= 2
-                            self.score += self.game_board[0][j]
-                            self.game_board[3][j] = 0
-                        if shift > 0:
-                            self.game_board[i - shift][j] = self.game_board[i][j]
-                            self.game_board[i][j] = 0
-            self.show_board()
-            self.new_tiles()
+        latency.input_received()
+        if event.keysym in ('a', 'A'):
+            latency.ignored()
+            self.toggle_ai("expectimax")
+            return
+        if event.keysym in ('n', 'N'):
+            latency.ignored()
+            self.toggle_ai("ntuple")
+            return
+        direction = engine2048.KEYSYMS.get(event.keysym)
+        if direction is None or self.finished:
+            latency.ignored()
+            return
+        self.finish_animation()
+        before = self.board
+        board, gained = engine2048.move(before, direction)
+        if board == before:
+            latency.ignored()
+            return
+        slides = engine2048.tile_moves(before, direction) if self.animate.get() else None
+        self.board = board
+        self.score += gained
+        self.game_board = engine2048.to_grid(board)
+        self.new_tiles()
+        self.recorder.record(direction, self.board, self.score)
+        latency.logic_done()
+        if slides:
+            self.animate_move(before, slides)
+        else:
+            self.show_board(before)
             self.game_over()
 
         self.game_score.set(str(self.score))
         if self.score > self.high_score:
             self.high_score = self.score
             self.highest_score.set(str(self.high_score))
+        if latency.enabled():
+            # ==== draw now rather than when Tk next goes idle, so the paint can be timed
+            self.update_idletasks()
+            latency.painted()
+
+    # ==== slide animation, driven by after() so the event loop keeps running
+    def animate_move(self, before, slides):
+        self.animation_before = before
+        self.animation_moving = [(src, dst) for src, dst, merged in slides if src != dst]
+        self.animation_merged = {dst for src, dst, merged in slides if merged}
+        for src, dst in self.animation_moving:
+            cell = divmod(src, 4)
+            self.canvas.tag_raise(self.square[cell])
+            self.canvas.tag_raise(self.number[cell])
+        self.animation_step(1)
+
+    def animation_step(self, frame):
+        for src, dst in self.animation_moving:
+            src_row, src_column = divmod(src, 4)
+            dst_row, dst_column = divmod(dst, 4)
+            dx = (dst_column - src_column) * self.cellwidth / self.animation_frames
+            dy = (dst_row - src_row) * self.cellheight / self.animation_frames
+            self.canvas.move(self.square[src_row, src_column], dx, dy)
+            self.canvas.move(self.number[src_row, src_column], dx, dy)
+        if frame < self.animation_frames:
+            self.animation_job = self.after(self.animation_frame_ms, self.animation_step, frame + 1)
+        else:
+            self.animation_job = None
+            self.end_animation()
+
+    # ==== jump to the end of a running animation, e.g. when the next key arrives early
+    def finish_animation(self):
+        if self.animation_job is not None:
+            self.after_cancel(self.animation_job)
+            self.animation_job = None
+            self.end_animation()
+
+    def end_animation(self):
+        for src, dst in self.animation_moving:
+            self.reset_cell_coords(*divmod(src, 4))
+        self.show_board(self.animation_before)
+        # ==== merged tiles pop for one frame
+        for cell in self.animation_merged:
+            row, column = divmod(cell, 4)
+            x1, y1, x2, y2 = self.cell_coords[row, column]
+            self.canvas.coords(self.square[row, column], x1 - 6, y1 - 6, x2 + 6, y2 + 6)
+            self.after(self.animation_frame_ms * 2, self.reset_cell_coords, row, column)
+        self.animation_moving = []
+        self.animation_merged = set()
+        self.game_over()
+
+    def reset_cell_coords(self, row, column):
+        x1, y1, x2, y2 = self.cell_coords[row, column]
+        self.canvas.coords(self.square[row, column], x1, y1, x2, y2)
+        self.canvas.coords(self.number[row, column], (x1 + x2) / 2, (y1 + y2) / 2)
+
+    # ==== watch AI mode, the AI presses keys through moves like a player
+    def toggle_ai(self, kind="expectimax"):
+        if self.ai_running and kind == self.ai_kind:
+            self.ai_running = False
+            self.ai_status.set("AI paused, press %s to resume" % ("N" if kind == "ntuple" else "A"))
+            return
+        if kind != self.ai_kind:
+            if kind == "ntuple":
+                # ==== trained by ntuple2048.py, memory-mapped and only ever read
+                try:
+                    self.ai_player = ntuple2048.NTuplePlayer(ntuple2048.DEFAULT_WEIGHTS)
+                except (OSError, ValueError):
+                    self.ai_status.set("No n-tuple weights, train them with ntuple2048.py")
+                    return
+            else:
+                self.ai_player = ai2048.ExpectimaxPlayer(depth=4, time_budget_ms=self.ai_budget_ms)
+            self.ai_kind = kind
+        # ==== switching players while running keeps the running ai_step loop
+        if not self.ai_running:
+            self.ai_running = True
+            self.after(self.ai_delay, self.ai_step)
+
+    def ai_step(self):
+        if not self.ai_running:
+            return
+        direction = self.ai_player.best_move(self.board)
+        if direction is None:
+            self.ai_running = False
+            return
+        self.moves(SimpleNamespace(keysym=engine2048.DIRECTION_NAMES[direction]))
+        if self.finished or engine2048.game_over(self.board):
+            self.ai_running = False
+            return
+        stats = self.ai_player.stats()
+        self.ai_status.set("AI depth %d, %d nodes in %.0f ms (%.0f nodes/s)"
+                           % (stats["depth"], stats["nodes"], stats["elapsed_ms"], stats["nodes_per_second"]))
+        self.after(self.ai_delay, self.ai_step)
 
     # ==== to create new game
     def new_game(self):
+        self.finish_animation()
+        if self.end_job is not None:
+            self.after_cancel(self.end_job)
+            self.end_job = None
+        if not self.finished:
+            self.save_replay()
+        self.finished = False
+        self.spawned_cell = None
         self.score = 0
         self.game_score.set("0")
-        self.game_board = []
-        self.game_board.append([0, 0, 0, 0])
-        self.game_board.append([0, 0, 0, 0])
-        self.game_board.append([0, 0, 0, 0])
-        self.game_board.append([0, 0, 0, 0])
-        while True:
-            x = random.randint(0, 3)
-            y = random.randint(0, 3)
-            if (self.game_board[x][y] == 0):
-                self.game_board[x][y] = 2
-                break
-
-        index = random.randint(0, 6)
-        while self.full() == False:
-            x = random.randint(0, 3)
-            y = random.randint(0, 3)
-            if (self.game_board[x][y] == 0):
-                self.game_board[x][y] = self.new_random_tiles[index]
-                break
+        self.recorder = replay2048.Recorder(tiles=self.new_random_tiles)
+        self.board = engine2048.new_board(self.recorder.start_rng(), self.new_random_tiles)
+        self.recorder.start(self.board)
+        self.game_board = engine2048.to_grid(self.board)
         self.show_board()
 
     # ==== check for game over
     def game_over(self):
-        for i in range(0, 4):
-            for j in range(0, 4):
-                if (self.game_board[i][j] == 1028):
-                    self.game_won()
-        for i in range(0, 4):
-            for j in range(0, 4):
-                if (self.game_board[i][j] == 0):
-                    return False
-        for i in range(0, 4):
-            for j in range(0, 3):
-                if (self.game_board[i][j] == self.game_board[i][j + 1]):
-                    return False
-        for j in range(0, 4):
-            for i in range(0, 3):
-                if self.game_board[i][j] == self.game_board[i + 1][j]:
-                    return False
-        gameover = [["G", "A", "M", "E", ], ["", "", "", ""], ["O", "V", "E", "R"], ["", "", "", ""]]
-        cellwidth = 210
-        cellheight = 210
-        self.square = {}
-
-        for column in range(4):
-            for row in range(4):
-                a = column * cellwidth
-                b = row * cellheight
-                c = a + cellwidth - 10
-                d = b + cellheight - 10
-                self.square[row, column] = self.canvas.create_rectangle(a, b, c, d, fill="#ede0c8", tags="rect",
-                                                                        outline="")
-                self.canvas.create_text((a + c) / 2, (b + d) / 2, font=("Arial", 36), fill="#494949",
-                                        text=gameover[row][column])
-                
-        self.canvas.update()
-        time.sleep(5)
-        self.destroy()  # Close the Tkinter window
+        if engine2048.max_tile(self.board) >= engine2048.WIN_TILE:
+            self.game_won()
+            return True
+        if engine2048.can_move(self.board):
+            return False
+        self.show_message([["G", "A", "M", "E", ], ["", "", "", ""], ["O", "V", "E", "R"], ["", "", "", ""]])
         return True
 
     # ==== check for game won
     def game_won(self):
-        gameover = [["Y", "O", "U", "", ], ["", "", "", ""], ["W", "O", "N", "!"], ["", "", "", ""]]
-        cellwidth = 210
-        cellheight = 210
-        self.square = {}
-        for column in range(4):
-            for row in range(4):
-                a = column * cellwidth
-                b = row * cellheight
-                c = a + cellwidth - 10
-                d = b + cellheight - 10
-                self.square[row, column] = self.canvas.create_rectangle(a, b, c, d, fill="#ede0c8", tags="rect",
-                                                                        outline="")
-                self.canvas.create_text((a + c) / 2, (b + d) / 2, font=("Arial", 36), fill="#494949",
-                                        text=gameover[row][column])
-        
-        self.canvas.update()
-        time.sleep(5)
-        self.destroy() 
+        self.show_message([["Y", "O", "U", "", ], ["", "", "", ""], ["W", "O", "N", "!"], ["", "", "", ""]])
+
+    # ==== write a message over the board and close the window after 5 seconds
+    def show_message(self, letters):
+        self.finished = True
+        self.ai_running = False
+        self.save_replay()
+        for row in range(4):
+            for column in range(4):
+                self.show_cell(row, column, ("#ede0c8", letters[row][column], "#494949", False))
+        self.end_job = self.after(5000, self.destroy)  # Close the Tkinter window
+
+    # ==== append the current game to the replay file, if one was given
+    def save_replay(self):
+        if self.replay_path and self.recorder is not None and len(self.recorder):
+            self.recorder.save(self.replay_path, append=True)
 
 if __name__ == "__main__":
-    # ==== preparing main window
+    # ==== preparing main window, optional argument: file to append replays to
+    latency.start("2048")
     app = Play_2048()
+    if len(sys.argv) > 1:
+        app.replay_path = sys.argv[1]
     app.bind_all('<Key>', app.moves)
     app.wm_title("2048 Game")
     app.minsize(860, 940)
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,245 @@
+"""
+Expectimax autoplayer for 2048.
+
+Max nodes try every legal move, chance nodes average over every empty cell
+and every spawn value (weighted like ``NEW_TILES``). Leaf boards are scored
+with a heuristic that is precomputed per 16-bit row, so evaluating a board
+is eight table lookups. Searched positions are kept in a bounded LRU
+transposition table keyed on (board, depth), and the search can be limited
+by depth, by a time budget in milliseconds, or both.
+"""
+import time
+from collections import OrderedDict
+import engine2048
+from engine2048 import DIRECTIONS, NEW_TILES, ROW_MASK
+
+# ==== heuristic weights (per row and per column)
+LOST_PENALTY = 200000.0
+MONOTONICITY_POWER = 4.0
+MONOTONICITY_WEIGHT = 47.0
+SUM_POWER = 3.5
+SUM_WEIGHT = 11.0
+MERGES_WEIGHT = 700.0
+EMPTY_WEIGHT = 270.0
+
+# ==== chance nodes below this probability are scored by the heuristic
+MIN_PROBABILITY = 0.0001
+
+_heuristic_table = None
+
+
+def _row_heuristic(row):
+    line = [(row >> shift) & 0xF for shift in (0, 4, 8, 12)]
+    total = sum(exponent ** SUM_POWER for exponent in line)
+    empty = line.count(0)
+    merges = 0
+    previous = 0
+    counter = 0
+    for exponent in line:
+        if exponent == 0:
+            continue
+        if previous == exponent:
+            counter += 1
+        elif counter > 0:
+            merges += 1 + counter
+            counter = 0
+        previous = exponent
+    if counter > 0:
+        merges += 1 + counter
+
+    monotonicity_left = 0.0
+    monotonicity_right = 0.0
+    for i in range(1, 4):
+        left = line[i - 1] ** MONOTONICITY_POWER
+        right = line[i] ** MONOTONICITY_POWER
+        if line[i - 1] > line[i]:
+            monotonicity_left += left - right
+        else:
+            monotonicity_right += right - left
+
+    return (LOST_PENALTY + EMPTY_WEIGHT * empty + MERGES_WEIGHT * merges
+            - MONOTONICITY_WEIGHT * min(monotonicity_left, monotonicity_right)
+            - SUM_WEIGHT * total)
+
+
+def heuristic_table():
+    """65,536-entry row heuristic, built on first use."""
+    global _heuristic_table
+    if _heuristic_table is None:
+        _heuristic_table = [_row_heuristic(row) for row in range(65536)]
+    return _heuristic_table
+
+
+def evaluate(board, table=None):
+    """Heuristic value of a board: all rows plus all columns."""
+    if table is None:
+        table = heuristic_table()
+    t = engine2048.transpose(board)
+    return (table[board & ROW_MASK] + table[(board >> 16) & ROW_MASK]
+            + table[(board >> 32) & ROW_MASK] + table[(board >> 48) & ROW_MASK]
+            + table[t & ROW_MASK] + table[(t >> 16) & ROW_MASK]
+            + table[(t >> 32) & ROW_MASK] + table[(t >> 48) & ROW_MASK])
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ExpectimaxPlayer:
+    """
+    Picks moves with depth-limited expectimax.
+
+    Parameters:
+    -----------
+    depth : int
+        Maximum search depth in moves.
+    time_budget_ms : float or None
+        If given, iterative deepening runs depth 1, 2, ... up to ``depth``
+        and returns the best move of the deepest search that finished
+        within the budget.
+    cache_size : int
+        Maximum number of entries kept in the LRU transposition table.
+    tiles : sequence of int
+        Spawn distribution the chance nodes assume.
+    """
+
+    def __init__(self, depth=3, time_budget_ms=None, cache_size=200000, tiles=NEW_TILES):
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.table = heuristic_table()
+        self.spawns = [(value.bit_length() - 1, tiles.count(value) / len(tiles)) for value in sorted(set(tiles))]
+
+        # ==== statistics of the last call to best_move and over the player's lifetime
+        self.nodes = 0
+        self.cache_hits = 0
+        self.last_depth = 0
+        self.last_elapsed_ms = 0.0
+        self.total_nodes = 0
+        self.total_seconds = 0.0
+        self._deadline = None
+
+    @property
+    def nodes_per_second(self):
+        if self.last_elapsed_ms <= 0:
+            return 0.0
+        return self.nodes / (self.last_elapsed_ms / 1000.0)
+
+    @property
+    def average_nodes_per_second(self):
+        if self.total_seconds <= 0:
+            return 0.0
+        return self.total_nodes / self.total_seconds
+
+    def stats(self):
+        return {
+            "depth": self.last_depth,
+            "nodes": self.nodes,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self.cache),
+            "elapsed_ms": self.last_elapsed_ms,
+            "nodes_per_second": self.nodes_per_second,
+        }
+
+    def best_move(self, board):
+        """Returns the chosen direction, or None if no move is possible."""
+        start = time.perf_counter()
+        self.nodes = 0
+        self.cache_hits = 0
+        self.last_depth = 0
+        self._deadline = None
+        if self.time_budget_ms is not None:
+            self._deadline = start + self.time_budget_ms / 1000.0
+
+        best = None
+        depths = range(1, self.depth + 1) if self._deadline is not None else (self.depth,)
+        for depth in depths:
+            try:
+                choice = self._search_root(board, depth)
+            except SearchTimeout:
+                break
+            if choice is None:
+                break
+            best = choice
+            self.last_depth = depth
+
+        if best is None:
+            # ==== budget ran out before depth 1 finished, fall back to the first legal move
+            for direction in DIRECTIONS:
+                if engine2048.move(board, direction)[0] != board:
+                    best = direction
+                    break
+
+        elapsed = time.perf_counter() - start
+        self.last_elapsed_ms = elapsed * 1000.0
+        self.total_nodes += self.nodes
+        self.total_seconds += elapsed
+        return best
+
+    def _search_root(self, board, depth):
+        best_value = None
+        best_direction = None
+        for direction in DIRECTIONS:
+            moved, _ = engine2048.move(board, direction)
+            if moved == board:
+                continue
+            value = self._chance(moved, depth - 1, 1.0)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_direction = direction
+        return best_direction
+
+    def _max(self, board, depth, probability):
+        best = 0.0
+        for direction in DIRECTIONS:
+            moved, _ = engine2048.move(board, direction)
+            if moved != board:
+                value = self._chance(moved, depth - 1, probability)
+                if value > best:
+                    best = value
+        return best
+
+    def _chance(self, board, depth, probability):
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 255 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+        if depth <= 0 or probability < MIN_PROBABILITY:
+            return evaluate(board, self.table)
+
+        key = (board, depth)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return cached
+
+        empty = engine2048.empty_cells(board)
+        cell_probability = probability / len(empty)
+        value = 0.0
+        for cell in empty:
+            shift = 4 * cell
+            for exponent, weight in self.spawns:
+                value += weight * self._max(board | (exponent << shift), depth, cell_probability * weight)
+        value /= len(empty)
+
+        self.cache[key] = value
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return value
+
+
+def play_game(player, seed=None, tiles=NEW_TILES):
+    """Plays one headless game with ``player`` and returns the finished Game."""
+    game = engine2048.Game(seed=seed, tiles=tiles)
+    while True:
+        direction = player.best_move(game.board)
+        if direction is None or not game.move(direction):
+            return game
+
+
+if __name__ == "__main__":
+    player = ExpectimaxPlayer(depth=3, time_budget_ms=100)
+    game = play_game(player, seed=0)
+    print("score", game.score, "max tile", game.max_tile, "moves", game.moves,
+          "avg nodes/s", int(player.average_nodes_per_second))
@@ -0,0 +1,229 @@
+"""
+Vectorized 2048 simulation for many boards at once.
+
+Boards are held as an (N, 4, 4) uint8 array of tile exponents, the same
+encoding engine2048 packs into nibbles. A move for all boards is one
+gather into "move left" orientation, one lookup into the engine's row
+tables and one scatter back, so the cost per move is a few NumPy passes
+regardless of N.
+"""
+import time
+import numpy as np
+import engine2048
+from engine2048 import UP, DOWN, LEFT, RIGHT, NEW_TILES
+
+
+def _build_numpy_tables():
+    rows = np.arange(65536, dtype=np.uint32)
+    left = np.array(engine2048.ROW_LEFT, dtype=np.uint32)
+    results = rows ^ left
+    shifts = np.array([0, 4, 8, 12], dtype=np.uint32)
+    left_rows = ((results[:, None] >> shifts) & 0xF).astype(np.uint8)
+    left_scores = np.array(engine2048.SCORE_LEFT, dtype=np.int64)
+    can_left = left != 0
+    can_right = np.array(engine2048.ROW_RIGHT, dtype=np.uint32) != 0
+    return left_rows, left_scores, can_left, can_right
+
+
+# ==== row tables: 16-bit row index -> moved row (4 exponents), merge score,
+# ==== and whether the row changes when moved left / right
+LEFT_ROWS, LEFT_SCORES, CAN_LEFT, CAN_RIGHT = _build_numpy_tables()
+
+
+def _pack(lines):
+    """Packs (..., 4) exponent lines into 16-bit row indices, capped at 15."""
+    lines = np.minimum(lines, 15).astype(np.uint16)
+    return lines[..., 0] | (lines[..., 1] << 4) | (lines[..., 2] << 8) | (lines[..., 3] << 12)
+
+
+def _orientations():
+    """
+    Cell permutations that view a board as if the move were LEFT.
+
+    ``oriented[k] = board[PERM[d][k]]`` for flattened cell indices, so every
+    direction can share the LEFT row table.
+    """
+    cells = np.arange(16).reshape(4, 4)
+    perms = np.empty((4, 16), dtype=np.intp)
+    perms[LEFT] = cells.ravel()
+    perms[RIGHT] = cells[:, ::-1].ravel()
+    perms[UP] = cells.T.ravel()
+    perms[DOWN] = cells[::-1, :].T.ravel()
+    return perms
+
+
+PERMS = _orientations()
+
+
+def move_boards(boards, directions):
+    """
+    Applies one move to every board.
+
+    Parameters:
+    -----------
+    boards : np.ndarray
+        (N, 4, 4) uint8 exponent array. It is not modified.
+    directions : int or np.ndarray
+        A single direction for all boards, or an (N,) array of directions.
+
+    Returns:
+    --------
+    (moved, gained) : tuple of np.ndarray
+        The (N, 4, 4) boards after the move and the (N,) merge score.
+    """
+    n = boards.shape[0]
+    flat = boards.reshape(n, 16)
+    perm = PERMS[np.broadcast_to(np.asarray(directions, dtype=np.intp), (n,))]
+    rows = np.take_along_axis(flat, perm, axis=1).reshape(n, 4, 4)
+    index = _pack(rows)
+    moved_rows = LEFT_ROWS[index]
+    gained = LEFT_SCORES[index].sum(axis=1)
+    moved = np.empty_like(flat)
+    np.put_along_axis(moved, perm, moved_rows.reshape(n, 16), axis=1)
+    return moved.reshape(n, 4, 4), gained
+
+
+def can_move(boards):
+    """(N,) bool: True where any cell is empty or two neighbours can merge."""
+    empty = (boards == 0).any(axis=(1, 2))
+    horizontal = (boards[:, :, 1:] == boards[:, :, :-1]).any(axis=(1, 2))
+    vertical = (boards[:, 1:, :] == boards[:, :-1, :]).any(axis=(1, 2))
+    return empty | horizontal | vertical
+
+
+def legal_moves(boards):
+    """(N, 4) bool: which of UP, DOWN, LEFT, RIGHT change each board."""
+    rows = _pack(boards)
+    columns = _pack(boards.transpose(0, 2, 1))
+    legal = np.empty((boards.shape[0], 4), dtype=bool)
+    legal[:, UP] = CAN_LEFT[columns].any(axis=1)
+    legal[:, DOWN] = CAN_RIGHT[columns].any(axis=1)
+    legal[:, LEFT] = CAN_LEFT[rows].any(axis=1)
+    legal[:, RIGHT] = CAN_RIGHT[rows].any(axis=1)
+    return legal
+
+
+def random_legal_policy(rng):
+    """Builds a policy that picks a uniformly random legal move per board."""
+    def policy(boards):
+        legal = legal_moves(boards)
+        weights = rng.random(legal.shape) * legal
+        return weights.argmax(axis=1)
+    return policy
+
+
+class BatchGame:
+    """
+    N independent games stepped together.
+
+    Parameters:
+    -----------
+    n : int
+        Number of concurrent boards.
+    seed : int or None
+        Seed for the NumPy generator used for spawns and the default policy.
+    tiles : sequence of int
+        Spawn distribution, drawn uniformly like Play_2048.new_random_tiles.
+    """
+
+    def __init__(self, n, seed=None, tiles=NEW_TILES):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.tile_exponents = np.array([value.bit_length() - 1 for value in tiles], dtype=np.uint8)
+        self.boards = np.zeros((n, 4, 4), dtype=np.uint8)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.moves = np.zeros(n, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+        everyone = np.ones(n, dtype=bool)
+        self.spawn(everyone, np.array([1], dtype=np.uint8))
+        self.spawn(everyone)
+
+    def spawn(self, index, exponents=None):
+        """Adds one tile to a random empty cell of every board in ``index``."""
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        if index.size == 0:
+            return
+        if exponents is None:
+            exponents = self.tile_exponents
+        flat = self.boards.reshape(self.n, 16)
+        empty = flat[index] == 0
+        # ==== random weight per empty cell, argmax picks one uniformly
+        weights = self.rng.random((index.size, 16)) * empty
+        cells = weights.argmax(axis=1)
+        has_room = empty.any(axis=1)
+        values = exponents[self.rng.integers(len(exponents), size=index.size)]
+        flat[index[has_room], cells[has_room]] = values[has_room]
+
+    def step(self, directions):
+        """
+        Moves every live board, spawns where the board changed and updates
+        the game-over mask. Finished boards are skipped, so the cost of a
+        step shrinks as games end. Returns the (N,) bool array of boards
+        that moved.
+        """
+        live = np.flatnonzero(self.alive)
+        directions = np.broadcast_to(np.asarray(directions, dtype=np.intp), (self.n,))[live]
+        boards = self.boards[live]
+        moved, gained = move_boards(boards, directions)
+        changed = (moved != boards).any(axis=(1, 2))
+        moved_index = live[changed]
+        self.boards[moved_index] = moved[changed]
+        self.scores[moved_index] += gained[changed]
+        self.moves[moved_index] += 1
+        self.spawn(moved_index)
+        self.alive[moved_index] = can_move(self.boards[moved_index])
+        result = np.zeros(self.n, dtype=bool)
+        result[moved_index] = True
+        return result
+
+    def run(self, policy=None, max_steps=None):
+        """
+        Steps until every board is over (or ``max_steps``). ``policy`` maps
+        the (M, 4, 4) live boards to M directions. Returns steps taken.
+        """
+        if policy is None:
+            policy = random_legal_policy(self.rng)
+        directions = np.zeros(self.n, dtype=np.intp)
+        steps = 0
+        while self.alive.any() and (max_steps is None or steps < max_steps):
+            directions[self.alive] = policy(self.boards[self.alive])
+            self.step(directions)
+            steps += 1
+        return steps
+
+    def max_tiles(self):
+        highest = self.boards.reshape(self.n, 16).max(axis=1).astype(np.int64)
+        return np.where(highest > 0, 1 << highest, 0)
+
+    def results(self):
+        """Per-board score, max tile and move count."""
+        return {"score": self.scores.copy(), "max_tile": self.max_tiles(), "moves": self.moves.copy()}
+
+
+def sweep(tile_distributions, n=10000, seed=0):
+    """
+    Plays ``n`` random-policy games for each spawn distribution and
+    summarises them, e.g. ``sweep([NEW_TILES, (2,) * 9 + (4,)])``.
+    """
+    summary = []
+    for tiles in tile_distributions:
+        start = time.perf_counter()
+        game = BatchGame(n, seed=seed, tiles=tiles)
+        game.run()
+        elapsed = time.perf_counter() - start
+        results = game.results()
+        summary.append({
+            "tiles": tuple(tiles),
+            "mean_score": float(results["score"].mean()),
+            "max_tile_counts": dict(zip(*[a.tolist() for a in np.unique(results["max_tile"], return_counts=True)])),
+            "moves_per_second": float(results["moves"].sum() / elapsed),
+            "seconds": elapsed,
+        })
+    return summary
+
+
+if __name__ == "__main__":
+    for row in sweep([NEW_TILES, (2,) * 9 + (4,)], n=100000):
+        print(row)
@@ -0,0 +1,185 @@
+"""
+Benchmarks for the 2048 move/merge hot path.
+
+Every step Play_2048 takes on a key press goes through the engine: moves()
+calls engine2048.move for one of four directions, new_tiles() calls
+spawn_tile, full() calls is_full and game_over() calls game_over. Those
+calls are timed here over a fixed corpus of board positions, headless, and
+the results are written as JSON so runs from different commits can be
+compared with --baseline.
+
+The corpus is built from seeded random-policy games unless a replay file
+from replay2048 is given, in which case every position of every game in it
+is used.
+
+Reported per benchmark:
+    ops_per_second      throughput of a tight loop over the corpus
+    p50_ns, p99_ns      latency of single calls
+    allocations_per_op  memory blocks still held per call when the result is
+                        kept (tuples and ints), from sys.getallocatedblocks()
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import engine2048
+import replay2048
+
+CORPUS_SEED = 2048
+CORPUS_GAMES = 50
+
+
+def build_corpus(games=CORPUS_GAMES, seed=CORPUS_SEED):
+    """Every position of ``games`` seeded random-policy games."""
+    rng = random.Random(seed)
+    boards = []
+    for index in range(games):
+        game = replay2048.RecordedGame(seed=(seed << 16) | index)
+        boards.append(game.board)
+        while True:
+            legal = game.legal_moves()
+            if not legal:
+                break
+            game.move(rng.choice(legal))
+            boards.append(game.board)
+    return boards
+
+
+def load_corpus(path):
+    boards = []
+    for replay in replay2048.iter_replays(path):
+        boards.extend(board for board, score in replay.states())
+    return boards
+
+
+def _benchmarks(seed):
+    spawn_rng = random.Random(seed)
+    benchmarks = {}
+    for direction, name in enumerate(engine2048.DIRECTION_NAMES):
+        benchmarks["moves_" + name.lower()] = (lambda d: lambda board: engine2048.move(board, d))(direction)
+    benchmarks["full"] = engine2048.is_full
+    benchmarks["game_over"] = engine2048.game_over
+    benchmarks["new_tiles"] = lambda board: engine2048.spawn_tile(board, spawn_rng, engine2048.NEW_TILES)
+    return benchmarks
+
+
+def _percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100.0 * len(sorted_values)))]
+
+
+def run_benchmark(function, corpus, repeat=5):
+    # ==== throughput: best of a few tight loops
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for board in corpus:
+            function(board)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    # ==== latency: one timer per call
+    clock = time.perf_counter_ns
+    samples = []
+    for board in corpus:
+        start = clock()
+        function(board)
+        samples.append(clock() - start)
+    samples.sort()
+
+    # ==== allocations: blocks left behind while every result is kept alive
+    gc.collect()
+    gc.disable()
+    try:
+        results = [None] * len(corpus)
+        before = sys.getallocatedblocks()
+        for i, board in enumerate(corpus):
+            results[i] = function(board)
+        allocated = sys.getallocatedblocks() - before
+    finally:
+        gc.enable()
+    del results
+
+    return {
+        "ops_per_second": len(corpus) / best,
+        "p50_ns": _percentile(samples, 50),
+        "p99_ns": _percentile(samples, 99),
+        "allocations_per_op": allocated / len(corpus),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_all(corpus, seed=CORPUS_SEED, only=None, repeat=5):
+    results = {}
+    for name, function in _benchmarks(seed).items():
+        if only and name not in only:
+            continue
+        results[name] = run_benchmark(function, corpus, repeat)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus_size": len(corpus),
+        "seed": seed,
+        "benchmarks": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Prints speedups against a baseline report. Returns names that regressed."""
+    regressions = []
+    for name, result in report["benchmarks"].items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            continue
+        ratio = result["ops_per_second"] / old["ops_per_second"]
+        print("%-14s %6.2fx" % (name, ratio), file=sys.stderr)
+        if ratio < threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the 2048 move/merge hot path.")
+    parser.add_argument("--replays", help="replay file to take board positions from")
+    parser.add_argument("--games", type=int, default=CORPUS_GAMES, help="seeded games in the generated corpus")
+    parser.add_argument("--seed", type=int, default=CORPUS_SEED)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="exit non-zero if a benchmark drops below this fraction of the baseline")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.replays) if args.replays else build_corpus(args.games, args.seed)
+    report = run_all(corpus, args.seed, args.only, args.repeat)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("regressed: " + ", ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
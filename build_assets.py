@@ -0,0 +1,212 @@
+"""
+Image pipeline for the web puzzle pages.
+
+Walks the root and part*/ for PNG/JPEG images and writes resized WebP and
+AVIF variants next to where the image lives in the output tree, e.g.
+
+    part1/images/granca.png -> build/site/part1/images/granca-640.webp
+                               build/site/part1/images/granca-640.avif ...
+
+Images are encoded in parallel, one process per image. A content-hash cache
+(build/site/.assets-cache.json) remembers the source SHA-1 and the encoder
+settings of every image, so a rebuild skips images that did not change.
+build/site/assets.json lists the variants and a ready <picture> element
+with srcset for each image, for the pages to use.
+"""
+import argparse
+import glob
+import hashlib
+import html
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(HERE, "build", "site")
+CACHE_FILE = ".assets-cache.json"
+MANIFEST_FILE = "assets.json"
+PATTERNS = ("*.png", "*.jpg", "*.jpeg", "part*/**/*.png", "part*/**/*.jpg", "part*/**/*.jpeg")
+
+WIDTHS = (320, 640, 1280)
+# ==== Pillow save options per format, "type" is the MIME type used in <source>
+FORMATS = {
+    "avif": {"type": "image/avif", "options": {"quality": 55, "speed": 6}},
+    "webp": {"type": "image/webp", "options": {"quality": 80, "method": 6}},
+}
+VERSION = 1
+
+
+def find_images(root=HERE):
+    """Source images relative to ``root``, in a stable order."""
+    found = set()
+    for pattern in PATTERNS:
+        for path in glob.glob(os.path.join(root, pattern), recursive=True):
+            if not os.path.relpath(path, root).startswith("build" + os.sep):
+                found.add(os.path.relpath(path, root).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def settings_hash(widths, formats):
+    settings = json.dumps([VERSION, list(widths), {k: formats[k] for k in sorted(formats)}], sort_keys=True)
+    return hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+
+
+def variant_widths(width, widths=WIDTHS):
+    """Target widths below the source width, plus the source width itself."""
+    return [w for w in widths if w < width] + [width]
+
+
+def build_image(root, relpath, out_dir, widths=WIDTHS, formats=FORMATS):
+    """Encodes every variant of one image and returns its manifest entry."""
+    start = time.perf_counter()
+    source = os.path.join(root, relpath)
+    stem, _ = os.path.splitext(relpath)
+    os.makedirs(os.path.dirname(os.path.join(out_dir, relpath)), exist_ok=True)
+    # ==== the original stays available as the <img> fallback
+    shutil.copyfile(source, os.path.join(out_dir, relpath))
+    with Image.open(source) as img:
+        img.load()
+        width, height = img.size
+        mode = "RGBA" if "A" in img.getbands() else "RGB"
+        img = img.convert(mode)
+        variants = []
+        for target in variant_widths(width, widths):
+            resized = img if target == width else img.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS)
+            for fmt, spec in formats.items():
+                name = "%s-%d.%s" % (stem, target, fmt)
+                resized.save(os.path.join(out_dir, name), format=fmt.upper(), **spec["options"])
+                variants.append({"path": name, "format": fmt, "width": target,
+                                 "bytes": os.path.getsize(os.path.join(out_dir, name))})
+    return {"source": relpath, "width": width, "height": height, "bytes": os.path.getsize(source),
+            "variants": variants, "seconds": time.perf_counter() - start}
+
+
+def _build_one(args):
+    root, relpath, out_dir, widths, formats, digest = args
+    entry = build_image(root, relpath, out_dir, widths, formats)
+    entry["sha1"] = digest
+    return entry
+
+
+def picture_html(entry, src=None, alt="", width=None, sizes=None, attrs=None):
+    """
+    <picture> element for a manifest entry, with one <source> per format
+    and the original as the <img> fallback. ``src`` is the image path as
+    written in the page, the variant paths are made relative to it.
+    ``attrs`` are further attributes of the original <img> (class, id,
+    style, height, ...), copied onto the fallback.
+    """
+    src = src or entry["source"]
+    directory = src.rsplit("/", 1)[0] + "/" if "/" in src else ""
+    sizes = sizes or ("%dpx" % width if width else "100vw")
+    sources = []
+    for fmt, spec in FORMATS.items():
+        candidates = ["%s%s %dw" % (directory, v["path"].rsplit("/", 1)[-1], v["width"])
+                      for v in entry["variants"] if v["format"] == fmt]
+        if candidates:
+            sources.append('<source type="%s" srcset="%s" sizes="%s">' % (
+                spec["type"], html.escape(", ".join(candidates), quote=True), html.escape(sizes, quote=True)))
+    extra = dict({"loading": "lazy", "decoding": "async"}, **(attrs or {}))
+    for name in ("src", "alt", "srcset", "sizes") + (("width",) if width else ()):
+        extra.pop(name, None)
+    img = '<img src="%s" alt="%s"%s%s>' % (
+        html.escape(src, quote=True), html.escape(alt, quote=True), ' width="%d"' % width if width else "",
+        "".join(' %s="%s"' % (name, html.escape(value, quote=True)) for name, value in extra.items()))
+    return "<picture>%s%s</picture>" % ("".join(sources), img)
+
+
+def build(root=HERE, out_dir=OUT_DIR, widths=WIDTHS, formats=FORMATS, workers=None, force=False, report=None):
+    """
+    Builds the variants of every changed image and writes the manifest.
+    Returns {relpath: entry}, where skipped images keep their cached entry
+    with "cached": True.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.join(out_dir, CACHE_FILE)
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    settings = settings_hash(widths, formats)
+    if cache.get("settings") != settings:
+        cache = {}
+    entries = cache.get("images", {})
+
+    jobs = []
+    results = {}
+    for relpath in find_images(root):
+        digest = file_hash(os.path.join(root, relpath))
+        old = entries.get(relpath)
+        if not force and old and old["sha1"] == digest and all(
+                os.path.exists(os.path.join(out_dir, p)) for p in [relpath] + [v["path"] for v in old["variants"]]):
+            results[relpath] = dict(old, cached=True)
+        else:
+            jobs.append((root, relpath, out_dir, widths, formats, digest))
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for entry in pool.map(_build_one, jobs):
+                results[entry["source"]] = entry
+                if report is not None:
+                    report(entry)
+
+    with open(cache_path + ".tmp", "w") as f:
+        json.dump({"settings": settings,
+                   "images": {k: {key: v for key, v in e.items() if key != "cached"} for k, e in results.items()}},
+                  f, indent=1)
+    os.replace(cache_path + ".tmp", cache_path)
+    manifest = {relpath: dict((k, v) for k, v in e.items() if k not in ("cached", "seconds", "sha1")) for relpath, e in results.items()}
+    for relpath, entry in manifest.items():
+        entry["picture"] = picture_html(entry, relpath.rsplit("/", 1)[-1])
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False)
+    return results
+
+
+def best_variant(entry):
+    return min(entry["variants"], key=lambda v: (v["width"] != entry["width"], v["bytes"]))
+
+
+def format_row(entry):
+    best = best_variant(entry)
+    saved = entry["bytes"] - best["bytes"]
+    # ==== a cached entry still carries the time of the build that made it, not this one
+    took = "%10s" % "cached" if entry.get("cached") else "%7.0f ms" % (1000 * entry.get("seconds", 0.0))
+    return "%-32s %9d -> %8d %-4s  saved %5.1f%%  %s" % (
+        entry["source"], entry["bytes"], best["bytes"], best["format"], 100.0 * saved / entry["bytes"], took)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompress the puzzle page images to resized WebP/AVIF.")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="ignore the cache")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = build(out_dir=args.out, workers=args.workers, force=args.force,
+                    report=lambda entry: print(format_row(entry), flush=True))
+    cached = [e for e in results.values() if e.get("cached")]
+    for entry in cached:
+        print(format_row(entry))
+    original = sum(e["bytes"] for e in results.values())
+    best = sum(best_variant(e)["bytes"] for e in results.values())
+    print("%d images (%d cached), %d -> %d bytes at full width, %d bytes saved, %.2f s"
+          % (len(results), len(cached), original, best, original - best, time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+Static site bundler for the puzzle pages.
+
+Reads the hand-written pages (index.html at the root and in part*/), pulls
+out their linked and inline CSS and JavaScript and renders every page again
+from the shared templates/page.html into build/site/:
+
+  * CSS is minified and split into rules. A rule repeated later in the same
+    page is kept only in its last position, which leaves the cascade as it
+    was. Pages with the same styles share one bundle.
+  * JavaScript is concatenated and lightly minified (comments and
+    indentation only, string contents are never touched).
+  * Bundles are written as assets/<name>.<hash>.css|js, so they can be
+    cached forever. build/site/manifest.json maps every page and bundle to
+    its output and records the hashes of the inputs.
+  * Images the pages show are copied along, and those listed by
+    build_assets.py (build/site/assets.json) become <picture> elements
+    with WebP/AVIF srcsets.
+  * Every text output gets precompressed .gz and, with the brotli module
+    installed, .br siblings.
+
+A rebuild only renders pages whose inputs (page, linked files, template,
+image manifest) changed. ``--serve`` previews the output with http.server,
+sending the precompressed files when the browser accepts them.
+"""
+import argparse
+import filecmp
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import time
+from string import Template
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUT_DIR = os.path.join(HERE, "build", "site")
+TEMPLATE = os.path.join(HERE, "templates", "page.html")
+MANIFEST_FILE = "manifest.json"
+ASSET_MANIFEST = "assets.json"  # written by build_assets.py
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt")
+VERSION = 1
+
+TITLE_RE = re.compile(r"<title>(.*?)</title>", re.S | re.I)
+LANG_RE = re.compile(r"<html[^>]*\blang=\"([^\"]*)\"", re.I)
+BODY_RE = re.compile(r"<body[^>]*>(.*)</body>", re.S | re.I)
+STYLE_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+LINK_RE = re.compile(r"<link[^>]*rel=\"stylesheet\"[^>]*href=\"([^\"]+)\"[^>]*>", re.I)
+SCRIPT_RE = re.compile(r"<script([^>]*)>(.*?)</script>", re.S | re.I)
+SRC_RE = re.compile(r"\bsrc=\"([^\"]+)\"", re.I)
+IMG_RE = re.compile(r"<img\b([^>]*)>", re.I)
+ATTR_RE = re.compile(r"([\w:-]+)=\"([^\"]*)\"")
+
+
+def find_pages(root=HERE):
+    """Page sources relative to ``root``: index.html and part*/index.html."""
+    pages = ["index.html"] if os.path.exists(os.path.join(root, "index.html")) else []
+    for name in sorted(os.listdir(root)):
+        if name.startswith("part") and os.path.exists(os.path.join(root, name, "index.html")):
+            pages.append(name + "/index.html")
+    return pages
+
+
+# ==== minifiers
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    # ==== a space before ":" is a descendant combinator in selectors, drop it only in declarations
+    css = re.sub(r"\s*:\s*(?=[^{};]*[;}])", ":", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def css_rules(css):
+    """Top-level rules (including @-blocks) of minified CSS."""
+    rules, depth, start = [], 0, 0
+    for i, c in enumerate(css):
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start:i + 1])
+                start = i + 1
+    return rules
+
+
+def dedupe_rules(rules):
+    """Drops every rule that appears again later, keeping the last one in place."""
+    last = {rule: i for i, rule in enumerate(rules)}
+    return [rule for i, rule in enumerate(rules) if last[rule] == i]
+
+
+def minify_js(js):
+    """
+    Drops block comments, whole-line // comments, indentation and blank
+    lines. Quotes are tracked so comment markers inside strings stay, and
+    lines inside a template literal keep their whitespace. The rest of a
+    line after // is kept as it is, since it may be a regex literal.
+    """
+    out, in_block, quote = [], False, None
+    for line in js.splitlines():
+        in_template = quote == "`"
+        kept, i = [], 0
+        while i < len(line):
+            c = line[i]
+            if in_block:
+                end = line.find("*/", i)
+                if end < 0:
+                    break
+                in_block, i = False, end + 2
+                kept.append(" ")
+                continue
+            if quote:
+                if c == "\\":
+                    kept.append(line[i:i + 2])
+                    i += 2
+                    continue
+                if c == quote:
+                    quote = None
+            elif c in "'\"`":
+                quote = c
+            elif line.startswith("/*", i):
+                in_block, i = True, i + 2
+                continue
+            elif line.startswith("//", i):
+                kept.append(line[i:])
+                break
+            kept.append(c)
+            i += 1
+        if quote != "`":
+            # ==== only template literals span lines
+            quote = None
+        text = "".join(kept)
+        if not in_template:
+            text = text.lstrip()
+        if quote != "`":
+            text = text.rstrip()
+        if in_template or quote == "`" or text and not text.startswith("//"):
+            out.append(text)
+    return "\n".join(out)
+
+
+def minify_html(html):
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+
+
+# ==== page model
+def read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_page(root, relpath):
+    """
+    Splits a hand-written page into title, lang, body HTML and the ordered
+    CSS/JS sources. Returns the page dict and the input files it read.
+    """
+    html = read_text(os.path.join(root, relpath))
+    page_dir = os.path.dirname(relpath)
+    inputs = [relpath]
+    head, _, _ = html.partition("<body")
+    css = []
+    for match in re.finditer(r"%s|%s" % (LINK_RE.pattern, STYLE_RE.pattern), head, re.S | re.I):
+        if match.group(1):
+            linked = os.path.normpath(os.path.join(page_dir, match.group(1)))
+            if os.path.exists(os.path.join(root, linked)):
+                inputs.append(linked.replace(os.sep, "/"))
+                css.append(read_text(os.path.join(root, linked)))
+            else:
+                print("%s: missing stylesheet %s, skipped" % (relpath, match.group(1)), file=sys.stderr)
+        else:
+            css.append(match.group(2))
+
+    body_match = BODY_RE.search(html)
+    body = body_match.group(1) if body_match else ""
+    js = []
+    # ==== head scripts run first, so they go first into the bundle at the end of the body
+    for attrs, content in SCRIPT_RE.findall(head) + SCRIPT_RE.findall(body):
+        src = SRC_RE.search(attrs)
+        if src:
+            linked = os.path.normpath(os.path.join(page_dir, src.group(1)))
+            if os.path.exists(os.path.join(root, linked)):
+                inputs.append(linked.replace(os.sep, "/"))
+                js.append(read_text(os.path.join(root, linked)))
+            else:
+                print("%s: missing script %s, skipped" % (relpath, src.group(1)), file=sys.stderr)
+        else:
+            js.append(content)
+    title = TITLE_RE.search(html)
+    lang = LANG_RE.search(html)
+    page = {
+        "path": relpath,
+        "title": title.group(1).strip() if title else "",
+        "lang": lang.group(1) if lang else "no",
+        "body": SCRIPT_RE.sub("", body),
+        "css": "".join(dedupe_rules(css_rules(minify_css("\n".join(css))))),
+        "js": minify_js("\n;\n".join(j.strip() for j in js if j.strip())),
+    }
+    return page, inputs
+
+
+def pictures(body, page_dir, assets):
+    """Swaps <img> tags of images known to build_assets.py for <picture> elements."""
+    if not assets:
+        return body
+    import build_assets
+
+    def replace(match):
+        # ==== picture_html escapes the values again
+        attrs = {name: html.unescape(value) for name, value in ATTR_RE.findall(match.group(1))}
+        src = attrs.get("src", "")
+        entry = assets.get(os.path.normpath(os.path.join(page_dir, src)).replace(os.sep, "/"))
+        if entry is None:
+            return match.group(0)
+        width = int(attrs["width"]) if attrs.get("width", "").isdigit() else None
+        return build_assets.picture_html(entry, src, attrs.get("alt", ""), width, attrs=attrs)
+    return IMG_RE.sub(replace, body)
+
+
+def copy_images(root, relpath, body, out_dir):
+    """
+    Copies the local images that <img> tags of a page point at into
+    ``out_dir``, so the page works whether or not build_assets.py wrote
+    there. Returns the copied paths.
+    """
+    copied = []
+    for attrs in IMG_RE.findall(body):
+        src = dict(ATTR_RE.findall(attrs)).get("src", "").split("#", 1)[0].split("?", 1)[0]
+        if not src or re.match(r"\w+:|/", src):
+            continue
+        image = os.path.normpath(os.path.join(os.path.dirname(relpath), src))
+        if image.startswith(".."):
+            continue
+        source, target = os.path.join(root, image), os.path.join(out_dir, image)
+        if not os.path.isfile(source):
+            print("%s: missing image %s, skipped" % (relpath, src), file=sys.stderr)
+            continue
+        if os.path.exists(target) and filecmp.cmp(source, target, shallow=False):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+        copied.append(image.replace(os.sep, "/"))
+    return copied
+
+
+# ==== output
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+def write_output(out_dir, relpath, data):
+    """Writes ``data`` and its precompressed siblings, skipping unchanged files."""
+    path = os.path.join(out_dir, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, "wb") as f:
+        f.write(data)
+    if relpath.endswith(COMPRESSIBLE):
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(data, quality=11))
+    return True
+
+
+def write_asset(out_dir, name, ext, text, assets):
+    data = text.encode("utf-8")
+    relpath = "assets/%s.%s.%s" % (name, content_hash(data), ext)
+    write_output(out_dir, relpath, data)
+    assets[relpath] = len(data)
+    return relpath
+
+
+def input_hashes(root, inputs):
+    return {path: content_hash(open(os.path.join(root, path), "rb").read()) for path in inputs}
+
+
+def build(root=HERE, out_dir=OUT_DIR, template_path=TEMPLATE, force=False):
+    """
+    Renders every page into ``out_dir``. Returns (built pages, skipped pages).
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path) as f:
+            old = json.load(f)
+        if old.get("version") != VERSION:
+            old = {}
+    except (OSError, ValueError):
+        old = {}
+    old_pages = old.get("pages", {})
+
+    template_text = read_text(template_path)
+    template = Template(template_text)
+    try:
+        image_text = read_text(os.path.join(out_dir, ASSET_MANIFEST))
+        images = json.loads(image_text)
+    except (OSError, ValueError):
+        image_text, images = "", {}
+    shared = content_hash((str(VERSION) + template_text + image_text).encode("utf-8"))
+
+    pages, assets, built, skipped = {}, {}, [], []
+    for relpath in find_pages(root):
+        page, inputs = parse_page(root, relpath)
+        hashes = input_hashes(root, inputs)
+        copy_images(root, relpath, page["body"], out_dir)
+        previous = old_pages.get(relpath)
+        if (not force and previous and previous["inputs"] == hashes and previous["shared"] == shared
+                and all(os.path.exists(os.path.join(out_dir, p)) for p in [relpath] + previous["assets"])):
+            pages[relpath] = previous
+            for asset in previous["assets"]:
+                assets[asset] = old.get("assets", {}).get(asset, 0)
+            skipped.append(relpath)
+            continue
+
+        page_dir = os.path.dirname(relpath)
+        used, styles, scripts = [], "", ""
+        if page["css"]:
+            used.append(write_asset(out_dir, "style", "css", page["css"], assets))
+            styles = '    <link rel="stylesheet" href="%s">' % os.path.relpath(used[-1], page_dir or ".").replace(os.sep, "/")
+        if page["js"]:
+            used.append(write_asset(out_dir, "script", "js", page["js"], assets))
+            scripts = '<script src="%s"></script>' % os.path.relpath(used[-1], page_dir or ".").replace(os.sep, "/")
+        body = pictures(page["body"], page_dir, images)
+        html = template.substitute(lang=page["lang"], title=page["title"], styles=styles,
+                                   body=body.strip("\n"), scripts=scripts)
+        write_output(out_dir, relpath, minify_html(html).encode("utf-8"))
+        pages[relpath] = {"inputs": hashes, "shared": shared, "assets": used}
+        built.append(relpath)
+
+    # ==== bundles that no page uses any more
+    for stale in set(old.get("assets", {})) - set(assets):
+        for suffix in ("", ".gz", ".br"):
+            if os.path.exists(os.path.join(out_dir, stale + suffix)):
+                os.remove(os.path.join(out_dir, stale + suffix))
+
+    manifest = {"version": VERSION, "pages": pages, "assets": assets}
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return built, skipped
+
+
+# ==== preview
+def serve(out_dir=OUT_DIR, port=8000, base="/Julepuzzle"):
+    """
+    Serves ``out_dir`` on localhost, also under ``base`` (the GitHub Pages
+    path the pages link to). Sends .br/.gz files when the client accepts them.
+    """
+    import http.server
+    import mimetypes
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=out_dir, **kwargs)
+
+        def translate_path(self, path):
+            if base and (path == base or path.startswith(base + "/")):
+                path = path[len(base):] or "/"
+            return super().translate_path(path)
+
+        def send_head(self):
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                if not self.path.split("?", 1)[0].endswith("/"):
+                    return super().send_head()
+                path = os.path.join(path, "index.html")
+            accepted = self.headers.get("Accept-Encoding", "")
+            for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+                if encoding in accepted and os.path.exists(path + suffix):
+                    f = open(path + suffix, "rb")
+                    self.send_response(200)
+                    self.send_header("Content-Type", mimetypes.guess_type(path)[0] or "application/octet-stream")
+                    self.send_header("Content-Encoding", encoding)
+                    self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                    self.send_header("Vary", "Accept-Encoding")
+                    self.end_headers()
+                    return f
+            return super().send_head()
+
+        def end_headers(self):
+            if "/assets/" in self.path:
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            super().end_headers()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print("serving %s on http://127.0.0.1:%d%s/" % (out_dir, port, base))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bundle the puzzle pages into build/site.")
+    parser.add_argument("--out", default=OUT_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild every page")
+    parser.add_argument("--serve", action="store_true", help="preview the output after building")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    built, skipped = build(out_dir=args.out, force=args.force)
+    print("%d pages built, %d unchanged, %.1f ms%s" % (len(built), len(skipped), 1000 * (time.perf_counter() - start),
+                                                      "" if brotli else " (no brotli module, .gz only)"))
+    for page in built:
+        print("  " + page)
+    if args.serve:
+        serve(args.out, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
+import argparse
+import os
+import re
 import matplotlib.pyplot as plt
+import imagecache
+import imagemeta
+import puzzlepack
 
 def mark_differences(image_path):
     """
@@ -12,12 +18,16 @@ def mark_differences(image_path):
         File path to the image where the user will identify differences.
     """
     
-    # Load the image
-    img = plt.imread(image_path)
+    # Load the image (decoded once, later runs memory-map the cached pyramid)
+    pyramid = imagecache.load(image_path)
+    height, width = pyramid.shape[:2]
     
-    # Display the image
+    # Display the pyramid level matching the axes, stretched over full-resolution
+    # pixel coordinates so the clicks come back in full-resolution pixels
     fig, ax = plt.subplots(figsize=(10, 10), tight_layout=True)
-    ax.imshow(img)
+    box = ax.get_window_extent()
+    scale = min(box.width / width, box.height / height)
+    ax.imshow(pyramid.for_display(width * scale, height * scale), extent=(-0.5, width - 0.5, height - 0.5, -0.5))
     ax.set_xticks([])
     ax.set_yticks([])
     ax.set(title="Click on the points that are wrong. Press middle mouse when done.")
@@ -49,15 +59,71 @@ def normalize_points(points, image_path):
     Returns:
     - List of normalized coordinates as (x_norm, y_norm).
     """
-    img = plt.imread(image_path)
-    image_height, image_width = img.shape[:2]  # Extract height and width
+    # Only the image header is read, the pixels are never decoded here
+    image_width, image_height = imagemeta.image_size(image_path)
     
     normalized = [(x / image_width, y / image_height) for x, y in points]
     return normalized
 
+
+def read_click_log(path):
+    """
+    Reads a saved click log: one click per line as "x y", "x, y" or the
+    "(x, y)" lines printed by mark_differences. Other lines are skipped.
+    """
+    points = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            numbers = re.findall(r"-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?", line.replace("np.float64", ""))
+            if len(numbers) == 2:
+                points.append((float(numbers[0]), float(numbers[1])))
+    return points
+
+
+def normalize_folder(folder):
+    """
+    Normalizes every click log in ``folder``. A log ``<image>.clicks`` holds
+    the pixel clicks on the image ``<image>`` next to it. Returns
+    {image path: normalized points}, without decoding any image.
+    """
+    normalized = {}
+    for entry in sorted(os.listdir(folder)):
+        if entry.endswith(".clicks"):
+            image_path = os.path.join(folder, entry[:-len(".clicks")])
+            normalized[image_path] = normalize_points(read_click_log(os.path.join(folder, entry)), image_path)
+    return normalized
+
+
+def save_to_pack(pack_path, name, left_path, right_path, points, radius=0.04):
+    """
+    Adds the image pair and its normalized points (with radius ``radius``)
+    as a puzzle to the pack in ``pack_path``, creating the pack if needed.
+    """
+    pack = puzzlepack.open_pack(pack_path, create=True)
+    return pack.add(name, left_path, right_path, [(round(x, 4), round(y, 4), radius) for x, y in points])
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Click the differences of an image pair.")
+    parser.add_argument("right", nargs="?", default="right_image3.png", help="image with the differences")
+    parser.add_argument("--left", default=None, help="original image, needed with --pack")
+    parser.add_argument("--pack", default=None, help="puzzle pack directory to add the puzzle to")
+    parser.add_argument("--name", default=None, help="puzzle name in the pack")
+    parser.add_argument("--radius", type=float, default=0.04)
+    parser.add_argument("--normalize-logs", default=None, metavar="DIR",
+                        help="normalize the <image>.clicks logs in DIR instead of clicking")
+    args = parser.parse_args()
+    if args.normalize_logs:
+        for image_path, points in normalize_folder(args.normalize_logs).items():
+            print(image_path)
+            for point in points:
+                print(point)
+        raise SystemExit
+    if args.pack and not args.left:
+        parser.error("--pack needs --left")
+
     # Path to the image where differences will be marked
-    image_right_path = "right_image3.png"
+    image_right_path = args.right
     
     # Collect points where the user clicks
     clicks = mark_differences(image_right_path)
@@ -68,4 +134,10 @@ if __name__ == "__main__":
     # Print normalized coordinates
     print("Normalized Coordinates:")
     for click in norm:
-        print(click)
\ No newline at end of file
+        print(click)
+
+    # Store the puzzle in the pack
+    if args.pack:
+        name = args.name or os.path.splitext(os.path.basename(image_right_path))[0]
+        save_to_pack(args.pack, name, args.left, image_right_path, norm, args.radius)
+        print("Added %s to %s" % (name, args.pack))
@@ -0,0 +1,332 @@
+"""
+Headless 2048 rules on a 64-bit bitboard.
+
+The 4x4 board is packed into a single integer with 4 bits per cell. Each
+nibble holds the tile exponent (0 = empty, 1 = 2, 2 = 4, ... 15 = 32768).
+Cell (row, column) lives at nibble ``4 * row + column``, so row 0 is the
+lowest 16 bits and column 0 is the lowest nibble of each row.
+
+All sliding and merging is done through lookup tables indexed by a 16-bit
+row, built once at import. A move is then a handful of table lookups and
+shifts, with no Tk window involved.
+"""
+import random
+
+# ==== directions, in the order used by every table and player
+UP = 0
+DOWN = 1
+LEFT = 2
+RIGHT = 3
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_NAMES = ("Up", "Down", "Left", "Right")
+KEYSYMS = {name: direction for direction, name in enumerate(DIRECTION_NAMES)}
+
+# ==== spawn distribution, same as Play_2048.new_random_tiles
+NEW_TILES = (2, 2, 2, 2, 2, 2, 4)
+WIN_TILE = 2048
+
+ROW_MASK = 0xFFFF
+COL_MASK = 0x000F000F000F000F
+
+
+# ==== building the lookup tables
+def _reverse_row(row):
+    return ((row >> 12) & 0xF) | ((row >> 4) & 0xF0) | ((row << 4) & 0xF00) | ((row << 12) & 0xF000)
+
+
+def _unpack_col(row):
+    return (row & 0xF) | ((row & 0xF0) << 12) | ((row & 0xF00) << 24) | ((row & 0xF000) << 36)
+
+
+def _slide_left(row):
+    """Returns (new_row, score) for one row moved towards nibble 0."""
+    tiles = [(row >> shift) & 0xF for shift in (0, 4, 8, 12)]
+    tiles = [t for t in tiles if t]
+    merged = []
+    score = 0
+    i = 0
+    while i < len(tiles):
+        if i + 1 < len(tiles) and tiles[i] == tiles[i + 1]:
+            exponent = min(tiles[i] + 1, 15)
+            merged.append(exponent)
+            score += 1 << exponent
+            i += 2
+        else:
+            merged.append(tiles[i])
+            i += 1
+    result = 0
+    for position, exponent in enumerate(merged):
+        result |= exponent << (4 * position)
+    return result, score
+
+
+def _build_tables():
+    row_left = [0] * 65536
+    row_right = [0] * 65536
+    col_up = [0] * 65536
+    col_down = [0] * 65536
+    score_left = [0] * 65536
+    score_right = [0] * 65536
+    left = [_slide_left(row) for row in range(65536)]
+    for row in range(65536):
+        result, score = left[row]
+        # moving right is moving the mirrored row left
+        reversed_result, reversed_score = left[_reverse_row(row)]
+        reversed_result = _reverse_row(reversed_result)
+
+        # tables store the XOR difference so a move is board ^= table[row] << shift
+        row_left[row] = row ^ result
+        row_right[row] = row ^ reversed_result
+        col_up[row] = _unpack_col(row) ^ _unpack_col(result)
+        col_down[row] = _unpack_col(row) ^ _unpack_col(reversed_result)
+        score_left[row] = score
+        score_right[row] = reversed_score
+    return row_left, row_right, col_up, col_down, score_left, score_right
+
+
+ROW_LEFT, ROW_RIGHT, COL_UP, COL_DOWN, SCORE_LEFT, SCORE_RIGHT = _build_tables()
+
+
+# ==== board helpers
+def transpose(board):
+    """Swaps rows and columns of a packed board."""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def from_grid(grid):
+    """Packs a 4x4 list of tile values (0, 2, 4, ...) into a board."""
+    board = 0
+    for row in range(4):
+        for column in range(4):
+            value = grid[row][column]
+            if value:
+                board |= (value.bit_length() - 1) << (4 * (4 * row + column))
+    return board
+
+
+def to_grid(board):
+    """Unpacks a board into a 4x4 list of tile values (0, 2, 4, ...)."""
+    grid = []
+    for row in range(4):
+        line = []
+        for column in range(4):
+            exponent = (board >> (4 * (4 * row + column))) & 0xF
+            line.append(1 << exponent if exponent else 0)
+        grid.append(line)
+    return grid
+
+
+def get_tile(board, row, column):
+    """Returns the tile value at (row, column), 0 if the cell is empty."""
+    exponent = (board >> (4 * (4 * row + column))) & 0xF
+    return 1 << exponent if exponent else 0
+
+
+def empty_cells(board):
+    """Returns the nibble indices (4 * row + column) of all empty cells."""
+    return [i for i in range(16) if not (board >> (4 * i)) & 0xF]
+
+
+def count_empty(board):
+    # fold every nibble into its lowest bit, then count the nibbles that stayed 0
+    x = board | (board >> 2)
+    x |= x >> 1
+    return 16 - bin(x & 0x1111111111111111).count("1")
+
+
+def is_full(board):
+    return count_empty(board) == 0
+
+
+def max_exponent(board):
+    highest = 0
+    while board:
+        exponent = board & 0xF
+        if exponent > highest:
+            highest = exponent
+        board >>= 4
+    return highest
+
+
+def max_tile(board):
+    exponent = max_exponent(board)
+    return 1 << exponent if exponent else 0
+
+
+# ==== moves
+def move(board, direction):
+    """
+    Slides and merges the whole board in one direction.
+
+    Parameters:
+    -----------
+    board : int
+        Packed 64-bit board.
+    direction : int
+        One of UP, DOWN, LEFT, RIGHT.
+
+    Returns:
+    --------
+    (board, score_gained) : tuple of int
+        The new board, unchanged if the move is not possible, and the sum of
+        all tiles created by merging.
+    """
+    if direction == LEFT:
+        table, scores = ROW_LEFT, SCORE_LEFT
+    elif direction == RIGHT:
+        table, scores = ROW_RIGHT, SCORE_RIGHT
+    else:
+        table = COL_UP if direction == UP else COL_DOWN
+        scores = SCORE_LEFT if direction == UP else SCORE_RIGHT
+        t = transpose(board)
+        r0 = t & ROW_MASK
+        r1 = (t >> 16) & ROW_MASK
+        r2 = (t >> 32) & ROW_MASK
+        r3 = (t >> 48) & ROW_MASK
+        board ^= table[r0] | (table[r1] << 4) | (table[r2] << 8) | (table[r3] << 12)
+        return board, scores[r0] + scores[r1] + scores[r2] + scores[r3]
+
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = (board >> 48) & ROW_MASK
+    board ^= table[r0] | (table[r1] << 16) | (table[r2] << 32) | (table[r3] << 48)
+    return board, scores[r0] + scores[r1] + scores[r2] + scores[r3]
+
+
+def _lines():
+    rows = [[4 * r + c for c in range(4)] for r in range(4)]
+    columns = [[4 * r + c for r in range(4)] for c in range(4)]
+    lines = [None] * 4
+    lines[UP] = columns
+    lines[DOWN] = [line[::-1] for line in columns]
+    lines[LEFT] = rows
+    lines[RIGHT] = [line[::-1] for line in rows]
+    return lines
+
+
+# ==== cells of every line, ordered from the wall the tiles slide towards
+LINES = _lines()
+
+
+def tile_moves(board, direction):
+    """
+    Where every tile goes in a move, for renderers that animate slides.
+
+    Returns a list of (from_cell, to_cell, merged) with cells as nibble
+    indices. ``merged`` is True for both tiles that combine into one.
+    """
+    result = []
+    for line in LINES[direction]:
+        position = -1
+        open_exponent = 0
+        for cell in line:
+            exponent = (board >> (4 * cell)) & 0xF
+            if not exponent:
+                continue
+            if exponent == open_exponent:
+                # ==== mark the tile already sitting at the target as merged too
+                result[-1] = (result[-1][0], result[-1][1], True)
+                result.append((cell, line[position], True))
+                open_exponent = 0
+            else:
+                position += 1
+                result.append((cell, line[position], False))
+                open_exponent = exponent
+    return result
+
+
+def can_move(board):
+    """True if at least one direction changes the board."""
+    if count_empty(board):
+        return True
+    for direction in DIRECTIONS:
+        if move(board, direction)[0] != board:
+            return True
+    return False
+
+
+def game_over(board):
+    return not can_move(board)
+
+
+# ==== spawning
+def spawn_tile(board, rng=random, tiles=NEW_TILES):
+    """
+    Places one new tile on a random empty cell.
+
+    The tile value is drawn uniformly from ``tiles``, which mirrors how
+    Play_2048 picks from ``new_random_tiles``. The board is returned
+    unchanged if it is full.
+    """
+    empty = empty_cells(board)
+    if not empty:
+        return board
+    value = tiles[rng.randrange(len(tiles))]
+    cell = empty[rng.randrange(len(empty))]
+    return board | ((value.bit_length() - 1) << (4 * cell))
+
+
+def new_board(rng=random, tiles=NEW_TILES):
+    """Starting position: one 2 plus one tile drawn from ``tiles``."""
+    board = spawn_tile(0, rng, (2,))
+    return spawn_tile(board, rng, tiles)
+
+
+class Game:
+    """
+    A single headless game: board, score and the RNG used for spawns.
+
+    Parameters:
+    -----------
+    seed : int or None
+        Seed for the spawn RNG. None seeds from system entropy.
+    tiles : sequence of int
+        Spawn distribution, defaults to NEW_TILES.
+    """
+
+    def __init__(self, seed=None, tiles=NEW_TILES):
+        self.seed = seed
+        self.tiles = tuple(tiles)
+        self.rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.board = new_board(self.rng, self.tiles)
+        self.score = 0
+        self.moves = 0
+
+    def move(self, direction):
+        """Plays one move and spawns a tile. Returns False if nothing moved."""
+        board, gained = move(self.board, direction)
+        if board == self.board:
+            return False
+        self.board = spawn_tile(board, self.rng, self.tiles)
+        self.score += gained
+        self.moves += 1
+        return True
+
+    def legal_moves(self):
+        return [d for d in DIRECTIONS if move(self.board, d)[0] != self.board]
+
+    @property
+    def over(self):
+        return game_over(self.board)
+
+    @property
+    def won(self):
+        return max_tile(self.board) >= WIN_TILE
+
+    @property
+    def max_tile(self):
+        return max_tile(self.board)
+
+    def grid(self):
+        return to_grid(self.board)
@@ -0,0 +1,90 @@
+"""
+Click hit-testing for spotdiff puzzles.
+
+Differences are circles (x, y, r) in normalized image coordinates, with x
+and y scaled by the image width and height and r by the shorter side, like
+in draw_game. HitIndex buckets them into a uniform grid once per puzzle.
+Every cell keeps a fixed-width row of the circles that overlap it (padded
+with -1), so a batch of clicks is answered with a handful of array lookups:
+cell of each click, its candidate row, one distance per candidate.
+"""
+import numpy as np
+
+
+class HitIndex:
+    """
+    Uniform-grid index over the difference circles of one image.
+
+    Parameters:
+    -----------
+    differences : list of tuples (x, y, r)
+        Circles in normalized image coordinates.
+    width, height : int
+        Size of the image in pixels, clicks are given in these pixels.
+    cell : float or None
+        Grid cell size in pixels, defaults to the median circle diameter.
+    """
+
+    def __init__(self, differences, width, height, cell=None):
+        self.width = width
+        self.height = height
+        d = np.asarray(differences, dtype=np.float64).reshape(-1, 3)
+        self.cx = d[:, 0] * width
+        self.cy = d[:, 1] * height
+        self.r = d[:, 2] * min(width, height)
+        self.count = len(d)
+        if cell is None:
+            cell = 2 * float(np.median(self.r)) if self.count else max(width, height)
+        self.cell = max(cell, 1.0)
+        self.cols = int(np.ceil(width / self.cell)) + 1
+        self.rows = int(np.ceil(height / self.cell)) + 1
+
+        # ==== every circle goes into each cell its bounding box touches
+        buckets = {}
+        for i in range(self.count):
+            x0, x1 = self._cell_range(self.cx[i] - self.r[i], self.cx[i] + self.r[i], self.cols)
+            y0, y1 = self._cell_range(self.cy[i] - self.r[i], self.cy[i] + self.r[i], self.rows)
+            for row in range(y0, y1 + 1):
+                for col in range(x0, x1 + 1):
+                    buckets.setdefault(row * self.cols + col, []).append(i)
+        depth = max((len(b) for b in buckets.values()), default=1)
+        self.table = np.full((self.rows * self.cols, depth), -1, dtype=np.int32)
+        for key, items in buckets.items():
+            self.table[key, :len(items)] = items
+
+    def _cell_range(self, low, high, limit):
+        return (min(max(int(low // self.cell), 0), limit - 1),
+                min(max(int(high // self.cell), 0), limit - 1))
+
+    def _candidates(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.float64).ravel()
+        ys = np.asarray(ys, dtype=np.float64).ravel()
+        cols = np.clip((xs // self.cell).astype(np.int64), 0, self.cols - 1)
+        rows = np.clip((ys // self.cell).astype(np.int64), 0, self.rows - 1)
+        candidates = self.table[rows * self.cols + cols]
+        safe = np.maximum(candidates, 0)
+        distance = np.hypot(xs[:, None] - self.cx[safe], ys[:, None] - self.cy[safe])
+        inside = (candidates >= 0) & (distance <= self.r[safe])
+        return candidates, distance, inside
+
+    def hit(self, xs, ys):
+        """Index of the nearest circle containing each click, -1 for a miss."""
+        if not self.count:
+            return np.full(np.size(xs), -1, dtype=np.int32)
+        candidates, distance, inside = self._candidates(xs, ys)
+        distance = np.where(inside, distance, np.inf)
+        best = distance.argmin(axis=1)
+        rows = np.arange(len(best))
+        return np.where(inside[rows, best], candidates[rows, best], -1)
+
+    def found(self, xs, ys):
+        """Boolean per difference: is any of the clicks inside its circle."""
+        mask = np.zeros(self.count, dtype=bool)
+        if self.count and np.size(xs):
+            candidates, _, inside = self._candidates(xs, ys)
+            mask[candidates[inside]] = True
+        return mask
+
+    def center(self, index):
+        """Center of circle ``index`` in pixels."""
+        return self.cx[index], self.cy[index]
@@ -0,0 +1,135 @@
+"""
+Decoded-image cache with a mip pyramid per source image.
+
+The first time an image is requested it is decoded once and stored as a
+series of uint8 .npy files, level 0 at full resolution and every further
+level half the size of the one before (2x2 box filter), down to MIN_SIDE
+pixels. Later loads memory-map the levels, so nothing is decoded and only
+the pages of the level that is actually shown are read.
+
+An entry is keyed on the absolute path of the source and is valid while
+the source's size and mtime match. If only the mtime changed, the content
+hash decides, so touching a file does not cost a rebuild.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+from PIL import Image
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_cache")
+MIN_SIDE = 128
+VERSION = 1
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def downsample(image):
+    """Half-size image, each pixel the mean of a 2x2 block (odd edges are dropped)."""
+    h, w = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    blocks = image[:h, :w].reshape(h // 2, 2, w // 2, 2, -1).astype(np.uint16)
+    return ((blocks.sum(axis=(1, 3)) + 2) // 4).astype(np.uint8)
+
+
+class Pyramid:
+    """
+    Memory-mapped levels of one image.
+
+    ``shape`` is the full-resolution (height, width, channels), ``levels``
+    the (height, width) of every level, level 0 first.
+    """
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.shape = tuple(meta["shape"])
+        self.levels = [tuple(level) for level in meta["levels"]]
+        self._arrays = {}
+
+    def level(self, index):
+        array = self._arrays.get(index)
+        if array is None:
+            array = np.load(os.path.join(self.directory, "level%d.npy" % index), mmap_mode="r")
+            self._arrays[index] = array
+        return array
+
+    def level_index(self, width, height):
+        """Smallest level that still covers ``width`` x ``height`` display pixels."""
+        best = 0
+        for index, (h, w) in enumerate(self.levels):
+            if w >= width and h >= height:
+                best = index
+        return best
+
+    def for_display(self, width, height):
+        return self.level(self.level_index(width, height))
+
+    @property
+    def full(self):
+        return self.level(0)
+
+
+def _entry_dir(path, cache_dir):
+    return os.path.join(cache_dir, hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:16])
+
+
+def _build(path, directory, stat, digest):
+    with Image.open(path) as img:
+        image = np.asarray(img.convert("RGBA" if "A" in img.getbands() else "RGB"))
+    os.makedirs(directory, exist_ok=True)
+    levels = []
+    while True:
+        np.save(os.path.join(directory, "level%d.npy" % len(levels)), image)
+        levels.append(image.shape[:2])
+        if min(image.shape[:2]) // 2 < MIN_SIDE:
+            break
+        image = downsample(image)
+    meta = {"version": VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest,
+            "shape": list(np.load(os.path.join(directory, "level0.npy"), mmap_mode="r").shape),
+            "levels": [list(level) for level in levels]}
+    _write_meta(directory, meta)
+    return meta
+
+
+def _write_meta(directory, meta):
+    temporary = os.path.join(directory, "meta.json.tmp")
+    with open(temporary, "w") as f:
+        json.dump(meta, f)
+    os.replace(temporary, os.path.join(directory, "meta.json"))
+
+
+def load(path, cache_dir=CACHE_DIR):
+    """Pyramid of the image at ``path``, decoding and caching it on a miss."""
+    directory = _entry_dir(path, cache_dir)
+    stat = os.stat(path)
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+    if meta is not None and meta.get("version") == VERSION and meta["size"] == stat.st_size:
+        if meta["mtime_ns"] == stat.st_mtime_ns:
+            return Pyramid(directory, meta)
+        digest = file_hash(path)
+        if digest == meta["sha1"]:
+            meta["mtime_ns"] = stat.st_mtime_ns
+            _write_meta(directory, meta)
+            return Pyramid(directory, meta)
+    else:
+        digest = file_hash(path)
+    return Pyramid(directory, _build(path, directory, stat, digest))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    for source in sys.argv[1:]:
+        start = time.perf_counter()
+        pyramid = load(source)
+        print("%s: %s, levels %s, %.1f ms" % (source, pyramid.shape, pyramid.levels,
+                                             1000 * (time.perf_counter() - start)))
@@ -0,0 +1,416 @@
+"""
+Perceptual-hash index of the spotdiff images.
+
+Every image gets a 64-bit dHash (gradient signs of a 9x8 thumbnail) and a
+64-bit pHash (signs of the low 8x8 DCT coefficients of a 32x32 thumbnail,
+against their median), plus a 16x16 grey thumbnail. JPEGs are decoded at
+reduced scale (Image.draft), so hashing never needs the full image.
+Hashing runs on a process pool and the results are kept in
+.image_index/, keyed on path, size and mtime, so only new or changed
+images are decoded again:
+
+    .image_index/index.json   paths, sizes, mtimes and both hashes
+    .image_index/thumbs.npy   (N, 16, 16) uint8 thumbnails, same order
+
+Near-duplicate search over the whole index is multi-index hashing: with a
+Hamming radius r the 64 bits are split into r + 1 chunks, and two hashes
+within r bits agree exactly on at least one chunk. Candidates come from
+sorting each chunk, so the search never compares all pairs.
+
+Pairs (from puzzle packs and left/right file names) are checked for
+images that do not belong together, for puzzles that use the same two
+images as another puzzle, and for pairs stored the other way round. The
+left and right image of a puzzle usually have the same hashes, so the
+orientation is decided on the thumbnails.
+"""
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = ".image_index"
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+SKIP_DIRS = {"build", "__pycache__"}
+THUMB = 16
+VERSION = 1
+
+# ==== Hamming radii (in bits of pHash) for near duplicates and for the two images of one puzzle
+DUPLICATE_RADIUS = 4
+PAIR_RADIUS = 12
+MAX_RADIUS = 8
+
+CHUNK = 64
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    matrix = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+DCT32 = _dct_matrix(32)
+
+
+def _bits(mask):
+    return int.from_bytes(np.packbits(mask.ravel()).tobytes(), "big")
+
+
+def hash_image(path):
+    """(dhash, phash, thumbnail) of one image."""
+    with Image.open(path) as img:
+        # ==== JPEG decodes at 1/2 .. 1/8 scale straight away, other formats ignore this
+        img.draft("L", (128, 128))
+        gray = img.convert("L")
+    small = gray.resize((32, 32), Image.BOX, reducing_gap=2.0)
+    pixels = np.asarray(small, dtype=np.float64)
+
+    d = np.asarray(small.resize((9, 8), Image.BOX), dtype=np.int16)
+    dhash = _bits(d[:, 1:] > d[:, :-1])
+    low = (DCT32 @ pixels @ DCT32.T)[:8, :8].ravel()
+    phash = _bits(low > np.median(low[1:]))
+    thumb = np.asarray(small.resize((THUMB, THUMB), Image.BOX), dtype=np.uint8)
+    return dhash, phash, thumb
+
+
+def _hash_chunk(paths):
+    results = []
+    for path in paths:
+        try:
+            results.append((path,) + hash_image(path))
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            results.append((path, None, None, str(e)))
+    return results
+
+
+def popcount(values):
+    """Set bits of every uint64 in ``values``."""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.int64)
+    return _BYTE_BITS[np.ascontiguousarray(values).view(np.uint8).reshape(values.shape + (8,))].sum(axis=-1, dtype=np.int64)
+
+
+_BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def near_pairs(hashes, radius=DUPLICATE_RADIUS):
+    """
+    All (i, j, distance) with i < j and Hamming distance <= ``radius``,
+    as three arrays, by multi-index hashing. The chunks shrink as the
+    radius grows, so the cost climbs steeply (100k hashes: 0.25 s at 4,
+    9 s at 8) and radii above MAX_RADIUS raise ValueError.
+    """
+    if radius > MAX_RADIUS:
+        raise ValueError("radius %d is above %d, the chunks get too short to search quickly" % (radius, MAX_RADIUS))
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    n = hashes.size
+    edges = np.linspace(0, 64, min(radius + 1, 64) + 1).astype(int)
+    found = []
+    for low, high in zip(edges[:-1], edges[1:]):
+        keys = (hashes >> np.uint64(low)) & np.uint64((1 << (high - low)) - 1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # ==== every position is paired with the ones before it in the same run of equal keys
+        run_start = np.maximum.accumulate(np.where(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]], np.arange(n), 0))
+        position = np.arange(n)
+        back = 1
+        while True:
+            rows = np.flatnonzero(position - back >= run_start)
+            if not rows.size:
+                break
+            first, second = order[rows - back], order[rows]
+            close = popcount(hashes[first] ^ hashes[second]) <= radius
+            # ==== a pair shows up once per chunk it agrees on, key it as i * n + j to drop repeats
+            found.append(np.minimum(first, second)[close].astype(np.int64) * n + np.maximum(first, second)[close])
+            back += 1
+    keys = np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+    first, second = keys // max(n, 1), keys % max(n, 1)
+    return first, second, popcount(hashes[first] ^ hashes[second])
+
+
+def find_images(root=HERE):
+    """Image files under ``root`` relative to it, skipping hidden and build directories."""
+    found = []
+    for directory, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d not in SKIP_DIRS)
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/"))
+    return found
+
+
+class ImageIndex:
+    """
+    Hashes of the images under ``root``, stored in ``root``/.image_index.
+
+    ``paths`` are relative to root. ``dhash`` and ``phash`` are uint64
+    arrays and ``thumbs`` the (N, 16, 16) thumbnails, all in path order.
+    """
+
+    def __init__(self, root=HERE, directory=None):
+        self.root = root
+        self.directory = directory or os.path.join(root, INDEX_DIR)
+        self.paths = []
+        self.stats = []
+        self.dhash = np.zeros(0, dtype=np.uint64)
+        self.phash = np.zeros(0, dtype=np.uint64)
+        self.thumbs = np.zeros((0, THUMB, THUMB), dtype=np.uint8)
+        self.failed = {}
+        self._position = {}
+        self._load()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.directory, "index.json")) as f:
+                meta = json.load(f)
+            thumbs = np.load(os.path.join(self.directory, "thumbs.npy"))
+        except (OSError, ValueError):
+            return
+        if meta.get("version") != VERSION or len(meta["entries"]) != len(thumbs):
+            return
+        entries = meta["entries"]
+        self._set([e["path"] for e in entries], [(e["size"], e["mtime_ns"]) for e in entries],
+                  [int(e["dhash"], 16) for e in entries], [int(e["phash"], 16) for e in entries], thumbs)
+
+    def _set(self, paths, stats, dhashes, phashes, thumbs):
+        self.paths = list(paths)
+        self.stats = list(stats)
+        self.dhash = np.array(dhashes, dtype=np.uint64)
+        self.phash = np.array(phashes, dtype=np.uint64)
+        self.thumbs = np.asarray(thumbs, dtype=np.uint8).reshape(-1, THUMB, THUMB)
+        self._position = {path: i for i, path in enumerate(self.paths)}
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = [{"path": path, "size": size, "mtime_ns": mtime, "dhash": "%016x" % d, "phash": "%016x" % p}
+                   for path, (size, mtime), d, p in zip(self.paths, self.stats, self.dhash.tolist(), self.phash.tolist())]
+        temporary = os.path.join(self.directory, "thumbs.tmp.npy")
+        np.save(temporary, self.thumbs)
+        os.replace(temporary, os.path.join(self.directory, "thumbs.npy"))
+        temporary = os.path.join(self.directory, "index.json.tmp")
+        with open(temporary, "w") as f:
+            json.dump({"version": VERSION, "entries": entries}, f)
+        os.replace(temporary, os.path.join(self.directory, "index.json"))
+
+    def update(self, paths=None, workers=None, report=None):
+        """
+        Hashes new and changed images (all images under root by default)
+        and drops entries whose file is gone. Returns (hashed, kept).
+        """
+        paths = find_images(self.root) if paths is None else list(paths)
+        stats, todo = {}, []
+        for path in paths:
+            stat = os.stat(os.path.join(self.root, path))
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+            i = self._position.get(path)
+            if i is None or self.stats[i] != stats[path]:
+                todo.append(path)
+
+        hashed = {}
+        self.failed = {}
+        if todo:
+            # ==== small batches are split finer, so every worker gets some
+            size = max(1, min(CHUNK, len(todo) // (4 * (workers or os.cpu_count() or 1))))
+            chunks = [[os.path.join(self.root, p) for p in todo[i:i + size]] for i in range(0, len(todo), size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for results in pool.map(_hash_chunk, chunks):
+                    for full_path, dhash, phash, thumb in results:
+                        path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                        if dhash is None:
+                            self.failed[path] = thumb
+                        else:
+                            hashed[path] = (dhash, phash, thumb)
+                    if report is not None:
+                        report(len(hashed) + len(self.failed), len(todo))
+
+        keep = [path for path in paths if path not in self.failed]
+        rows = [hashed.get(path) or (int(self.dhash[self._position[path]]), int(self.phash[self._position[path]]),
+                                     self.thumbs[self._position[path]]) for path in keep]
+        self._set(keep, [stats[path] for path in keep], [r[0] for r in rows], [r[1] for r in rows],
+                  np.array([r[2] for r in rows], dtype=np.uint8).reshape(-1, THUMB, THUMB))
+        return len(hashed), len(keep) - len(hashed)
+
+    def position(self, path):
+        """Index of a path (absolute or relative to root), None if it is not indexed."""
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        return self._position.get(path.replace(os.sep, "/"))
+
+    def lookup(self, path, radius=DUPLICATE_RADIUS):
+        """[(path, distance), ...] of indexed images within ``radius`` bits of the image at ``path``."""
+        i = self.position(path)
+        phash = self.phash[i] if i is not None else np.uint64(hash_image(path)[1])
+        distance = popcount(self.phash ^ phash)
+        hits = np.flatnonzero(distance <= radius)
+        hits = hits[np.argsort(distance[hits], kind="stable")]
+        return [(self.paths[j], int(distance[j])) for j in hits if j != i]
+
+    def duplicates(self, radius=DUPLICATE_RADIUS, pairs=()):
+        """
+        Groups of near-identical images: connected components of the pairs
+        within ``radius`` bits of pHash and dHash both.
+
+        The two images of a puzzle hash alike too, so ``pairs`` (as in
+        check_pairs) are kept apart: links are added closest thumbnails
+        first and a link that would put both images of a pair into one
+        group is skipped. A copy of one side then joins that side's group.
+        """
+        first, second, _ = near_pairs(self.phash, radius)
+        close = popcount(self.dhash[first] ^ self.dhash[second]) <= radius
+        first, second = first[close], second[close]
+        distance = np.abs(self.thumbs[first].astype(np.int16) - self.thumbs[second]).mean(axis=(1, 2))
+
+        members = {i: {i} for i in range(len(self.paths))}
+        apart = {i: set() for i in range(len(self.paths))}
+        for _, left, right in pairs:
+            i, j = self.position(left), self.position(right)
+            if i is not None and j is not None and i != j:
+                apart[i].add(j)
+                apart[j].add(i)
+        group = list(range(len(self.paths)))
+
+        for k in np.argsort(distance, kind="stable").tolist():
+            a, b = group[first[k]], group[second[k]]
+            if a == b or apart[a] & members[b]:
+                continue
+            if len(members[a]) < len(members[b]):
+                a, b = b, a
+            for i in members[b]:
+                group[i] = a
+            members[a] |= members.pop(b)
+            apart[a] |= apart.pop(b)
+        return sorted(sorted(self.paths[i] for i in group_members)
+                      for group_members in members.values() if len(group_members) > 1)
+
+    def thumb_distance(self, i, j):
+        return float(np.abs(self.thumbs[i].astype(np.int16) - self.thumbs[j]).mean())
+
+    def check_pairs(self, pairs, radius=DUPLICATE_RADIUS, pair_radius=PAIR_RADIUS):
+        """
+        Problems with puzzle pairs, given as (name, left, right) paths.
+
+        Returns a list of (name, message) for pairs whose images are not
+        indexed, whose file names say the sides are swapped, whose two
+        images are too far apart to be one puzzle, or that repeat another
+        pair, as it is or with left and right swapped.
+        """
+        problems = []
+        known = []
+        listed = set()
+        for name, left, right in pairs:
+            i, j = self.position(left), self.position(right)
+            if (i, j) in listed:
+                continue
+            listed.add((i, j))
+            if i is None or j is None:
+                problems.append((name, "not indexed: %s" % ", ".join(p for p, k in ((left, i), (right, j)) if k is None)))
+                continue
+            if _side(left) == "right" and _side(right) == "left":
+                problems.append((name, "left and right swapped by file name"))
+            distance = int(popcount(self.phash[i] ^ self.phash[j]))
+            if distance > pair_radius:
+                problems.append((name, "images differ by %d bits, not one puzzle?" % distance))
+            known.append((name, i, j))
+
+        # ==== a pair repeats another if its left image is near either image of the other pair
+        lefts = np.array([i for _, i, _ in known] + [j for _, _, j in known], dtype=np.intp)
+        first, second, _ = near_pairs(self.phash[lefts], radius)
+        count = len(known)
+        matches = sorted({(max(a % count, b % count), min(a % count, b % count)) for a, b in zip(first.tolist(), second.tolist())})
+        # ==== every repeated pair is reported once, against the first pair it repeats
+        repeated = set()
+        for q, p in matches:
+            if p == q or q in repeated:
+                continue
+            (name_p, lp, rp), (name_q, lq, rq) = known[p], known[q]
+            straight = self.thumb_distance(lp, lq) + self.thumb_distance(rp, rq)
+            crossed = self.thumb_distance(lp, rq) + self.thumb_distance(rp, lq)
+            if max(popcount(self.phash[[lp, rp]] ^ self.phash[[lq, rq] if straight <= crossed else [rq, lq]])) > radius:
+                continue
+            repeated.add(q)
+            if crossed < straight:
+                problems.append((name_q, "same images as %s with left and right swapped" % name_p))
+            else:
+                problems.append((name_q, "same images as %s" % name_p))
+        return problems
+
+
+def _side(path):
+    name = os.path.basename(path).lower()
+    sides = [side for side in ("left", "right") if side in name]
+    return sides[0] if len(sides) == 1 else None
+
+
+def name_pairs(paths):
+    """(name, left, right) for every left/right pair by file name, e.g. left_image2.png / right_image2.png."""
+    by_name = {path: path for path in paths}
+    pairs = []
+    for path in paths:
+        directory, name = os.path.split(path)
+        if _side(path) != "left":
+            continue
+        other = os.path.join(directory, re.sub("left", "right", name, flags=re.I) if "left" in name.lower() else name)
+        other = other.replace(os.sep, "/")
+        if other in by_name:
+            stem = re.sub(r"[_-]*left[_-]*", "", os.path.splitext(name)[0], flags=re.I) or "pair"
+            pairs.append((os.path.join(directory, stem).replace(os.sep, "/"), path, other))
+    return pairs
+
+
+def pack_pairs(pack_path):
+    """(name, left, right) of every puzzle in a puzzle pack."""
+    import puzzlepack
+    pack = puzzlepack.open_pack(pack_path)
+    return [("%s:%s" % (os.path.basename(os.path.normpath(pack_path)), p.name), p.left, p.right) for p in pack]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index spotdiff images by perceptual hash and check the pairs.")
+    parser.add_argument("root", nargs="?", default=HERE)
+    parser.add_argument("--pack", action="append", default=[], help="puzzle pack whose pairs to check as well")
+    parser.add_argument("--query", action="append", default=[], help="image to look up in the index")
+    parser.add_argument("--radius", type=int, default=DUPLICATE_RADIUS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    if not 0 <= args.radius <= MAX_RADIUS:
+        parser.error("--radius must be between 0 and %d" % MAX_RADIUS)
+
+    start = time.perf_counter()
+    index = ImageIndex(args.root)
+    hashed, kept = index.update(workers=args.workers)
+    index.save()
+    print("%d images indexed (%d hashed, %d unchanged) in %.2f s" % (len(index), hashed, kept, time.perf_counter() - start))
+    for path, error in sorted(index.failed.items()):
+        print("  could not read %s: %s" % (path, error))
+
+    for query in args.query:
+        hits = index.lookup(query, args.radius)
+        print("%s: %s" % (query, ", ".join("%s (%d)" % hit for hit in hits) or "no match"))
+
+    start = time.perf_counter()
+    # ==== pack entries first, so they keep their puzzle names when a file-name pair is the same
+    pairs = []
+    for pack_path in args.pack:
+        pairs += pack_pairs(pack_path)
+    pairs += name_pairs(index.paths)
+    groups = index.duplicates(args.radius, pairs)
+    problems = index.check_pairs(pairs, args.radius)
+    print("%d duplicate groups, %d pairs checked, %d problems in %.2f s"
+          % (len(groups), len(pairs), len(problems), time.perf_counter() - start))
+    for group in groups:
+        print("  duplicates: " + ", ".join(group))
+    for name, message in problems:
+        print("  %s: %s" % (name, message))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Image dimensions from file headers, without decoding any pixels.
+
+PNG sizes come from the IHDR chunk, JPEG sizes from the first SOF marker,
+GIF and BMP from their fixed headers. Anything else falls back to Pillow,
+which also only reads the header. Results are memoized per
+(path, mtime, size), so an edited file is read again.
+"""
+import os
+import struct
+from functools import lru_cache
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# ==== JPEG start-of-frame markers (all except DHT, JPG and DAC)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _png_size(f, head):
+    if head[12:16] != b"IHDR":
+        raise ValueError("PNG without IHDR")
+    return struct.unpack(">II", head[16:24])
+
+
+def _jpeg_size(f):
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            raise ValueError("JPEG without SOF marker")
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if marker in SOF_MARKERS:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _read_size(path):
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(PNG_SIGNATURE):
+            return _png_size(f, head)
+        if head.startswith(b"\xff\xd8"):
+            return _jpeg_size(f)
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith(b"BM"):
+            width, height = struct.unpack("<ii", head[18:26])
+            return width, abs(height)
+    from PIL import Image
+    with Image.open(path) as img:
+        return img.size
+
+
+@lru_cache(maxsize=1024)
+def _cached_size(path, mtime_ns, size):
+    return tuple(int(v) for v in _read_size(path))
+
+
+def image_size(path):
+    """(width, height) of the image at ``path``."""
+    stat = os.stat(path)
+    return _cached_size(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+if __name__ == "__main__":
+    import sys
+    for source in sys.argv[1:]:
+        print("%s: %dx%d" % ((source,) + image_size(source)))
@@ -0,0 +1,238 @@
+"""
+Opt-in input-to-paint latency instrumentation for the Tk and pygame games.
+
+Off unless the environment variable JULEPUZZLE_LATENCY is set:
+
+    JULEPUZZLE_LATENCY=1 python 2048.py        histograms and cProfile
+    JULEPUZZLE_LATENCY=hist python wordle.py   histograms only, no profiler overhead
+
+The games call three hooks, which do nothing when it is off:
+
+    input_received()  an event enters the handler (Play_2048.moves, handle_keydown)
+    logic_done()      the handler has updated the game state
+    painted()         the frame is on screen (canvas update, pygame.display.update)
+
+and ignored() for an input that changes nothing on screen.
+
+Every input then yields one sample with three phases: idle (since the
+previous paint, the time spent waiting for input), logic and render. The
+latest samples stay in fixed-size ring buffers, and every sample is counted
+in a log-linear histogram per phase, the bucket layout HdrHistogram uses.
+At exit the histograms are printed as percentile distributions, the ring
+buffers are written as CSV and the profile as a .prof file that pstats or
+snakeviz can read. Files go to JULEPUZZLE_LATENCY_DIR (default: the
+current directory), named latency-<program>-<pid>.*
+"""
+import atexit
+import os
+import sys
+import time
+from array import array
+
+ENV = "JULEPUZZLE_LATENCY"
+ENV_DIR = "JULEPUZZLE_LATENCY_DIR"
+PHASES = ("idle", "logic", "render", "total")
+RING_SIZE = 4096
+# ==== 2^SUB_BITS sub-buckets per power of two, values are within 1/2^(SUB_BITS-1) of their bucket
+SUB_BITS = 6
+
+
+class Histogram:
+    """
+    Log-linear histogram of non-negative integers (nanoseconds here).
+
+    Values below 2^SUB_BITS get a bucket each, every power of two above is
+    split into 2^(SUB_BITS-1) equal buckets, so the relative error is the
+    same at every magnitude and recording is a couple of integer operations.
+    """
+
+    def __init__(self, sub_bits=SUB_BITS):
+        self.sub_bits = sub_bits
+        self.half = 1 << (sub_bits - 1)
+        self.counts = {}
+        self.total = 0
+        self.max = 0
+
+    def index(self, value):
+        exponent = max(value.bit_length() - self.sub_bits, 0)
+        return exponent * self.half + (value >> exponent)
+
+    def bounds(self, index):
+        """(lowest, highest) value of a bucket."""
+        exponent = max(index // self.half - 1, 0)
+        mantissa = index - exponent * self.half
+        return mantissa << exponent, ((mantissa + 1) << exponent) - 1
+
+    def record(self, value):
+        index = self.index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Highest value of the bucket that holds the given percentile."""
+        if not self.total:
+            return 0
+        rank = max(1, -(-self.total * percent // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.bounds(index)[1], self.max)
+        return self.max
+
+    def distribution(self, ticks=1):
+        """
+        (value, percentile, count) rows like HdrHistogram's percentile
+        output: 0, 50, 75, 87.5, ... halving the distance to 100 with
+        ``ticks`` rows per half, then the maximum.
+        """
+        rows = []
+        percent = 0.0
+        while self.total and 100.0 - percent > 100.0 / self.total:
+            step = (100.0 - percent) / 2 / ticks
+            for _ in range(ticks):
+                rank = max(1, int(-(-self.total * percent // 100)))
+                rows.append((self.percentile(percent), percent, rank))
+                percent += step
+        rows.append((self.max, 100.0, self.total))
+        return rows
+
+
+class Ring:
+    """Last ``size`` samples of each phase, in preallocated int64 arrays."""
+
+    def __init__(self, fields, size=RING_SIZE):
+        self.fields = fields
+        self.size = size
+        self.columns = {field: array("q", bytes(8 * size)) for field in fields}
+        self.count = 0
+
+    def append(self, values):
+        slot = self.count % self.size
+        for field, value in zip(self.fields, values):
+            self.columns[field][slot] = value
+        self.count += 1
+
+    def rows(self):
+        """Stored samples, oldest first."""
+        start = max(self.count - self.size, 0)
+        return [[self.columns[field][i % self.size] for field in self.fields] for i in range(start, self.count)]
+
+
+class Recorder:
+    """Phase timestamps of the input in flight and the collected samples."""
+
+    def __init__(self, program, profile=True, ring_size=RING_SIZE):
+        self.program = program
+        self.ring = Ring(("start_ns",) + PHASES, ring_size)
+        self.histograms = {phase: Histogram() for phase in PHASES}
+        self.started = time.perf_counter_ns()
+        self.last_paint = self.started
+        self.input_at = None
+        self.logic_at = None
+        self.profiler = None
+        if profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def input_received(self):
+        # ==== events handled in the same wakeup count from the first one
+        if self.input_at is None:
+            self.input_at = time.perf_counter_ns()
+
+    def logic_done(self):
+        if self.input_at is not None:
+            self.logic_at = time.perf_counter_ns()
+
+    def ignored(self):
+        self.input_at = None
+        self.logic_at = None
+
+    def painted(self):
+        now = time.perf_counter_ns()
+        if self.input_at is not None:
+            logic_at = self.logic_at or self.input_at
+            idle = max(self.input_at - self.last_paint, 0)
+            values = (idle, logic_at - self.input_at, now - logic_at, now - self.input_at)
+            for phase, value in zip(PHASES, values):
+                self.histograms[phase].record(value)
+            self.ring.append((self.input_at - self.started,) + values)
+        self.input_at = None
+        self.logic_at = None
+        self.last_paint = now
+
+    def report(self, out=None):
+        if self.profiler is not None:
+            self.profiler.disable()
+        directory = os.environ.get(ENV_DIR) or os.getcwd()
+        stem = os.path.join(directory, "latency-%s-%d" % (self.program, os.getpid()))
+        out = out or sys.stderr
+        print("latency of %d inputs in %s (ms)" % (self.histograms["total"].total, self.program), file=out)
+        print("%-7s %9s %9s %9s %9s %9s" % ("phase", "p50", "p90", "p99", "p99.9", "max"), file=out)
+        for phase in PHASES:
+            histogram = self.histograms[phase]
+            print("%-7s %9.3f %9.3f %9.3f %9.3f %9.3f" % ((phase,) + tuple(
+                histogram.percentile(p) / 1e6 for p in (50, 90, 99, 99.9)) + (histogram.max / 1e6,)), file=out)
+
+        with open(stem + ".hist.txt", "w") as f:
+            for phase in PHASES:
+                f.write("# %s\n%12s %12s %10s %14s\n" % (phase, "Value(ms)", "Percentile", "TotalCount", "1/(1-Percentile)"))
+                for value, percent, count in self.histograms[phase].distribution(ticks=2):
+                    inverse = "%14.2f" % (1 / (1 - percent / 100)) if percent < 100 else "%14s" % "inf"
+                    f.write("%12.3f %12.6f %10d %s\n" % (value / 1e6, percent / 100, count, inverse))
+                f.write("\n")
+        with open(stem + ".csv", "w") as f:
+            f.write(",".join(self.ring.fields) + "\n")
+            for row in self.ring.rows():
+                f.write(",".join(str(v) for v in row) + "\n")
+        written = [stem + ".hist.txt", stem + ".csv"]
+
+        if self.profiler is not None:
+            import pstats
+            self.profiler.dump_stats(stem + ".prof")
+            written.append(stem + ".prof")
+            print("hot path by cumulative time:", file=out)
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(15)
+        print("written: %s" % ", ".join(written), file=out)
+
+
+_recorder = None
+
+
+def start(program=None):
+    """Starts recording if JULEPUZZLE_LATENCY is set. Returns True if it is on."""
+    global _recorder
+    mode = os.environ.get(ENV, "").strip().lower()
+    if _recorder is not None or mode in ("", "0", "off"):
+        return _recorder is not None
+    program = program or os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0]
+    _recorder = Recorder(program, profile=mode != "hist")
+    atexit.register(_recorder.report)
+    return True
+
+
+def enabled():
+    return _recorder is not None
+
+
+def input_received():
+    if _recorder is not None:
+        _recorder.input_received()
+
+
+def logic_done():
+    if _recorder is not None:
+        _recorder.logic_done()
+
+
+def painted():
+    if _recorder is not None:
+        _recorder.painted()
+
+
+def ignored():
+    if _recorder is not None:
+        _recorder.ignored()
@@ -0,0 +1,111 @@
+"""
+Shared word lists for the puzzle generators.
+
+A lexicon is compiled once into a wordstore file under .lexicon_cache/ and
+from then on only memory-mapped, so every process (and every run) shares
+the same read-only pages and never imports NLTK. On the first build the
+words come from local word files if there are any, and from the NLTK
+corpus otherwise. NLTK is imported only at that point. Every source gets
+its own store, keyed on its path, so switching lists never serves words
+compiled from the other one.
+"""
+import hashlib
+import os
+import wordstore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(HERE, ".lexicon_cache")
+
+# ==== where each lexicon comes from: local files (first one found wins), then an NLTK corpus
+SOURCES = {
+    "english": {
+        "files": ["/usr/share/dict/words", "/usr/share/dict/american-english", "/usr/share/dict/british-english"],
+        "nltk": "words",
+    },
+    "norwegian": {
+        "files": [os.path.join(HERE, "words.txt"), "/usr/share/dict/bokmaal", "/usr/share/dict/nynorsk"],
+        "nltk": None,
+    },
+}
+
+_open = {}
+
+
+def _nltk_words(corpus):
+    import nltk
+    try:
+        return getattr(nltk.corpus, corpus).words()
+    except LookupError:
+        # ==== corpus not downloaded yet, only works online
+        nltk.download(corpus, quiet=True)
+        return getattr(nltk.corpus, corpus).words()
+
+
+def _local_file(name, files=None):
+    env = os.environ.get("LEXICON_" + name.upper())
+    for path in ([env] if env else []) + list(files or SOURCES.get(name, {}).get("files", ())):
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def _store_path(name, source):
+    key = source if source.startswith("nltk:") else os.path.abspath(source)
+    return os.path.join(CACHE_DIR, "%s-%s.wstore" % (name, hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]))
+
+
+def load(name="english", files=None):
+    """
+    WordStore of the lexicon ``name``, compiling it on first use.
+
+    ``files`` overrides the local word files to look for. The environment
+    variable LEXICON_<NAME> (e.g. LEXICON_NORWEGIAN) can point at one too.
+    Raises LookupError if no source is available.
+    """
+    source = _local_file(name, files)
+    if source is None:
+        corpus = SOURCES.get(name, {}).get("nltk")
+        if corpus is None:
+            raise LookupError("no word list found for %r" % name)
+        source = "nltk:" + corpus
+    # ==== open stores are shared per source, like the files they are compiled to
+    store_path = _store_path(name, source)
+    store = _open.get(store_path)
+    if store is not None:
+        return store
+    if not source.startswith("nltk:"):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        store = wordstore.open_store(source, store_path)
+    elif os.path.exists(store_path):
+        store = wordstore.WordStore(store_path)
+    else:
+        try:
+            words = _nltk_words(source[len("nltk:"):])
+        except ImportError:
+            raise LookupError("no word list found for %r and NLTK is not installed" % name)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        wordstore.compile_words((w for w in words if w.isalpha()), store_path)
+        store = wordstore.WordStore(store_path)
+    _open[store_path] = store
+    return store
+
+
+def words(name="english", default=()):
+    """All words of a lexicon as a frozenset, ``default`` if it is not available."""
+    try:
+        store = load(name)
+    except LookupError:
+        return frozenset(default)
+    return frozenset(store)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    for lexicon_name in sys.argv[1:] or ["english", "norwegian"]:
+        start = time.perf_counter()
+        try:
+            print("%s: %d words, %.1f ms" % (lexicon_name, len(load(lexicon_name)),
+                                             1000 * (time.perf_counter() - start)))
+        except LookupError as e:
+            print("%s: %s" % (lexicon_name, e))
@@ -0,0 +1,336 @@
+"""
+N-tuple network for 2048, trained by temporal-difference learning.
+
+A network is a list of tuples of board cells. Each tuple, in all eight
+rotations and reflections of the board, indexes one lookup table with the
+exponents of its cells, and the value of a board is the sum of all those
+table entries. Every table is a slice of one flat float32 array, so the
+whole network is a single .npy file that players load memory-mapped and
+share between processes.
+
+Training is TD(0) on afterstates (the board after a move, before the
+spawn). Many games run side by side on the batch2048 primitives: one step
+moves every game, evaluates all four afterstates of all boards at once and
+applies the TD updates of the whole batch with one scatter-add.
+
+A checkpoint is ``<name>.npy`` with the weights and ``<name>.json`` with
+the tuples and training counters. Training resumes from it when it exists.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+import engine2048
+import batch2048
+from engine2048 import DIRECTIONS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WEIGHTS = os.path.join(HERE, "ntuple2048.npy")
+
+# ==== cells are nibble indices (4 * row + column), symmetric copies are added automatically
+NETWORKS = {
+    # 5 tables of 16^4 entries, 1.3 MB
+    "small": [(0, 1, 2, 3), (4, 5, 6, 7), (0, 1, 4, 5), (1, 2, 5, 6), (5, 6, 9, 10)],
+    # 4 tables of 16^6 entries, 268 MB, the usual 6-tuple network
+    "large": [(0, 1, 2, 3, 4, 5), (4, 5, 6, 7, 8, 9), (0, 1, 2, 4, 5, 6), (4, 5, 6, 8, 9, 10)],
+}
+LEARNING_RATE = 0.1
+BATCH = 512
+VERSION = 1
+
+
+def symmetries():
+    """The eight (16,) cell permutations of the board's rotations and reflections."""
+    cells = np.arange(16).reshape(4, 4)
+    found = []
+    for flipped in (cells, cells.T):
+        for turns in range(4):
+            found.append(np.rot90(flipped, turns).ravel())
+    return found
+
+
+class Network:
+    """
+    Tuple layout and the flat weight array.
+
+    Parameters:
+    -----------
+    tuples : sequence of sequence of int
+        Board cells of every tuple.
+    weights : np.ndarray or None
+        Flat float32 weights, e.g. a read-only memory map. None starts from
+        zeros.
+    """
+
+    def __init__(self, tuples, weights=None):
+        self.tuples = [tuple(int(c) for c in t) for t in tuples]
+        width = max(len(t) for t in self.tuples)
+        sizes = [16 ** len(t) for t in self.tuples]
+        self.size = sum(sizes)
+        starts = np.cumsum([0] + sizes[:-1])
+
+        # ==== one row per (tuple, symmetry), padded to the longest tuple with
+        # ==== cell 16, a column that is always 0
+        cells, offsets = [], []
+        for start, cell_tuple in zip(starts, self.tuples):
+            for perm in symmetries():
+                cells.append([perm[c] for c in cell_tuple] + [16] * (width - len(cell_tuple)))
+                offsets.append(start)
+        self.cells = np.array(cells, dtype=np.intp)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.powers = 16 ** np.arange(width, dtype=np.int64)
+        self.features = len(cells)
+
+        if weights is None:
+            weights = np.zeros(self.size, dtype=np.float32)
+        if weights.shape != (self.size,):
+            raise ValueError("weights have %d entries, the tuples need %d" % (weights.size, self.size))
+        self.weights = weights
+
+    def indices(self, boards):
+        """(N, features) table indices of (N, 4, 4) exponent boards."""
+        n = boards.shape[0]
+        flat = np.zeros((n, 17), dtype=np.int64)
+        flat[:, :16] = np.minimum(boards.reshape(n, 16), 15)
+        return (flat[:, self.cells] * self.powers).sum(axis=2) + self.offsets
+
+    def values(self, boards):
+        """(N,) values of (N, 4, 4) exponent boards."""
+        return self.weights[self.indices(boards)].sum(axis=1, dtype=np.float64)
+
+    def value(self, board):
+        """Value of one packed engine2048 board."""
+        return float(self.values(unpack(board)[None])[0])
+
+
+def unpack(board):
+    """(4, 4) uint8 exponents of a packed engine2048 board."""
+    return np.array([(board >> (4 * i)) & 0xF for i in range(16)], dtype=np.uint8).reshape(4, 4)
+
+
+# ==== checkpoints
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def save(network, path, **counters):
+    """Writes the weights to ``path`` and the tuples and ``counters`` next to it."""
+    temporary = path + ".tmp.npy"
+    np.save(temporary, np.asarray(network.weights, dtype=np.float32))
+    os.replace(temporary, path)
+    meta = dict(counters, version=VERSION, tuples=[list(t) for t in network.tuples])
+    with open(_meta_path(path) + ".tmp", "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(_meta_path(path) + ".tmp", _meta_path(path))
+
+
+def load(path=DEFAULT_WEIGHTS, writable=False):
+    """
+    (Network, counters) of a checkpoint. The weights are a read-only memory
+    map unless ``writable``, in which case they are copied into memory.
+    """
+    with open(_meta_path(path)) as f:
+        meta = json.load(f)
+    if meta.get("version") != VERSION:
+        raise ValueError("unsupported checkpoint version %r" % meta.get("version"))
+    weights = np.load(path, mmap_mode="r")
+    if writable:
+        weights = np.array(weights)
+    tuples = meta.pop("tuples")
+    meta.pop("version")
+    return Network(tuples, weights), meta
+
+
+# ==== playing
+def afterstates(network, boards):
+    """
+    Every move of every board.
+
+    Returns (moved, gained, legal, scores): the (4, N, 4, 4) afterstates,
+    the (4, N) merge scores, the (4, N) mask of moves that change the board
+    and the (4, N) move values ``gained + V(afterstate)``, -inf if illegal.
+    """
+    n = boards.shape[0]
+    moved = np.empty((4, n, 4, 4), dtype=np.uint8)
+    gained = np.empty((4, n), dtype=np.int64)
+    for direction in DIRECTIONS:
+        moved[direction], gained[direction] = batch2048.move_boards(boards, direction)
+    legal = (moved != boards[None]).any(axis=(2, 3))
+    scores = gained + network.values(moved.reshape(4 * n, 4, 4)).reshape(4, n)
+    return moved, gained, legal, np.where(legal, scores, -np.inf)
+
+
+class NTuplePlayer:
+    """
+    Greedy one-ply player: the move with the highest merge score plus
+    afterstate value. Has the best_move/stats interface of
+    ai2048.ExpectimaxPlayer, so 2048.py can use either.
+
+    Parameters:
+    -----------
+    network : Network or str
+        A network, or the path of a checkpoint to memory-map.
+    """
+
+    def __init__(self, network=DEFAULT_WEIGHTS):
+        if isinstance(network, str):
+            network = load(network)[0]
+        self.network = network
+        self.last_elapsed_ms = 0.0
+        self.moves = 0
+
+    def best_move(self, board):
+        """Returns the chosen direction, or None if no move is possible."""
+        start = time.perf_counter()
+        _, _, legal, scores = afterstates(self.network, unpack(board)[None])
+        self.last_elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.moves += 1
+        if not legal.any():
+            return None
+        return int(scores[:, 0].argmax())
+
+    def stats(self):
+        return {
+            "depth": 1,
+            "nodes": 4,
+            "elapsed_ms": self.last_elapsed_ms,
+            "nodes_per_second": 4000.0 / self.last_elapsed_ms if self.last_elapsed_ms > 0 else 0.0,
+        }
+
+
+# ==== training
+def _restart(game, index):
+    game.boards[index] = 0
+    game.scores[index] = 0
+    game.moves[index] = 0
+    game.spawn(index, np.array([1], dtype=np.uint8))
+    game.spawn(index)
+
+
+def train(network, games, batch=BATCH, learning_rate=LEARNING_RATE, seed=None, report=None, report_every=1000):
+    """
+    Plays ``games`` training games, ``batch`` at a time, and updates
+    ``network.weights`` in place.
+
+    ``report`` is called every ``report_every`` finished games (and at the
+    end) with a dict of the games, moves and scores since the last call.
+    Returns the total (games, moves).
+    """
+    game = batch2048.BatchGame(min(batch, games), seed=seed)
+    n = game.n
+    everyone = np.arange(n)
+    step = learning_rate / network.features
+    # ==== feature indices of each game's previous afterstate, None before its first move
+    previous = np.zeros((n, network.features), dtype=np.int64)
+    has_previous = np.zeros(n, dtype=bool)
+    started = n
+    finished = 0
+    total_moves = 0
+    window = {"games": 0, "moves": 0, "scores": [], "max_tiles": [], "start": time.perf_counter()}
+
+    active = np.ones(n, dtype=bool)
+    while active.any():
+        index = everyone[active]
+        boards = game.boards[index]
+        moved, gained, legal, scores = afterstates(network, boards)
+        choice = scores.argmax(axis=0)
+        alive = legal.any(axis=0)
+        chosen = moved[choice, np.arange(index.size)]
+        chosen_indices = network.indices(chosen)
+
+        # ==== TD(0): V(previous) moves towards reward + V(next afterstate), or 0 at the end
+        update = has_previous[index]
+        if update.any():
+            target = np.where(alive, scores[choice, np.arange(index.size)], 0.0)[update]
+            old = network.weights[previous[index[update]]].sum(axis=1, dtype=np.float64)
+            touched, inverse = np.unique(previous[index[update]], return_inverse=True)
+            inverse = inverse.ravel()
+            # ==== a weight shared by many boards of the batch gets their mean update, not the sum
+            total = np.bincount(inverse, np.repeat(step * (target - old), network.features), touched.size)
+            network.weights[touched] += (total / np.bincount(inverse, minlength=touched.size)).astype(np.float32)
+
+        playing = index[alive]
+        previous[playing] = chosen_indices[alive]
+        has_previous[playing] = True
+        game.boards[playing] = chosen[alive]
+        game.scores[playing] += gained[choice, np.arange(index.size)][alive]
+        game.moves[playing] += 1
+        game.spawn(playing)
+        total_moves += playing.size
+
+        ended = index[~alive]
+        if ended.size:
+            finished += ended.size
+            window["games"] += ended.size
+            window["moves"] += int(game.moves[ended].sum())
+            window["scores"].extend(game.scores[ended].tolist())
+            window["max_tiles"].extend(game.max_tiles()[ended].tolist())
+            has_previous[ended] = False
+            restart = ended[:max(0, games - started)]
+            if restart.size:
+                _restart(game, restart)
+                started += restart.size
+            active[ended[restart.size:]] = False
+            if report is not None and (window["games"] >= report_every or not active.any()):
+                window["seconds"] = time.perf_counter() - window["start"]
+                report(window)
+                window = {"games": 0, "moves": 0, "scores": [], "max_tiles": [], "start": time.perf_counter()}
+    return finished, total_moves
+
+
+def format_report(window, games_done):
+    scores = np.array(window["scores"], dtype=np.float64)
+    tiles = np.array(window["max_tiles"])
+    seconds = max(window["seconds"], 1e-9)
+    return "%8d games  %7.1f games/s  %8.0f moves/s  mean score %8.0f  2048 rate %5.1f%%  max %d" % (
+        games_done, window["games"] / seconds, window["moves"] / seconds, scores.mean() if scores.size else 0.0,
+        100.0 * (tiles >= engine2048.WIN_TILE).mean() if tiles.size else 0.0, tiles.max() if tiles.size else 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train an n-tuple network for 2048 by TD learning.")
+    parser.add_argument("games", type=int, help="games to play in this run")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="checkpoint to resume from and save to")
+    parser.add_argument("--network", choices=sorted(NETWORKS), default="small", help="tuples for a new network")
+    parser.add_argument("--batch", type=int, default=BATCH, help="games played side by side")
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-every", type=int, default=10000, help="games between checkpoints")
+    parser.add_argument("--report-every", type=int, default=1000)
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    counters = {"games": 0, "moves": 0, "seconds": 0.0}
+    if not args.fresh and os.path.exists(args.weights) and os.path.exists(_meta_path(args.weights)):
+        network, saved = load(args.weights, writable=True)
+        counters.update(saved)
+        print("resuming %s after %d games" % (args.weights, counters["games"]))
+    else:
+        network = Network(NETWORKS[args.network])
+        print("new %s network, %d tables, %d weights" % (args.network, len(network.tuples), network.size))
+
+    reported = [counters["games"]]
+
+    def report(window):
+        reported[0] += window["games"]
+        print(format_report(window, reported[0]), flush=True)
+
+    remaining = args.games
+    while remaining > 0:
+        chunk = min(remaining, args.checkpoint_every)
+        start = time.perf_counter()
+        # ==== a resumed run must not replay the games it already learned from
+        played, moves = train(network, chunk, args.batch, args.learning_rate, seed=(args.seed, counters["games"]),
+                              report=report, report_every=args.report_every)
+        counters["games"] += played
+        counters["moves"] += moves
+        counters["seconds"] += time.perf_counter() - start
+        save(network, args.weights, **counters)
+        remaining -= played
+    print("%d games in total, %.1f games/s over all runs, saved to %s"
+          % (counters["games"], counters["games"] / max(counters["seconds"], 1e-9), args.weights))
+
+
+if __name__ == "__main__":
+    main()
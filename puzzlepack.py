@@ -0,0 +1,155 @@
+"""
+Puzzle packs for spotdiff.
+
+A pack is a directory holding a manifest.json and the puzzle images:
+
+    pack/
+        manifest.json
+        images/<name>-left.png
+        images/<name>-right.png
+
+The manifest lists the puzzles in play order:
+
+    {"version": 1,
+     "puzzles": [{"name": "...", "left": "images/...", "right": "images/...",
+                  "differences": [[x, y, r], ...]}, ...]}
+
+Image paths are relative to the pack directory and differences use the
+normalized (x, y, r) of draw_game. Images are not read when a pack is
+opened. PuzzlePack.prefetch decodes (or memory-maps, via imagecache) the
+images of a puzzle on a background thread, so the next puzzle can load
+while the current one is being played.
+"""
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import imagecache
+
+MANIFEST = "manifest.json"
+VERSION = 1
+
+
+class Puzzle:
+    __slots__ = ("name", "left", "right", "differences")
+
+    def __init__(self, name, left, right, differences):
+        self.name = name
+        self.left = left
+        self.right = right
+        self.differences = [tuple(d) for d in differences]
+
+    def load_images(self):
+        """(left, right) imagecache pyramids, with the display levels paged in."""
+        images = imagecache.load(self.left), imagecache.load(self.right)
+        for image in images:
+            for index in range(1, len(image.levels)):
+                image.level(index).max()
+        return images
+
+
+class PuzzlePack:
+    """
+    Puzzles of one pack, in play order.
+
+    Parameters:
+    -----------
+    path : str or None
+        Pack directory, None for a pack that only lives in memory.
+    puzzles : list of Puzzle
+    """
+
+    def __init__(self, path=None, puzzles=()):
+        self.path = path
+        self.puzzles = list(puzzles)
+        self._executor = None
+        self._pending = {}
+
+    def __len__(self):
+        return len(self.puzzles)
+
+    def __iter__(self):
+        return iter(self.puzzles)
+
+    def __getitem__(self, index):
+        return self.puzzles[index]
+
+    # ==== loading
+    def prefetch(self, index):
+        """Starts loading the images of puzzle ``index`` in the background."""
+        if 0 <= index < len(self.puzzles) and index not in self._pending:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+            self._pending[index] = self._executor.submit(self.puzzles[index].load_images)
+
+    def images(self, index):
+        """(left, right) pyramids of puzzle ``index``, waiting for a prefetch if one is running."""
+        self.prefetch(index)
+        return self._pending.pop(index).result()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    # ==== writing
+    def add(self, name, left_path, right_path, differences):
+        """Copies an image pair into the pack and appends it as a puzzle."""
+        if self.path is None:
+            raise ValueError("in-memory packs cannot store images")
+        # ==== the name becomes part of the image file names, so it must not leave images/
+        if not name or ".." in name or "/" in name or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError("puzzle name %r must be a plain file name" % name)
+        if any(p.name == name for p in self.puzzles):
+            raise ValueError("pack already has a puzzle called %r" % name)
+        images = os.path.join(self.path, "images")
+        os.makedirs(images, exist_ok=True)
+        paths = []
+        for side, source in (("left", left_path), ("right", right_path)):
+            target = os.path.join(images, "%s-%s%s" % (name, side, os.path.splitext(source)[1].lower()))
+            shutil.copyfile(source, target)
+            paths.append(target)
+        puzzle = Puzzle(name, paths[0], paths[1], differences)
+        self.puzzles.append(puzzle)
+        self.save()
+        return puzzle
+
+    def save(self):
+        manifest = {"version": VERSION, "puzzles": [
+            {"name": p.name,
+             "left": os.path.relpath(p.left, self.path).replace(os.sep, "/"),
+             "right": os.path.relpath(p.right, self.path).replace(os.sep, "/"),
+             "differences": [list(d) for d in p.differences]}
+            for p in self.puzzles]}
+        os.makedirs(self.path, exist_ok=True)
+        temporary = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary, os.path.join(self.path, MANIFEST))
+
+
+def open_pack(path, create=False):
+    """Reads the manifest of the pack in ``path`` (an empty pack if ``create`` and it is missing)."""
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        if create:
+            return PuzzlePack(path)
+        raise FileNotFoundError("%s has no %s" % (path, MANIFEST))
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != VERSION:
+        raise ValueError("unsupported pack version %r" % manifest.get("version"))
+    return PuzzlePack(path, [
+        Puzzle(entry["name"], os.path.join(path, entry["left"]), os.path.join(path, entry["right"]),
+               entry["differences"])
+        for entry in manifest["puzzles"]])
+
+
+if __name__ == "__main__":
+    import sys
+    for pack_path in sys.argv[1:]:
+        pack = open_pack(pack_path)
+        print("%s: %d puzzles" % (pack_path, len(pack)))
+        for puzzle in pack:
+            print("  %-20s %d differences" % (puzzle.name, len(puzzle.differences)))
@@ -0,0 +1,218 @@
+"""
+Compact replay logs for 2048.
+
+A game is fully determined by its seed, its spawn distribution and the
+directions played, as long as the spawn after move ``k`` is drawn from
+``move_rng(seed, k)``. A replay record therefore stores only:
+
+    header      magic, version, tile count, keyframe interval, seed,
+                move count, keyframe count
+    tiles       spawn distribution as one exponent byte per entry
+    keyframes   (move index, board, score) every ``keyframe_interval`` moves
+    moves       one direction per move, packed 2 bits per move
+
+Records can be concatenated into one file. Keyframes let the replayer jump
+to any move by replaying at most ``keyframe_interval`` moves.
+"""
+import random
+import struct
+import engine2048
+from engine2048 import NEW_TILES
+
+MAGIC = b"R248"
+VERSION = 1
+KEYFRAME_INTERVAL = 1024
+
+HEADER = struct.Struct("<4sBBIQII")
+KEYFRAME = struct.Struct("<IQI")
+
+
+def move_rng(seed, index):
+    """RNG for the spawn after move ``index``; index 0 builds the starting board."""
+    return random.Random((seed << 32) | index)
+
+
+def start_board(seed, tiles=NEW_TILES):
+    return engine2048.new_board(move_rng(seed, 0), tiles)
+
+
+class Recorder:
+    """
+    Collects the directions of one game and writes them as a replay record.
+
+    The player of the game has to draw its spawns from ``start_rng()`` for
+    the starting board and ``spawn_rng()`` right before each ``record()``.
+    """
+
+    def __init__(self, seed=None, tiles=NEW_TILES, keyframe_interval=KEYFRAME_INTERVAL):
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.tiles = tuple(tiles)
+        self.keyframe_interval = keyframe_interval
+        self.packed = bytearray()
+        self.count = 0
+        self.keyframes = []
+
+    def __len__(self):
+        return self.count
+
+    def start_rng(self):
+        return move_rng(self.seed, 0)
+
+    def spawn_rng(self):
+        """RNG for the spawn of the move that is about to be recorded."""
+        return move_rng(self.seed, self.count + 1)
+
+    def start(self, board):
+        """Stores the starting position as keyframe 0."""
+        self.keyframes = [(0, board, 0)]
+
+    def record(self, direction, board, score):
+        """Logs one move; ``board`` and ``score`` are the state after its spawn."""
+        if self.count & 3 == 0:
+            self.packed.append(0)
+        self.packed[-1] |= direction << (2 * (self.count & 3))
+        self.count += 1
+        if self.count % self.keyframe_interval == 0:
+            self.keyframes.append((self.count, board, score))
+
+    def to_bytes(self):
+        exponents = bytes(value.bit_length() - 1 for value in self.tiles)
+        keyframes = b"".join(KEYFRAME.pack(*keyframe) for keyframe in self.keyframes)
+        header = HEADER.pack(MAGIC, VERSION, len(exponents), self.keyframe_interval, self.seed,
+                             self.count, len(self.keyframes))
+        return header + exponents + keyframes + bytes(self.packed)
+
+    def save(self, path, append=False):
+        with open(path, "ab" if append else "wb") as f:
+            f.write(self.to_bytes())
+
+
+class RecordedGame(engine2048.Game):
+    """A headless Game whose spawns follow the replay RNG and get recorded."""
+
+    def __init__(self, seed=None, tiles=NEW_TILES, keyframe_interval=KEYFRAME_INTERVAL):
+        self.recorder = Recorder(seed, tiles, keyframe_interval)
+        engine2048.Game.__init__(self, self.recorder.seed, tiles)
+
+    def reset(self):
+        self.recorder = Recorder(self.recorder.seed, self.tiles, self.recorder.keyframe_interval)
+        self.board = engine2048.new_board(self.recorder.start_rng(), self.tiles)
+        self.score = 0
+        self.moves = 0
+        self.recorder.start(self.board)
+
+    def move(self, direction):
+        board, gained = engine2048.move(self.board, direction)
+        if board == self.board:
+            return False
+        self.board = engine2048.spawn_tile(board, self.recorder.spawn_rng(), self.tiles)
+        self.score += gained
+        self.moves += 1
+        self.recorder.record(direction, self.board, self.score)
+        return True
+
+
+class Replay:
+    """
+    One decoded replay record.
+
+    Parameters:
+    -----------
+    seed : int
+        Seed the game was played with.
+    tiles : tuple of int
+        Spawn distribution.
+    keyframe_interval : int
+        Moves between keyframes.
+    packed : bytes
+        Directions, 2 bits per move.
+    count : int
+        Number of moves.
+    keyframes : list of (move_index, board, score)
+    """
+
+    def __init__(self, seed, tiles, keyframe_interval, packed, count, keyframes):
+        self.seed = seed
+        self.tiles = tiles
+        self.keyframe_interval = keyframe_interval
+        self.packed = packed
+        self.count = count
+        self.keyframes = keyframes or [(0, start_board(seed, tiles), 0)]
+
+    def __len__(self):
+        return self.count
+
+    def direction(self, index):
+        """Direction of move ``index`` (0-based)."""
+        return (self.packed[index >> 2] >> (2 * (index & 3))) & 3
+
+    def directions(self):
+        return [self.direction(i) for i in range(self.count)]
+
+    def state_at(self, move_index):
+        """(board, score) after ``move_index`` moves, starting from the nearest keyframe."""
+        if not 0 <= move_index <= self.count:
+            raise IndexError("move %d outside replay of %d moves" % (move_index, self.count))
+        # ==== keyframes are sorted by move index, and usually evenly spaced
+        k = min(move_index // self.keyframe_interval, len(self.keyframes) - 1)
+        while self.keyframes[k][0] > move_index:
+            k -= 1
+        index, board, score = self.keyframes[k]
+        while index < move_index:
+            board, score = self._step(board, score, index)
+            index += 1
+        return board, score
+
+    def states(self):
+        """Yields (board, score) for every position from the start to the end."""
+        index, board, score = self.keyframes[0]
+        yield board, score
+        while index < self.count:
+            board, score = self._step(board, score, index)
+            index += 1
+            yield board, score
+
+    def _step(self, board, score, index):
+        moved, gained = engine2048.move(board, self.direction(index))
+        return engine2048.spawn_tile(moved, move_rng(self.seed, index + 1), self.tiles), score + gained
+
+    @classmethod
+    def from_bytes(cls, data, offset=0):
+        """Decodes the record at ``offset``. Returns (replay, offset of the next record)."""
+        magic, version, tile_count, interval, seed, count, keyframe_count = HEADER.unpack_from(data, offset)
+        if magic != MAGIC:
+            raise ValueError("not a 2048 replay record at offset %d" % offset)
+        if version != VERSION:
+            raise ValueError("unsupported replay version %d" % version)
+        offset += HEADER.size
+        tiles = tuple(1 << exponent for exponent in data[offset:offset + tile_count])
+        offset += tile_count
+        keyframes = [KEYFRAME.unpack_from(data, offset + i * KEYFRAME.size) for i in range(keyframe_count)]
+        offset += keyframe_count * KEYFRAME.size
+        packed_size = (count + 3) // 4
+        packed = bytes(data[offset:offset + packed_size])
+        return cls(seed, tiles, interval, packed, count, keyframes), offset + packed_size
+
+
+def load(path):
+    """Reads the first replay record of a file."""
+    with open(path, "rb") as f:
+        return Replay.from_bytes(f.read())[0]
+
+
+def iter_replays(path):
+    """Yields every replay record of a file holding concatenated records."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        replay, offset = Replay.from_bytes(data, offset)
+        yield replay
+
+
+if __name__ == "__main__":
+    import sys
+    for number, replay in enumerate(iter_replays(sys.argv[1])):
+        board, score = replay.state_at(len(replay))
+        print("game %d: seed %d, %d moves, score %d, max tile %d"
+              % (number, replay.seed, len(replay), score, engine2048.max_tile(board)))
@@ -0,0 +1,260 @@
+"""
+Self-play farm for 2048.
+
+Games are split into small chunks and fanned out over a ProcessPoolExecutor.
+Every game gets its own RNG seeded from (base seed, game index), so results
+do not depend on which worker ran a game or in what order. Each finished
+chunk is streamed back to the parent, appended to a JSON-lines checkpoint
+and folded into the running statistics, so an interrupted run can be resumed
+by starting it again with the same checkpoint file. The first line of the
+checkpoint records the seed and policy settings, and a run with other
+settings refuses to resume from it.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import engine2048
+
+PERCENTILES = (1, 5, 10, 25, 50, 75, 90, 95, 99)
+
+# ==== per-process player, created once by the pool initializer
+_player = None
+_policy = None
+
+
+def game_seed(base_seed, index):
+    """Seed of game ``index``, independent of scheduling."""
+    return (base_seed << 32) | index
+
+
+def _init_worker(policy, depth, time_budget_ms):
+    global _player, _policy
+    _policy = policy
+    if policy == "expectimax":
+        import ai2048
+        _player = ai2048.ExpectimaxPlayer(depth=depth, time_budget_ms=time_budget_ms)
+    else:
+        _player = None
+
+
+def play_one(index, base_seed, policy="random", player=None):
+    """Plays game ``index`` to the end and returns its result record."""
+    seed = game_seed(base_seed, index)
+    start = time.perf_counter()
+    game = engine2048.Game(seed=seed)
+    # ==== the random policy draws from its own stream so spawns stay identical across policies
+    policy_rng = random.Random(seed ^ 0x5DEECE66D)
+    while True:
+        if policy == "expectimax":
+            direction = player.best_move(game.board)
+        else:
+            legal = game.legal_moves()
+            direction = policy_rng.choice(legal) if legal else None
+        if direction is None or not game.move(direction):
+            break
+    return {
+        "index": index,
+        "seed": seed,
+        "score": game.score,
+        "max_tile": game.max_tile,
+        "moves": game.moves,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _play_chunk(indices, base_seed):
+    return [play_one(index, base_seed, _policy, _player) for index in indices]
+
+
+def run_parameters(base_seed=0, policy="random", depth=3, time_budget_ms=None):
+    """Settings that decide the games of a run, stored as the checkpoint's first line."""
+    if policy != "expectimax":
+        # ==== search settings do not change random-policy games
+        depth = time_budget_ms = None
+    return {"base_seed": base_seed, "policy": policy, "depth": depth, "time_budget_ms": time_budget_ms}
+
+
+def load_checkpoint(path, parameters=None):
+    """
+    Reads finished game records from a JSON-lines checkpoint.
+
+    The first line holds the run parameters. Raises ValueError if they
+    differ from ``parameters``, since the records would belong to another run.
+    """
+    results = {}
+    if path is None or not os.path.exists(path):
+        return results
+    with open(path) as f:
+        header = None
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # ==== last line may be cut short if the run was killed mid-write
+                continue
+            if header is None:
+                if "run" not in record:
+                    raise ValueError("%s has no run header, resume it with the run that wrote it "
+                                     "or start a new checkpoint" % path)
+                header = record["run"]
+                if parameters is not None and header != parameters:
+                    raise ValueError("%s was written by another run (%s), not %s"
+                                     % (path, json.dumps(header, sort_keys=True), json.dumps(parameters, sort_keys=True)))
+                continue
+            results[record["index"]] = record
+    return results
+
+
+def run(games, workers=None, base_seed=0, policy="random", depth=3, time_budget_ms=None,
+        chunk_size=8, checkpoint=None, progress=None):
+    """
+    Plays ``games`` games across a process pool and returns all records.
+
+    Parameters:
+    -----------
+    games : int
+        Total number of games in the run, including already checkpointed ones.
+    workers : int or None
+        Number of worker processes, defaults to os.cpu_count().
+    base_seed : int
+        Run seed, every game seed is derived from it and the game index.
+    policy : str
+        "random" or "expectimax".
+    chunk_size : int
+        Games per task. Small chunks stream results sooner, large chunks
+        cut inter-process overhead.
+    checkpoint : str or None
+        JSON-lines file that finished games are appended to and resumed from.
+    progress : callable or None
+        Called with (finished, games, elapsed_seconds) after every chunk.
+    """
+    workers = workers or os.cpu_count()
+    parameters = run_parameters(base_seed, policy, depth, time_budget_ms)
+    results = load_checkpoint(checkpoint, parameters)
+    pending = [index for index in range(games) if index not in results]
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+    chunks.reverse()
+
+    out = open(checkpoint, "a") if checkpoint else None
+    if out is not None and out.tell() == 0:
+        out.write(json.dumps({"run": parameters}) + "\n")
+        out.flush()
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(policy, depth, time_budget_ms)) as pool:
+            # ==== keep a bounded number of chunks in flight instead of submitting them all
+            in_flight = set()
+            while chunks or in_flight:
+                while chunks and len(in_flight) < workers * 2:
+                    in_flight.add(pool.submit(_play_chunk, chunks.pop(), base_seed))
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records = future.result()
+                    for record in records:
+                        results[record["index"]] = record
+                    if out is not None:
+                        out.write("".join(json.dumps(record) + "\n" for record in records))
+                        out.flush()
+                    if progress is not None:
+                        progress(len(results), games, time.perf_counter() - start)
+    finally:
+        if out is not None:
+            out.close()
+    return [results[index] for index in sorted(results)]
+
+
+# ==== aggregation
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def histogram(values, bins):
+    """Counts of ``values`` per bin, where bin i is [bins[i], bins[i + 1])."""
+    counts = [0] * (len(bins) - 1)
+    for value in values:
+        for i in range(len(bins) - 1):
+            if bins[i] <= value < bins[i + 1]:
+                counts[i] += 1
+                break
+    return counts
+
+
+def summarize(results):
+    """Max-tile histogram, score histogram and percentile tables."""
+    scores = sorted(r["score"] for r in results)
+    moves = sorted(r["moves"] for r in results)
+    seconds = sorted(r["seconds"] for r in results)
+    max_tiles = {}
+    for r in results:
+        max_tiles[r["max_tile"]] = max_tiles.get(r["max_tile"], 0) + 1
+
+    score_bins = [0]
+    while score_bins[-1] <= (scores[-1] if scores else 0):
+        score_bins.append(max(1024, score_bins[-1] * 2))
+    total_seconds = sum(seconds)
+    return {
+        "games": len(results),
+        "max_tile_histogram": dict(sorted(max_tiles.items())),
+        "score_histogram": list(zip(score_bins[:-1], score_bins[1:], histogram(scores, score_bins))),
+        "percentiles": {
+            name: {p: percentile(values, p) for p in PERCENTILES}
+            for name, values in (("score", scores), ("moves", moves), ("seconds", seconds))
+        },
+        "moves_per_second": sum(moves) / total_seconds if total_seconds else 0.0,
+    }
+
+
+def format_summary(summary):
+    if not summary["games"]:
+        return "games: 0"
+    lines = ["games: %d" % summary["games"], "", "max tile   games   share"]
+    for tile, count in summary["max_tile_histogram"].items():
+        lines.append("%8d %7d  %5.1f%%" % (tile, count, 100.0 * count / summary["games"]))
+    lines += ["", "score range         games"]
+    for low, high, count in summary["score_histogram"]:
+        lines.append("%7d - %7d %7d" % (low, high, count))
+    lines += ["", "percentile " + " ".join("%9s" % ("p%d" % p) for p in PERCENTILES)]
+    for name, table in summary["percentiles"].items():
+        lines.append("%-10s " % name + " ".join("%9.4g" % table[p] for p in PERCENTILES))
+    lines += ["", "moves/s per worker: %.0f" % summary["moves_per_second"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many 2048 games in parallel and summarise them.")
+    parser.add_argument("games", type=int)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--policy", choices=("random", "expectimax"), default="random")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    parser.add_argument("--checkpoint", default=None, help="JSON-lines file to append results to and resume from")
+    args = parser.parse_args(argv)
+
+    def progress(finished, total, elapsed):
+        print("\r%d/%d games, %.1f s" % (finished, total, elapsed), end="", flush=True)
+
+    try:
+        results = run(args.games, workers=args.workers, base_seed=args.seed, policy=args.policy,
+                      depth=args.depth, time_budget_ms=args.budget_ms, chunk_size=args.chunk_size,
+                      checkpoint=args.checkpoint, progress=progress)
+    except ValueError as e:
+        parser.error(str(e))
+    print()
+    print(format_summary(summarize(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
-from math import sqrt
-
-def draw_game(image_left_path, image_right_path, differences):
+import os
+import sys
+import imagecache
+import imagemeta
+import hittest
+import puzzlepack
+
+def draw_game(image_left_path, image_right_path, differences, images=None):
     """
     Draws two images side by side. The left image is the original.
     The right image includes a few small 'differences' highlighted by circles.
-    The player can click on the differences in the right image.
+    The player can click on the differences in the right image, every hit is
+    marked right away. The middle mouse button ends the game. Raises
+    ValueError if the two images differ in size.
     
     Parameters:
     -----------
@@ -14,19 +21,37 @@ def draw_game(image_left_path, image_right_path, differences):
         File path to the left/original image.
     image_right_path : str
         File path to the right image (with differences).
-    differences : list of tuples (x, y, r)
+    differences : list of tuples (x, y, r) or None
         Hardcoded coordinates and radius of differences in normalized image coordinates.
         Example: differences = [(0.3, 0.4, 0.03), (0.6, 0.7, 0.03), ...]
+        None finds them with spotdiff_detect.
+    images : tuple (left, right) of imagecache pyramids or None
+        Already loaded images, e.g. prefetched by a PuzzlePack.
     """
 
-    # Load the two images
-    left_img = plt.imread(image_left_path)
-    right_img = plt.imread(image_right_path)
+    # Both images are drawn over the same pixel extent, so a pair of different sizes cannot be played
+    width, height = imagemeta.image_size(image_right_path)
+    left_size = imagemeta.image_size(image_left_path)
+    if left_size != (width, height):
+        raise ValueError("images differ in size: %dx%d and %dx%d" % (left_size + (width, height)))
+
+    # Load the two images (decoded once, later runs memory-map the cached pyramid)
+    if images is None:
+        images = imagecache.load(image_left_path), imagecache.load(image_right_path)
+    left, right = images
+    if differences is None:
+        import spotdiff_detect
+        # ==== full-resolution memory maps, large images are compared tile by tile
+        differences = spotdiff_detect.detect(left.full, right.full)
 
     # Set up figure and axes
     fig, axes = plt.subplots(1, 2, figsize=(10, 10), tight_layout=True)
-    axes[0].imshow(left_img)
-    axes[1].imshow(right_img)
+    # Show the pyramid level matching the axes size, stretched over full-resolution
+    # pixel coordinates so circles and clicks stay in full-resolution pixels
+    for ax, image in zip(axes, (left, right)):
+        box = ax.get_window_extent()
+        scale = min(box.width / width, box.height / height)
+        ax.imshow(image.for_display(width * scale, height * scale), extent=(-0.5, width - 0.5, height - 0.5, -0.5))
     for ax in axes:
         ax.set(xticks=[], yticks=[])
 
@@ -44,8 +69,8 @@ def draw_game(image_left_path, image_right_path, differences):
         # aspect='equal' and no extent is specified. 
         # The circle radius 'dr' should be a recognizable size.
         circle = Circle(
-        (dx * right_img.shape[1], dy * right_img.shape[0]),
-        radius=dr * min(right_img.shape[0], right_img.shape[1]),
+        (dx * width, dy * height),
+        radius=dr * min(height, width),
         fill=False,
         edgecolor='red',
         linewidth=2,
@@ -55,41 +80,56 @@ def draw_game(image_left_path, image_right_path, differences):
         # We need to make sure the coordinates align with image pixels:
         axes[1].add_artist(circle)
 
-    # Wait for user clicks on the figure
-    # The user can click until they press middle mouse button.
-    clicks = plt.ginput(n=-1, timeout=-1, show_clicks=True)
-
-    # Check how many differences were found
-    found = 0
-    for i, diff in enumerate(differences):
-        dx, dy, dr = diff
-        diff_found = False
-        for click in clicks:
-            cx, cy = click
-            # Convert click coordinates (in pixels) to image-normalized coordinates
-            # cx, cy are in figure coordinates. We need to map them back to image coordinates.
-            # Since we called imshow without extent, image is displayed with:
-            # x from 0 to width-1, y from 0 to height-1 in pixel coordinates of the Axes.
-            # The 'click' returned by ginput is in data coordinates matching the axes.
-            # So (cx, cy) should directly correspond to pixel positions in the displayed image.
-            
-            # Distance between click and diff center in pixels
-            d = sqrt((cx - dx*right_img.shape[1])**2 + (cy - dy*right_img.shape[0])**2)
-            if d <= dr * min(right_img.shape[0], right_img.shape[1]):
-                diff_found = True
-                found += 1
-                break
-
-        # Color code found/not found differences
-        color = 'green' if diff_found else None
-        if color != None:
-            axes[1].scatter(dx * right_img.shape[1], dy * right_img.shape[0], 
-                            marker='o', s=100, c=color, edgecolor='k')
-
-    axes[0].set(title="Game Finished!")
-    axes[1].set(title=f"You found {found}/{len(differences)} differences.")
+    # Hit-testing index over the difference circles, built once per puzzle
+    index = hittest.HitIndex(differences, width, height)
+    found = set()
+
+    def show_progress():
+        axes[1].set(title=f"Find the Differences ({len(found)}/{len(differences)})")
+
+    def finish():
+        fig.canvas.mpl_disconnect(connection)
+        axes[0].set(title="Game Finished!")
+        axes[1].set(title=f"You found {len(found)}/{len(differences)} differences.")
+        fig.canvas.draw_idle()
+
+    def on_click(event):
+        # Left click scores a guess, the middle mouse button ends the game
+        if event.button == 2:
+            finish()
+            return
+        if event.button != 1 or event.inaxes is not axes[1] or event.xdata is None:
+            return
+        # Clicks are in full-resolution pixel coordinates (see the extent above)
+        hit = int(index.hit([event.xdata], [event.ydata])[0])
+        if hit < 0:
+            axes[1].plot(event.xdata, event.ydata, marker='+', color='red')
+        elif hit not in found:
+            found.add(hit)
+            dx, dy = index.center(hit)
+            # Color code found differences
+            axes[1].scatter(dx, dy, marker='o', s=100, c='green', edgecolor='k')
+            show_progress()
+        fig.canvas.draw_idle()
+
+    show_progress()
+    connection = fig.canvas.mpl_connect('button_press_event', on_click)
     plt.show()
+    return len(found)
+
 
+def play_pack(pack):
+    """
+    Plays every puzzle of a PuzzlePack in order. The images of the next
+    puzzle are loaded in the background while the current one is played.
+    """
+    try:
+        for i, puzzle in enumerate(pack):
+            images = pack.images(i)
+            pack.prefetch(i + 1)
+            draw_game(puzzle.left, puzzle.right, puzzle.differences, images)
+    finally:
+        pack.close()
 
 if __name__ == "__main__":
 
@@ -143,16 +183,19 @@ if __name__ == "__main__":
         (0.8323, 0.9781, 0.04)
     ]
 
-    # Provide your actual image paths:
-    image_left_path = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/image_left.png"
-    image_right_path = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/image_right.png"
-
-    image_left_path2 = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/right_image2.png"
-    image_right_path2 = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/left_image2.png"
-
-    image_left_path3 = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/left_image3.png"
-    image_right_path3 = "/Users/njalpedersen/Documents/Dokumenter – njåls MacBook Pro/5. semester/jul/Julepuzzle/right_image3.png"
-
-    draw_game(image_left_path, image_right_path, differences)
-    draw_game(image_left_path2, image_right_path2, differences2)
-    draw_game(image_left_path3, image_right_path3, differences3)
+    # Play a puzzle pack given on the command line (see puzzlepack.py),
+    # otherwise the puzzles above with their images next to this script
+    if len(sys.argv) > 1:
+        pack = puzzlepack.open_pack(sys.argv[1])
+    else:
+        here = os.path.dirname(os.path.abspath(__file__))
+        pack = puzzlepack.PuzzlePack(puzzles=[
+            puzzlepack.Puzzle(name, os.path.join(here, left), os.path.join(here, right), diffs)
+            for name, left, right, diffs in (
+                ("puzzle1", "image_left.png", "image_right.png", differences),
+                ("puzzle2", "right_image2.png", "left_image2.png", differences2),
+                ("puzzle3", "left_image3.png", "right_image3.png", differences3),
+            )
+            if os.path.exists(os.path.join(here, left)) and os.path.exists(os.path.join(here, right))])
+
+    play_pack(pack)
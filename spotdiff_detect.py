@@ -0,0 +1,326 @@
+"""
+Finds the differences between the two images of a spotdiff puzzle.
+
+The images are compared per pixel (largest channel difference), the result
+is thresholded and cleaned up with a morphological opening, and changed
+pixels are grouped into connected components on a coarse grid of cells so
+that the strokes of one edit end up in one difference. Each component becomes
+an (x, y, r) tuple in the normalized coordinates draw_game expects.
+
+Uses scipy.ndimage when it is installed, otherwise a NumPy opening and a
+breadth-first search over the (small) cell grid.
+
+Images above TILED_PIXELS are processed in tiles (detect_tiled): the
+sources are memory-mapped through imagecache, every tile is thresholded
+and opened with a 2-pixel halo on a thread pool, and only the cell grid
+and a 1-bit mask per tile are kept. The components are labelled on the
+whole grid, so a difference that crosses tile borders stays one, and the
+result is the same as detect's.
+"""
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+# ==== defaults, tuned on the puzzles in the repo
+THRESHOLD = 24          # per-channel difference (0-255) that counts as changed
+MIN_AREA = 30           # changed pixels a difference needs after cleanup
+MERGE = 0.02            # changes closer than this (fraction of the short side) are one difference
+MIN_RADIUS = 0.03       # smallest radius handed out, the hand-made lists use 0.04
+PADDING = 1.25          # radius is the farthest changed pixel times this
+TILE = 1024             # tile side in detect_tiled, rounded down to whole cells
+TILED_PIXELS = 4096 * 4096  # detect switches to detect_tiled above this many pixels
+HALO = 2                # the 3x3 opening looks this far past a tile
+
+
+def load_rgb(path):
+    """Image as a uint8 (height, width, 3) array."""
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def difference_mask(left, right, threshold=THRESHOLD):
+    """Pixels whose largest channel difference is above ``threshold``."""
+    if left.shape != right.shape:
+        raise ValueError("images differ in size: %s and %s" % (left.shape[:2], right.shape[:2]))
+    diff = np.abs(left.astype(np.int16) - right.astype(np.int16))
+    return diff.max(axis=2) > threshold
+
+
+def _shift_all(mask, op):
+    # ==== 3x3 erosion (op=logical_and) or dilation (op=logical_or) with slicing
+    padded = np.pad(mask, 1, constant_values=op is np.logical_and)
+    h, w = mask.shape
+    out = padded[1:h + 1, 1:w + 1].copy()
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                op(out, padded[dy:dy + h, dx:dx + w], out=out)
+    return out
+
+
+def open_mask(mask):
+    """Morphological opening with a 3x3 square, removes single-pixel noise."""
+    if ndimage is not None:
+        return ndimage.binary_opening(mask, structure=np.ones((3, 3), dtype=bool))
+    return _shift_all(_shift_all(mask, np.logical_and), np.logical_or)
+
+
+def _cell_grid(mask, cell):
+    h, w = mask.shape
+    gh, gw = -(-h // cell), -(-w // cell)
+    padded = np.zeros((gh * cell, gw * cell), dtype=bool)
+    padded[:h, :w] = mask
+    return padded.reshape(gh, cell, gw, cell).any(axis=(1, 3))
+
+
+def _label_grid(grid, reach):
+    """Labels cells of ``grid`` joined by chains of steps of at most ``reach`` cells (reach >= 1)."""
+    if ndimage is not None:
+        # ==== a reach x reach box makes cells up to ``reach`` apart touch, no farther
+        joined = ndimage.binary_dilation(grid, structure=np.ones((reach, reach), dtype=bool)) if reach > 1 else grid
+        labels, count = ndimage.label(joined, structure=np.ones((3, 3), dtype=bool))
+        labels[~grid] = 0
+        return labels, count
+    labels = np.zeros(grid.shape, dtype=np.int32)
+    cells = set(zip(*np.nonzero(grid)))
+    count = 0
+    for start in sorted(cells):
+        if labels[start]:
+            continue
+        count += 1
+        labels[start] = count
+        queue = deque([start])
+        while queue:
+            y, x = queue.popleft()
+            for ny in range(y - reach, y + reach + 1):
+                for nx in range(x - reach, x + reach + 1):
+                    if (ny, nx) in cells and not labels[ny, nx]:
+                        labels[ny, nx] = count
+                        queue.append((ny, nx))
+    return labels, count
+
+
+def detect(left, right, threshold=THRESHOLD, min_area=MIN_AREA, merge=MERGE,
+           min_radius=MIN_RADIUS, max_differences=None):
+    """
+    Differences between two images as normalized (x, y, r) tuples, largest first.
+
+    Parameters:
+    -----------
+    left, right : str or array
+        Image paths or uint8 RGB arrays of the same size.
+    threshold : int
+        Per-channel difference (0-255) above which a pixel counts as changed.
+    min_area : int
+        Smallest number of changed pixels kept as a difference.
+    merge : float
+        Changed areas closer than this fraction of the short side are merged.
+    min_radius : float
+        Lower bound of the returned radii.
+    max_differences : int or None
+        Keep only the largest ones.
+    """
+    if _pixels(left) > TILED_PIXELS:
+        return detect_tiled(left, right, threshold, min_area, merge, min_radius, max_differences)
+    left = load_rgb(left) if isinstance(left, str) else left[..., :3]
+    right = load_rgb(right) if isinstance(right, str) else right[..., :3]
+    mask = open_mask(difference_mask(left, right, threshold))
+    h, w = mask.shape
+    short = min(h, w)
+
+    cell, reach = _cell_size(short, merge)
+    labels, count = _label_grid(_cell_grid(mask, cell), reach)
+
+    found = []
+    for index, cells in enumerate(_find_objects(labels, count), start=1):
+        if cells is None:
+            continue
+        ys, xs = cells
+        y0, x0 = ys.start * cell, xs.start * cell
+        owned = np.repeat(np.repeat(labels[ys, xs] == index, cell, axis=0), cell, axis=1)
+        region = mask[y0:y0 + owned.shape[0], x0:x0 + owned.shape[1]]
+        py, px = np.nonzero(region & owned[:region.shape[0], :region.shape[1]])
+        if len(py) < min_area:
+            continue
+        cy, cx = py.mean() + y0, px.mean() + x0
+        extent = np.sqrt(((py + y0 - cy) ** 2 + (px + x0 - cx) ** 2).max())
+        radius = max(min_radius, PADDING * extent / short)
+        found.append((len(py), (round(float(cx / w), 4), round(float(cy / h), 4), round(float(radius), 4))))
+
+    found.sort(key=lambda item: -item[0])
+    found = [difference for _, difference in found]
+    return found[:max_differences] if max_differences else found
+
+
+def _pixels(image):
+    if isinstance(image, str):
+        import imagemeta
+        width, height = imagemeta.image_size(image)
+        return width * height
+    return image.shape[0] * image.shape[1]
+
+
+def _cell_size(short, merge):
+    # ==== (cell side in pixels, labelling reach in cells) for images with short side ``short``
+    merge_px = max(1, int(merge * short))
+    cell = max(2, merge_px // 2)
+    return cell, max(1, -(-merge_px // cell))
+
+
+def _full_resolution(image):
+    """Memory-mapped uint8 (height, width, channels) array of a path, arrays pass through."""
+    if isinstance(image, str):
+        import imagecache
+        return imagecache.load(image).full
+    return image
+
+
+def detect_tiled(left, right, threshold=THRESHOLD, min_area=MIN_AREA, merge=MERGE,
+                 min_radius=MIN_RADIUS, max_differences=None, tile=TILE, workers=None):
+    """
+    detect for images too large to hold in memory as a whole.
+
+    Paths are memory-mapped through imagecache (arrays, e.g. np.memmap,
+    are used as they are) and read one tile at a time, so the peak memory
+    is a few tile-sized arrays per worker plus a 1-bit mask of the image.
+    The parameters and the result are those of detect, ``tile`` is the
+    tile side in pixels and ``workers`` the number of threads.
+    """
+    left, right = _full_resolution(left), _full_resolution(right)
+    if left.shape[:2] != right.shape[:2]:
+        raise ValueError("images differ in size: %s and %s" % (left.shape[:2], right.shape[:2]))
+    h, w = left.shape[:2]
+    short = min(h, w)
+    cell, reach = _cell_size(short, merge)
+    # ==== whole cells per tile, so every tile fills its own block of the grid
+    tile = max(cell, tile // cell * cell)
+    grid = np.zeros((-(-h // cell), -(-w // cell)), dtype=bool)
+    tiles = [(y0, x0) for y0 in range(0, h, tile) for x0 in range(0, w, tile)]
+
+    def threshold_tile(origin):
+        y0, x0 = origin
+        y1, x1 = min(y0 + tile, h), min(x0 + tile, w)
+        hy0, hx0 = max(y0 - HALO, 0), max(x0 - HALO, 0)
+        hy1, hx1 = min(y1 + HALO, h), min(x1 + HALO, w)
+        mask = open_mask(difference_mask(left[hy0:hy1, hx0:hx1, :3], right[hy0:hy1, hx0:hx1, :3], threshold))
+        mask = mask[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+        cells = _cell_grid(mask, cell)
+        grid[y0 // cell:y0 // cell + cells.shape[0], x0 // cell:x0 // cell + cells.shape[1]] = cells
+        return np.packbits(mask) if cells.any() else None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        packed = dict(zip(tiles, pool.map(threshold_tile, tiles)))
+        labels, count = _label_grid(grid, reach)
+
+        def tile_pixels(origin):
+            # ==== changed pixels of a tile in image coordinates, with the label of their cell
+            y0, x0 = origin
+            th, tw = min(tile, h - y0), min(tile, w - x0)
+            py, px = np.nonzero(np.unpackbits(packed[origin], count=th * tw).reshape(th, tw))
+            py += y0
+            px += x0
+            owner = labels[py // cell, px // cell]
+            return py, px, owner
+
+        def sums(origin):
+            py, px, owner = tile_pixels(origin)
+            return (np.bincount(owner, minlength=count + 1), np.bincount(owner, py, count + 1),
+                    np.bincount(owner, px, count + 1))
+
+        busy = [origin for origin in tiles if packed[origin] is not None]
+        area, sum_y, sum_x = np.zeros(count + 1), np.zeros(count + 1), np.zeros(count + 1)
+        for tile_area, tile_y, tile_x in pool.map(sums, busy):
+            area += tile_area
+            sum_y += tile_y
+            sum_x += tile_x
+        cy, cx = sum_y / np.maximum(area, 1), sum_x / np.maximum(area, 1)
+
+        def farthest(origin):
+            py, px, owner = tile_pixels(origin)
+            distance = np.zeros(count + 1)
+            np.maximum.at(distance, owner, (py - cy[owner]) ** 2 + (px - cx[owner]) ** 2)
+            return distance
+
+        extent = np.zeros(count + 1)
+        for tile_extent in pool.map(farthest, busy):
+            np.maximum(extent, tile_extent, out=extent)
+
+    found = []
+    for index in range(1, count + 1):
+        if area[index] < min_area:
+            continue
+        radius = max(min_radius, PADDING * np.sqrt(extent[index]) / short)
+        found.append((int(area[index]), (round(float(cx[index] / w), 4), round(float(cy[index] / h), 4),
+                                         round(float(radius), 4))))
+    found.sort(key=lambda item: -item[0])
+    found = [difference for _, difference in found]
+    return found[:max_differences] if max_differences else found
+
+
+def _find_objects(labels, count):
+    if ndimage is not None:
+        return ndimage.find_objects(labels, max_label=count)
+    objects = []
+    for index in range(1, count + 1):
+        ys, xs = np.nonzero(labels == index)
+        objects.append((slice(ys.min(), ys.max() + 1), slice(xs.min(), xs.max() + 1)))
+    return objects
+
+
+def _detect_pair(args):
+    left, right, options = args
+    return detect(left, right, **options)
+
+
+def detect_pack(pairs, workers=None, **options):
+    """
+    Runs detect on every (left path, right path) pair across a process pool
+    and returns the difference lists in the same order.
+    """
+    pairs = list(pairs)
+    if len(pairs) == 1 or workers == 1:
+        return [detect(left, right, **options) for left, right in pairs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_detect_pair, [(left, right, options) for left, right in pairs]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the differences between spotdiff image pairs.")
+    parser.add_argument("images", nargs="+", help="left and right image paths, pairwise")
+    parser.add_argument("--threshold", type=int, default=THRESHOLD)
+    parser.add_argument("--min-area", type=int, default=MIN_AREA)
+    parser.add_argument("--merge", type=float, default=MERGE)
+    parser.add_argument("--min-radius", type=float, default=MIN_RADIUS)
+    parser.add_argument("--max", type=int, default=None, dest="max_differences")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of Python lists")
+    args = parser.parse_args(argv)
+    if len(args.images) % 2:
+        parser.error("images must come in (left, right) pairs")
+
+    pairs = list(zip(args.images[0::2], args.images[1::2]))
+    results = detect_pack(pairs, workers=args.workers, threshold=args.threshold, min_area=args.min_area,
+                          merge=args.merge, min_radius=args.min_radius,
+                          max_differences=args.max_differences)
+    if args.json:
+        print(json.dumps([{"left": l, "right": r, "differences": d} for (l, r), d in zip(pairs, results)],
+                         indent=2))
+        return
+    for (left, right), differences in zip(pairs, results):
+        print("# %s / %s" % (os.path.basename(left), os.path.basename(right)))
+        print("differences = [")
+        print(",\n".join("    (%s, %s, %s)" % d for d in differences))
+        print("]")
+
+
+if __name__ == "__main__":
+    main()
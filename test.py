@@ -1,30 +1,204 @@
 import random
-from nltk.corpus import words
+import sys
+from collections import deque
+import numpy as np
+import lexicon
 
-# Load a Norwegian word list (you can use an external list if necessary)
-norwegian_word_list = set()  # Replace this with a proper set of Norwegian words
-# Example: norwegian_word_list = {"jul", "nisse", "det", "og", "er", ...}
+# Norwegian words to keep out of the noise, loaded on first use (see lexicon.py).
+# Empty if there is no local list, e.g. {"jul", "nisse", "det", "og", "er", ...}
+norwegian_word_list = None
 
-def generate_norwegian_letters_with_word(word="CRAZY", n=200):
-    norwegian_alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-    remaining_length = n - len(word)
-    random_letters = []
+def load_word_list():
+    global norwegian_word_list
+    if norwegian_word_list is None:
+        norwegian_word_list = {w.upper() for w in lexicon.words("norwegian")}
+    return norwegian_word_list
+
+NORWEGIAN_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MIN_WORD_LENGTH = 3  # Shorter words ("I", "OG") can't be avoided in random letters
+CHUNK_SIZE = 1 << 16
+
+
+class ForbiddenWords:
+    """
+    Aho-Corasick automaton over the words that must not show up in the noise.
+
+    Every state has a full transition row (``delta``), so stepping is one
+    lookup. ``longest[s]`` is the length of the longest word ending in state
+    s (0 if none) and ``dead[s]`` marks states that end a word or from which
+    every continuation eventually must, so noise never walks into them.
+    """
+
+    def __init__(self, word_list, alphabet=NORWEGIAN_ALPHABET, min_length=MIN_WORD_LENGTH):
+        self.alphabet = alphabet
+        self.index = {c: i for i, c in enumerate(alphabet)}
+        size = len(alphabet)
 
-    # Generate random letters while avoiding forming real words
-    for _ in range(remaining_length):
+        # Trie
+        children = [{}]
+        longest = [0]
+        self.max_length = 0
+        for word in word_list:
+            word = word.upper()
+            if len(word) < min_length or any(c not in self.index for c in word):
+                continue
+            state = 0
+            for c in word:
+                nxt = children[state].get(self.index[c])
+                if nxt is None:
+                    nxt = len(children)
+                    children[state][self.index[c]] = nxt
+                    children.append({})
+                    longest.append(0)
+                state = nxt
+            longest[state] = max(longest[state], len(word))
+            self.max_length = max(self.max_length, len(word))
+
+        # Failure links, breadth first, folded into a dense transition table
+        delta = np.zeros((len(children), size), dtype=np.int32)
+        fail = [0] * len(children)
+        queue = deque()
+        for c, nxt in children[0].items():
+            delta[0, c] = nxt
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            longest[state] = max(longest[state], longest[fail[state]])
+            delta[state] = delta[fail[state]]
+            for c, nxt in children[state].items():
+                fail[nxt] = delta[fail[state], c] if state else 0
+                delta[state, c] = nxt
+                queue.append(nxt)
+        self.delta = delta
+        self.longest = np.array(longest, dtype=np.int32)
+
+        # Dead states: a word ends here, or every letter leads to a dead state
+        dead = self.longest > 0
         while True:
-            char = random.choice(norwegian_alphabet)
-            potential_sequence = ''.join(random_letters[-2:] + [char])
-            # Ensure the potential sequence does not form real words
-            if potential_sequence not in norwegian_word_list:
-                random_letters.append(char)
+            grown = dead | dead[delta].all(axis=1)
+            if (grown == dead).all():
                 break
+            dead = grown
+        self.dead = dead
+        self._choices = {}
+
+    def choices(self, state):
+        """(letters, next states) that keep the noise free of words."""
+        found = self._choices.get(state)
+        if found is None:
+            row = self.delta[state]
+            keep = ~self.dead[row]
+            found = ([self.alphabet[c] for c in np.flatnonzero(keep)], row[keep].tolist())
+            if not found[0]:
+                raise ValueError("every letter completes a word")
+            self._choices[state] = found
+        return found
+
+    def step(self, state, char):
+        return int(self.delta[state, self.index[char]])
+
+
+def _noise(automaton, state, count, rng, letters, states):
+    # Appends ``count`` random letters to ``letters`` and the state before each to ``states``
+    rand = rng.random
+    choices = automaton.choices
+    for _ in range(count):
+        chars, targets = choices(state)
+        k = int(rand() * len(chars))
+        letters.append(chars[k])
+        states.append(state)
+        state = targets[k]
+    return state
+
+
+def _insert_word(automaton, state, word):
+    # State after ``word``, or None if a word starting before ``word`` would end inside it
+    for i, c in enumerate(word):
+        state = automaton.step(state, c)
+        if automaton.longest[state] > i + 1:
+            return None
+    return state
+
+
+def stream_letters_with_word(word="CRAZY", n=200, automaton=None, rng=random, chunk_size=CHUNK_SIZE):
+    """
+    Yields ``n`` letters in chunks of about ``chunk_size``: random noise with
+    ``word`` at a random position. No word of the automaton occurs anywhere,
+    except inside ``word`` itself.
+    """
+    word = word.upper()
+    if automaton is None:
+        automaton = ForbiddenWords(load_word_list() | {word})
+    remaining_length = n - len(word)
+    if remaining_length < 0:
+        raise ValueError("n is shorter than the word")
+    position = rng.randint(0, remaining_length)
+    # Letters just before the word stay unwritten until the word fits after them
+    lookback = max(automaton.max_length - 1, 0)
+
+    letters, states = [], []
+    state = 0
+    done = 0
+    while done < position:
+        count = min(chunk_size, position - done)
+        state = _noise(automaton, state, count, rng, letters, states)
+        done += count
+        if len(letters) > lookback + chunk_size:
+            cut = len(letters) - lookback
+            yield "".join(letters[:cut])
+            del letters[:cut], states[:cut]
+
+    # Redraw the last few letters until no word runs from the noise into the word
+    back = min(lookback, len(letters))
+    for _ in range(1000):
+        after = _insert_word(automaton, state, word)
+        if after is not None:
+            break
+        if not back:
+            raise ValueError("the word can't start the sequence without completing another word")
+        state = states[-back]
+        del letters[-back:], states[-back:]
+        state = _noise(automaton, state, back, rng, letters, states)
+    else:
+        raise ValueError("could not fit the word into the noise")
+    letters.append(word)
+    yield "".join(letters)
+
+    letters, states = [], []
+    state = after
+    done = 0
+    while done < remaining_length - position:
+        count = min(chunk_size, remaining_length - position - done)
+        state = _noise(automaton, state, count, rng, letters, states)
+        done += count
+        yield "".join(letters)
+        letters.clear()
+        states.clear()
+
+
+def write_letters_with_word(out, word="CRAZY", n=200, automaton=None, rng=random, chunk_size=CHUNK_SIZE):
+    """Writes the sequence to ``out`` (a path or a text stream) chunk by chunk."""
+    if isinstance(out, str):
+        with open(out, "w") as f:
+            return write_letters_with_word(f, word, n, automaton, rng, chunk_size)
+    for chunk in stream_letters_with_word(word, n, automaton, rng, chunk_size):
+        out.write(chunk)
+
+
+def generate_norwegian_letters_with_word(word="CRAZY", n=200):
+    # Whole sequence as one string, see stream_letters_with_word for long ones
+    return "".join(stream_letters_with_word(word, n))
 
-    # Insert the word into a random position in the sequence
-    position = random.randint(0, remaining_length)
-    sequence = ''.join(random_letters[:position]) + word + ''.join(random_letters[position:])
-    return sequence
 
-# Generate a string where "JULENISSEN" is the only word
-random_sequence = generate_norwegian_letters_with_word()
-print(random_sequence)
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # test.py N [WORD] [OUT]: N letters with WORD hidden, written to OUT (or stdout)
+        length = int(sys.argv[1])
+        hidden = sys.argv[2] if len(sys.argv) > 2 else "CRAZY"
+        write_letters_with_word(sys.argv[3] if len(sys.argv) > 3 else sys.stdout, hidden, length)
+        if len(sys.argv) <= 3:
+            print()
+    else:
+        # Generate a string where "JULENISSEN" is the only word
+        random_sequence = generate_norwegian_letters_with_word()
+        print(random_sequence)
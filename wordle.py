@@ -1,18 +1,21 @@
 import pygame
 import sys
-from collections import Counter
-import random
-pygame.init()
+import os
+import time
+import wordstore
+import wordle_core
+import latency
 
 # Game constants
-WORD_LENGTH = 5
-MAX_ATTEMPTS = 6
-SECRET_WORD = random.choice(["nisse"])  # A Norwegian Christmas-related word
+WORD_LENGTH = wordle_core.WORD_LENGTH
+MAX_ATTEMPTS = wordle_core.MAX_ATTEMPTS
 FONT_SIZE = 40
 LETTER_SPACING = 10
 TOP_MARGIN = 100
 LEFT_MARGIN = 100
 SQUARE_SIZE = 60
+WORD_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.txt")  # One word per line
+WORD_STORE = os.path.splitext(WORD_LIST)[0] + ".wstore"  # Compiled from WORD_LIST on first run
 
 # Colors
 BG_COLOR = (30, 30, 30)
@@ -22,131 +25,189 @@ YELLOW = (201, 180, 88)
 GRAY = (120, 124, 126)
 WHITE = (255, 255, 255)
 
-# Initialize screen
+# Tile color of each feedback value from wordle_core
+FEEDBACK_COLORS = {wordle_core.GRAY: GRAY, wordle_core.YELLOW: YELLOW, wordle_core.GREEN: GREEN}
+
+# Screen size
 WIDTH = 800
 HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Wordle-like Game (NISSE)")
-
-# Fonts
-font = pygame.font.SysFont("Arial", FONT_SIZE, bold=True)
-msg_font = pygame.font.SysFont("Arial", 50, bold=True)
-
-# Game state
-attempts = [[""] * WORD_LENGTH for _ in range(MAX_ATTEMPTS)]
-attempt_colors = [[WHITE] * WORD_LENGTH for _ in range(MAX_ATTEMPTS)]
-current_attempt = 0
-current_letter_index = 0
-game_over = False
-win = False
-
-def check_word(guess, secret):
-    # Returns a list of colors for each letter in the guess
-    result_colors = [GRAY] * WORD_LENGTH
-    secret_count = Counter(secret)
-
-    # First pass: mark green
-    for i, (g_char, s_char) in enumerate(zip(guess, secret)):
-        if g_char == s_char:
-            result_colors[i] = GREEN
-            secret_count[g_char] -= 1
-
-    # Second pass: mark yellow
-    for i, g_char in enumerate(guess):
-        if result_colors[i] == GRAY and g_char in secret_count and secret_count[g_char] > 0:
-            result_colors[i] = YELLOW
-            secret_count[g_char] -= 1
-
-    return result_colors
-
-def draw_board():
-    screen.fill(BG_COLOR)
+
+# Set up by main(), so importing this module does not open a window
+screen = None
+font = None
+msg_font = None
+words = None
+game = None
+solver = None
+
+# Render state: what each tile currently shows, cached glyphs and frame-time counters
+glyph_cache = {}
+drawn_tiles = {}
+drawn_message = [None]
+# Message line below the last tile row, so clearing it never touches the board
+BOARD_BOTTOM = TOP_MARGIN + MAX_ATTEMPTS * (SQUARE_SIZE + LETTER_SPACING) - LETTER_SPACING
+MESSAGE_RECT = pygame.Rect(0, BOARD_BOTTOM + LETTER_SPACING, WIDTH, HEIGHT - BOARD_BOTTOM - LETTER_SPACING)
+frame_count = 0
+frame_time_total = 0.0
+frame_time_last = 0.0
+wakeups = 0
+
+def load_words():
+    # Word list for guess validation, compiled once and memory-mapped.
+    # A list without WORD_LENGTH-letter words counts as none, it would reject the fallback secret
+    if os.path.exists(WORD_LIST) or os.path.exists(WORD_STORE):
+        store = wordstore.open_store(WORD_LIST, WORD_STORE)
+        if store.count_of_length(WORD_LENGTH):
+            return store
+    return None
+
+def new_game(word_store):
+    # Word of the day, or a Norwegian Christmas-related word if there is no list
+    secret = (word_store and word_store.daily_word(WORD_LENGTH)) or "nisse"
+    return wordle_core.WordleGame(secret, MAX_ATTEMPTS, word_store)
+
+def get_hint():
+    # Returns the solver's best next guess, or None if there is no word list
+    global solver
+    if solver is None:
+        if words is None:
+            return None
+        import wordle_solver
+        solver = wordle_solver.WordleSolver(words.words_of_length(WORD_LENGTH))
+    return solver.suggest(game.history())
+
+def get_glyph(letter, color):
+    # Rendered letters are cached per (letter, tile color)
+    key = (letter, color)
+    surf = glyph_cache.get(key)
+    if surf is None:
+        surf = font.render(letter.upper(), True, (0,0,0) if color != WHITE else TEXT_COLOR)
+        glyph_cache[key] = surf
+    return surf
+
+def current_message():
+    if game.game_over:
+        if game.win:
+            return "You Win!"
+        return f"You Lose! The word was {game.secret.upper()}"
+    return game.notice
+
+def draw_board(full=False):
+    # Repaints only tiles (and the message line) that changed since the last frame
+    global frame_count, frame_time_total, frame_time_last
+    start = time.perf_counter()
+    dirty = []
+    if full:
+        screen.fill(BG_COLOR)
+        drawn_tiles.clear()
+        drawn_message[0] = None
+        dirty.append(screen.get_rect())
+
     # Draw attempts
     for row in range(MAX_ATTEMPTS):
+        result = game.results[row]
         for col in range(WORD_LENGTH):
-            letter = attempts[row][col]
-            color = attempt_colors[row][col]
+            letter = game.attempts[row][col]
+            color = FEEDBACK_COLORS[result[col]] if result else WHITE
+            if drawn_tiles.get((row, col)) == (letter, color):
+                continue
+            drawn_tiles[row, col] = (letter, color)
             x = LEFT_MARGIN + col * (SQUARE_SIZE + LETTER_SPACING)
             y = TOP_MARGIN + row * (SQUARE_SIZE + LETTER_SPACING)
+            rect = pygame.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE)
 
-            # Draw square
-            pygame.draw.rect(screen, color, (x, y, SQUARE_SIZE, SQUARE_SIZE), border_radius=5)
+            # Draw square (clear first, the corners are rounded)
+            screen.fill(BG_COLOR, rect)
+            pygame.draw.rect(screen, color, rect, border_radius=5)
             # Draw letter
             if letter:
-                letter_surf = font.render(letter.upper(), True, (0,0,0) if color != WHITE else TEXT_COLOR)
+                letter_surf = get_glyph(letter, color)
                 lw, lh = letter_surf.get_size()
                 screen.blit(letter_surf, (x + (SQUARE_SIZE - lw) / 2, y + (SQUARE_SIZE - lh) / 2))
-    
-    # If game over, display message
-    if game_over:
-        if win:
-            msg = "You Win!"
-        else:
-            msg = f"You Lose! The word was {SECRET_WORD.upper()}"
-        msg_surf = msg_font.render(msg, True, WHITE)
-        mw, mh = msg_surf.get_size()
-        screen.blit(msg_surf, ((WIDTH - mw)/2, HEIGHT - mh - 50))
-
-    pygame.display.flip()
+            dirty.append(rect)
+
+    # Rejected guess or game over message
+    msg = current_message()
+    if msg != drawn_message[0]:
+        drawn_message[0] = msg
+        screen.fill(BG_COLOR, MESSAGE_RECT)
+        if msg:
+            msg_surf = msg_font.render(msg, True, WHITE)
+            mw, mh = msg_surf.get_size()
+            screen.blit(msg_surf, ((WIDTH - mw)/2, MESSAGE_RECT.centery - mh/2))
+        dirty.append(MESSAGE_RECT)
+
+    if dirty:
+        pygame.display.update(dirty)
+        latency.painted()
+        frame_count += 1
+        frame_time_last = time.perf_counter() - start
+        frame_time_total += frame_time_last
+    else:
+        latency.ignored()
 
 def handle_keydown(event):
-    global current_letter_index, current_attempt, game_over, win
-
-    if game_over:
-        # Pressing Esc to quit after game over
-        if event.key == pygame.K_ESCAPE:
-            pygame.quit()
-            sys.exit()
+    if event.key == pygame.K_ESCAPE:
+        pygame.quit()
+        sys.exit()
+    if game.game_over:
+        # Only Esc does anything after game over
         return
 
-    # Allow letter input if not game over
     if event.key == pygame.K_BACKSPACE:
-        if current_letter_index > 0:
-            current_letter_index -= 1
-            attempts[current_attempt][current_letter_index] = ""
+        game.backspace()
     elif event.key == pygame.K_RETURN:
-        # Submit word if full
-        if current_letter_index == WORD_LENGTH:
-            guess = "".join(attempts[current_attempt])
-            # We can just check length and guess since we have a fixed secret word
-            # In a bigger game you'd verify if guess is in a dictionary
-            if len(guess) == WORD_LENGTH:
-                # Process guess
-                colors = check_word(guess, SECRET_WORD)
-                attempt_colors[current_attempt] = colors
-                
-                if guess == SECRET_WORD:
-                    game_over = True
-                    win = True
-                else:
-                    current_attempt += 1
-                    current_letter_index = 0
-                    if current_attempt == MAX_ATTEMPTS:
-                        game_over = True
-    elif event.key == pygame.K_ESCAPE:
-        pygame.quit()
-        sys.exit()
+        # Submit word if full, words outside the word list are rejected with a notice
+        game.submit()
+    elif event.key == pygame.K_TAB:
+        # Hint: fill the current row with the solver's suggestion
+        hint = get_hint()
+        if hint:
+            game.fill(hint)
     else:
         # Letter keys
         if event.unicode.isalpha():
-            char = event.unicode.lower()
-            if current_letter_index < WORD_LENGTH:
-                attempts[current_attempt][current_letter_index] = char
-                current_letter_index += 1
-
-# Main game loop
-clock = pygame.time.Clock()
-running = True
-
-while running:
-    clock.tick(30)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            handle_keydown(event)
-
-    draw_board()
-
-pygame.quit()
-sys.exit()
+            game.type_letter(event.unicode)
+
+def main():
+    global screen, font, msg_font, words, game, wakeups
+    latency.start("wordle")
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Wordle-like Game")
+
+    # Fonts
+    font = pygame.font.SysFont("Arial", FONT_SIZE, bold=True)
+    msg_font = pygame.font.SysFont("Arial", 50, bold=True)
+
+    words = load_words()
+    game = new_game(words)
+
+    # Main game loop: sleep in event.wait until something happens, then repaint what changed
+    running = True
+    draw_board(full=True)
+
+    while running:
+        events = [pygame.event.wait()] + pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                latency.input_received()
+                handle_keydown(event)
+                latency.logic_done()
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                draw_board(full=True)
+        wakeups += 1
+
+        draw_board()
+
+    if "--frame-stats" in sys.argv:
+        print(f"{wakeups} wakeups, {frame_count} frames drawn, "
+              f"{1000 * frame_time_total / max(frame_count, 1):.2f} ms per frame")
+
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
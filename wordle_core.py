@@ -0,0 +1,129 @@
+"""
+Headless Wordle rules and game state.
+
+Nothing here touches pygame: wordle.py draws a WordleGame, and the solver,
+the batch evaluator and the server play it directly.
+"""
+from collections import Counter
+
+# Game constants
+WORD_LENGTH = 5
+MAX_ATTEMPTS = 6
+
+# Feedback per letter
+GRAY = 0
+YELLOW = 1
+GREEN = 2
+
+
+def check_word(guess, secret):
+    # Returns GRAY/YELLOW/GREEN for each letter in the guess
+    result = [GRAY] * len(guess)
+    secret_count = Counter(secret)
+
+    # First pass: mark green
+    for i, (g_char, s_char) in enumerate(zip(guess, secret)):
+        if g_char == s_char:
+            result[i] = GREEN
+            secret_count[g_char] -= 1
+
+    # Second pass: mark yellow
+    for i, g_char in enumerate(guess):
+        if result[i] == GRAY and secret_count[g_char] > 0:
+            result[i] = YELLOW
+            secret_count[g_char] -= 1
+
+    return result
+
+
+class WordleGame:
+    """
+    State of one Wordle game.
+
+    Parameters:
+    -----------
+    secret : str
+        The word to find.
+    max_attempts : int
+        Number of guesses before the game is lost.
+    words : container of str or None
+        Accepted guesses. None accepts any word of the right length.
+    """
+
+    __slots__ = ("secret", "word_length", "max_attempts", "words", "attempts", "results",
+                 "current_attempt", "current_letter_index", "game_over", "win", "notice")
+
+    def __init__(self, secret, max_attempts=MAX_ATTEMPTS, words=None):
+        self.secret = secret
+        self.word_length = len(secret)
+        self.max_attempts = max_attempts
+        self.words = words
+        self.attempts = [[""] * self.word_length for _ in range(max_attempts)]
+        self.results = [None] * max_attempts
+        self.current_attempt = 0
+        self.current_letter_index = 0
+        self.game_over = False
+        self.win = False
+        self.notice = ""
+
+    def history(self):
+        """(guess, feedback) for every submitted row."""
+        return [("".join(self.attempts[row]), self.results[row])
+                for row in range(self.max_attempts) if self.results[row] is not None]
+
+    def type_letter(self, char):
+        if self.game_over or self.current_letter_index >= self.word_length:
+            return False
+        self.notice = ""
+        self.attempts[self.current_attempt][self.current_letter_index] = char.lower()
+        self.current_letter_index += 1
+        return True
+
+    def backspace(self):
+        if self.game_over or self.current_letter_index == 0:
+            return False
+        self.notice = ""
+        self.current_letter_index -= 1
+        self.attempts[self.current_attempt][self.current_letter_index] = ""
+        return True
+
+    def fill(self, word):
+        """Replaces the current row with ``word`` without submitting it."""
+        if self.game_over:
+            return
+        self.notice = ""
+        self.attempts[self.current_attempt] = list(word)
+        self.current_letter_index = self.word_length
+
+    def submit(self):
+        """
+        Scores the current row. Returns its feedback, or None if the row is
+        incomplete or not an accepted word (then ``notice`` says why).
+        """
+        if self.game_over or self.current_letter_index != self.word_length:
+            return None
+        guess = "".join(self.attempts[self.current_attempt])
+        if self.words is not None and guess not in self.words:
+            self.notice = "Not in word list"
+            return None
+        self.notice = ""
+        result = check_word(guess, self.secret)
+        self.results[self.current_attempt] = result
+        if guess == self.secret:
+            self.game_over = True
+            self.win = True
+        else:
+            self.current_attempt += 1
+            self.current_letter_index = 0
+            if self.current_attempt == self.max_attempts:
+                self.game_over = True
+        return result
+
+    def guess(self, word):
+        """Fills and submits ``word`` in one step."""
+        self.fill(word)
+        return self.submit()
+
+    @property
+    def guesses_used(self):
+        return self.current_attempt + (1 if self.win else 0)
@@ -0,0 +1,156 @@
+"""
+Batch evaluation of Wordle strategies.
+
+Plays a strategy against every answer of a word list through the headless
+WordleGame and reports the guess distribution and throughput. Answers are
+split into chunks and fanned out over a ProcessPoolExecutor. The parent
+builds the solver's feedback matrix cache before starting the pool, so every
+worker only memory-maps it.
+"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import wordle_core
+import wordle_solver
+
+STRATEGIES = ("entropy", "random")
+
+# ==== per-process state, created once by the pool initializer
+_solver = None
+_strategy = None
+_seed = 0
+
+
+def _init_worker(words, answers, strategy, seed):
+    global _solver, _strategy, _seed
+    _solver = wordle_solver.WordleSolver(words, answers)
+    _strategy = strategy
+    _seed = seed
+
+
+def play_one(answer, solver, strategy="entropy", max_attempts=wordle_core.MAX_ATTEMPTS, seed=0):
+    """
+    Plays one game against ``answer`` and returns the number of guesses
+    used, or None if the game was lost.
+
+    "entropy" plays the solver's suggestion, "random" plays a random word
+    that is still consistent with the feedback so far.
+    """
+    # ==== strategies only play words the solver knows, so skip the word-list check
+    game = wordle_core.WordleGame(answer, max_attempts)
+    rng = random.Random("%d:%s" % (seed, answer))
+    while not game.game_over:
+        history = game.history()
+        if strategy == "entropy":
+            guess = solver.suggest(history)
+        else:
+            remaining = solver.candidates(history).nonzero()[0]
+            guess = solver.answers[rng.choice(remaining)] if len(remaining) else None
+        if guess is None or game.guess(guess) is None:
+            break
+    return game.guesses_used if game.win else None
+
+
+def _play_chunk(answers):
+    return [(answer, play_one(answer, _solver, _strategy, seed=_seed)) for answer in answers]
+
+
+def run(words, answers=None, strategy="entropy", workers=None, chunk_size=64, seed=0, progress=None):
+    """
+    Plays ``strategy`` against every answer and returns {answer: guesses or None}.
+
+    Parameters:
+    -----------
+    words : list of str
+        Allowed guesses (and answers if ``answers`` is None).
+    answers : list of str or None
+        Secrets to play against.
+    strategy : str
+        "entropy" or "random".
+    workers : int or None
+        Number of worker processes, defaults to os.cpu_count().
+    chunk_size : int
+        Answers per task.
+    progress : callable or None
+        Called with (finished, total, elapsed_seconds) after every chunk.
+    """
+    workers = workers or os.cpu_count()
+    answers = list(answers if answers is not None else words)
+    # ==== build the matrix cache once here, the workers just map it
+    wordle_solver.WordleSolver(words, answers)
+    chunks = [answers[i:i + chunk_size] for i in range(0, len(answers), chunk_size)]
+    chunks.reverse()
+
+    results = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(words, answers, strategy, seed)) as pool:
+        in_flight = set()
+        while chunks or in_flight:
+            while chunks and len(in_flight) < workers * 2:
+                in_flight.add(pool.submit(_play_chunk, chunks.pop()))
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                results.update(future.result())
+                if progress is not None:
+                    progress(len(results), len(answers), time.perf_counter() - start)
+    return results
+
+
+def summarize(results, seconds):
+    """Guess distribution (lost games under "X"), average over won games and answers/s."""
+    distribution = {}
+    for guesses in results.values():
+        key = "X" if guesses is None else guesses
+        distribution[key] = distribution.get(key, 0) + 1
+    won = [g for g in results.values() if g is not None]
+    return {
+        "answers": len(results),
+        "distribution": dict(sorted(distribution.items(), key=lambda item: (item[0] == "X", str(item[0])))),
+        "average": sum(won) / len(won) if won else 0.0,
+        "solve_rate": len(won) / len(results) if results else 0.0,
+        "answers_per_second": len(results) / seconds if seconds else 0.0,
+    }
+
+
+def format_summary(summary):
+    lines = ["answers: %d" % summary["answers"], "", "guesses   games   share"]
+    for guesses, count in summary["distribution"].items():
+        lines.append("%7s %7d  %5.1f%%" % (guesses, count, 100.0 * count / summary["answers"]))
+    lines += [
+        "",
+        "average guesses (won): %.3f" % summary["average"],
+        "solve rate: %.2f%%" % (100.0 * summary["solve_rate"]),
+        "answers/s: %.1f" % summary["answers_per_second"],
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a Wordle strategy against every answer in a list.")
+    parser.add_argument("words", help="word list, one word per line")
+    parser.add_argument("--answers", default=None, help="answer list, defaults to the word list")
+    parser.add_argument("--length", type=int, default=wordle_core.WORD_LENGTH)
+    parser.add_argument("--strategy", choices=STRATEGIES, default="entropy")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    words = wordle_solver.load_words(args.words, args.length)
+    answers = wordle_solver.load_words(args.answers, args.length) if args.answers else None
+
+    def progress(finished, total, elapsed):
+        print("\r%d/%d answers, %.1f s" % (finished, total, elapsed), end="", flush=True)
+
+    start = time.perf_counter()
+    results = run(words, answers, strategy=args.strategy, workers=args.workers,
+                  chunk_size=args.chunk_size, seed=args.seed, progress=progress)
+    print()
+    print(format_summary(summarize(results, time.perf_counter() - start)))
+
+
+if __name__ == "__main__":
+    main()
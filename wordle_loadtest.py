@@ -0,0 +1,131 @@
+"""
+Load test for wordle_server.py.
+
+Opens ``clients`` keep-alive connections to a running server. Each client
+starts a session, plays random guesses until the game ends and starts
+over, until the duration is up. A guess the server does not score (not in
+its word list) counts as an error and starts a new game. Prints requests/s
+and latency percentiles per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[min(int(rank), len(sorted_values)) - 1]
+
+
+class Client:
+    """One keep-alive connection issuing requests back to back."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.writer.write(("%s %s HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\n\r\n"
+                           % (method, path, self.host, len(body))).encode("latin-1") + body)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = 0
+        for line in head.split(b"\r\n")[1:]:
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":", 1)[1])
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_client(host, port, guesses, deadline, latencies, rng):
+    client = Client(host, port)
+    await client.connect()
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status, data = await client.request("POST", "/new")
+            latencies["new"].append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+                continue
+            token = data["session"]
+            over = False
+            while not over and time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status, data = await client.request("POST", "/guess",
+                                                    {"session": token, "guess": rng.choice(guesses)})
+                latencies["guess"].append(time.perf_counter() - start)
+                # ==== an unscored guess (not in the server's list) ends the game as an error
+                if status != 200 or data.get("result") is None:
+                    errors += 1
+                    break
+                over = data["over"]
+    finally:
+        client.close()
+    return errors
+
+
+async def load_test(host, port, clients, seconds, guesses, seed=0):
+    latencies = {"new": [], "guess": []}
+    start = time.perf_counter()
+    deadline = start + seconds
+    errors = await asyncio.gather(*(
+        run_client(host, port, guesses, deadline, latencies, random.Random(seed * 1000003 + i))
+        for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    return latencies, sum(errors), elapsed
+
+
+def format_report(latencies, errors, elapsed):
+    total = sum(len(values) for values in latencies.values())
+    lines = ["%d requests in %.2f s, %.0f req/s, %d errors" % (total, elapsed, total / elapsed, errors),
+             "", "endpoint   requests " + " ".join("%9s" % ("p%g" % p) for p in PERCENTILES)]
+    rows = list(latencies.items()) + [("all", [v for values in latencies.values() for v in values])]
+    for name, values in rows:
+        values = sorted(values)
+        if not values:
+            continue
+        lines.append("%-10s %8d " % (name, len(values))
+                     + " ".join("%7.2fms" % (1000 * percentile(values, p)) for p in PERCENTILES))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure throughput and latency of a local Wordle server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clients", type=int, default=200, help="concurrent keep-alive connections")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--words", default=None, help="word list to draw guesses from")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.words:
+        import wordle_solver
+        guesses = wordle_solver.load_words(args.words, 5)
+    else:
+        guesses = ["nisse", "julen", "gaver", "kakao", "snøen"]
+    latencies, errors, elapsed = asyncio.run(
+        load_test(args.host, args.port, args.clients, args.seconds, guesses, args.seed))
+    print(format_report(latencies, errors, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Multi-session Wordle server.
+
+A single asyncio process speaking plain HTTP/1.1 with keep-alive, built on
+asyncio.start_server so it needs nothing outside the standard library.
+Every player gets a session holding a WordleGame. Sessions live in an
+OrderedDict in last-used order, so evicting idle ones only looks at the
+oldest entries, and the table is capped at ``max_sessions``.
+
+API (all responses are JSON):
+
+    POST /new                       -> {"session", "length", "max_attempts"}
+    POST /guess  {"session", "guess"} -> {"result", "attempt", "over", "win", "notice"[, "secret"]}
+    GET  /state?session=ID          -> {"guesses", "results", "over", "win"}
+    GET  /stats                     -> {"sessions", "requests", "evicted"}
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from urllib.parse import urlsplit, parse_qs
+import wordle_core
+import wordstore
+
+WORD_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "words.txt")
+MAX_HEADER_BYTES = 16384
+MAX_BODY_BYTES = 4096
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Session:
+    __slots__ = ("token", "game", "last_seen")
+
+    def __init__(self, token, game, now):
+        self.token = token
+        self.game = game
+        self.last_seen = now
+
+
+class WordleServer:
+    """
+    Session table and request handlers.
+
+    Parameters:
+    -----------
+    words : container of str or None
+        Accepted guesses. None accepts any word.
+    answers : sequence of str
+        Secrets are drawn from this list, e.g. a lazy WordStore.group.
+    idle_timeout : float
+        Seconds without a request before a session is evicted.
+    max_sessions : int
+        Upper bound on live sessions, the least recently used one goes first.
+    """
+
+    def __init__(self, words, answers, idle_timeout=900.0, max_sessions=100000,
+                 max_attempts=wordle_core.MAX_ATTEMPTS, seed=None):
+        self.words = words
+        self.answers = answers if isinstance(answers, Sequence) else list(answers)
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_attempts = max_attempts
+        self.rng = random.Random(seed)
+        self.sessions = OrderedDict()
+        self.requests = 0
+        self.evicted = 0
+
+    # ==== sessions
+    def evict(self, now=None):
+        """Drops sessions idle for longer than ``idle_timeout``."""
+        now = time.monotonic() if now is None else now
+        limit = now - self.idle_timeout
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.last_seen > limit:
+                break
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+    def new_session(self):
+        now = time.monotonic()
+        self.evict(now)
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+        token = secrets.token_urlsafe(12)
+        game = wordle_core.WordleGame(self.rng.choice(self.answers), self.max_attempts, self.words)
+        session = self.sessions[token] = Session(token, game, now)
+        return session
+
+    def session(self, token):
+        session = self.sessions.get(token) if isinstance(token, str) else None
+        if session is None:
+            raise HTTPError(404, "unknown or expired session")
+        session.last_seen = time.monotonic()
+        self.sessions.move_to_end(token)
+        return session
+
+    # ==== handlers
+    def handle(self, method, target, body):
+        """Returns (status, payload) for one request."""
+        self.requests += 1
+        url = urlsplit(target)
+        if url.path == "/new":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            session = self.new_session()
+            return 200, {"session": session.token, "length": session.game.word_length,
+                         "max_attempts": session.game.max_attempts}
+        if url.path == "/guess":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            try:
+                data = json.loads(body or b"{}")
+                token, guess = data["session"], str(data["guess"]).strip().lower()
+                if not isinstance(token, str):
+                    raise TypeError("session must be a string")
+            except (ValueError, KeyError, TypeError):
+                raise HTTPError(400, "expected {\"session\": ..., \"guess\": ...}")
+            game = self.session(token).game
+            if game.game_over:
+                raise HTTPError(400, "game is over")
+            if len(guess) != game.word_length or not guess.isalpha():
+                raise HTTPError(400, "guess must be %d letters" % game.word_length)
+            attempt = game.current_attempt
+            result = game.guess(guess)
+            payload = {"result": result, "attempt": attempt + 1, "over": game.game_over,
+                       "win": game.win, "notice": game.notice}
+            if game.game_over and not game.win:
+                payload["secret"] = game.secret
+            return 200, payload
+        if url.path == "/state":
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            token = parse_qs(url.query).get("session", [None])[0]
+            game = self.session(token).game
+            history = game.history()
+            return 200, {"guesses": [g for g, _ in history], "results": [r for _, r in history],
+                         "over": game.game_over, "win": game.win}
+        if url.path == "/stats":
+            return 200, {"sessions": len(self.sessions), "requests": self.requests,
+                         "evicted": self.evicted}
+        raise HTTPError(404, "no such endpoint")
+
+    # ==== HTTP
+    async def serve_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 413, {"error": "headers too large"}, False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad request line"}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad content-length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version != "HTTP/1.0")
+                try:
+                    status, payload = self.handle(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        writer.write(("HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n"
+                      "Content-Length: %d\r\nConnection: %s\r\n\r\n"
+                      % (status, REASONS.get(status, ""), len(body),
+                         "keep-alive" if keep_alive else "close")).encode("latin-1") + body)
+        await writer.drain()
+
+    async def evict_loop(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            self.evict()
+
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        server = await asyncio.start_server(self.serve_client, host, port, limit=MAX_HEADER_BYTES,
+                                            backlog=1024)
+        evictor = asyncio.create_task(self.evict_loop(min(self.idle_timeout, 60.0)))
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+def load_word_lists(path, length=wordle_core.WORD_LENGTH):
+    """(accepted guesses, answer list) from a word list, or a fallback when there is none."""
+    if os.path.exists(path) or os.path.exists(os.path.splitext(path)[0] + ".wstore"):
+        store = wordstore.open_store(path)
+        if store.count_of_length(length):
+            return store, store.group(length)
+    return None, ["nisse"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Wordle sessions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--words", default=WORD_LIST, help="word list, one word per line")
+    parser.add_argument("--idle-timeout", type=float, default=900.0, help="seconds before an idle session is dropped")
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    words, answers = load_word_lists(args.words)
+    server = WordleServer(words, answers, idle_timeout=args.idle_timeout,
+                          max_sessions=args.max_sessions, seed=args.seed)
+
+    def ready(listener):
+        address = listener.sockets[0].getsockname()
+        print("serving %d answers on http://%s:%d" % (len(answers), address[0], address[1]), flush=True)
+
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Entropy-maximizing Wordle solver.
+
+Every (guess, answer) pair is scored once into a feedback matrix. A
+feedback pattern is encoded in base 3, one digit per letter position
+(0 = gray, 1 = yellow, 2 = green, position 0 is the lowest digit), using
+the same rules as check_word in wordle_core.py: greens first, then yellows from
+left to right while the answer still has unused copies of the letter.
+
+The matrix is uint8 for words of up to 5 letters and uint16 up to 10, and
+is cached on disk with np.save so later runs memory-map it instead of
+recomputing it.
+"""
+import hashlib
+import os
+import numpy as np
+from wordle_core import GRAY, YELLOW, GREEN, check_word
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".wordle_cache")
+
+
+def load_words(path, length=None):
+    """Reads one word per line, lowercased, optionally keeping only ``length`` letters."""
+    with open(path, encoding="utf-8") as f:
+        words = [line.strip().lower() for line in f]
+    words = [w for w in words if w and w.isalpha() and (length is None or len(w) == length)]
+    return list(dict.fromkeys(words))
+
+
+def pattern_dtype(length):
+    if length <= 5:
+        return np.uint8
+    if length <= 10:
+        return np.uint16
+    return np.uint32
+
+
+def encode_pattern(pattern):
+    """
+    Turns a feedback pattern into its base-3 code.
+
+    Accepts an int code, a sequence of digits (0/1/2) or a string where
+    'g' is green, 'y' is yellow and anything else is gray.
+    """
+    if isinstance(pattern, (int, np.integer)):
+        return int(pattern)
+    if isinstance(pattern, str):
+        pattern = [GREEN if c == "g" else YELLOW if c == "y" else GRAY for c in pattern.lower()]
+    code = 0
+    for position, digit in enumerate(pattern):
+        code += int(digit) * 3 ** position
+    return code
+
+
+def decode_pattern(code, length):
+    digits = []
+    for _ in range(length):
+        code, digit = divmod(int(code), 3)
+        digits.append(digit)
+    return digits
+
+
+def feedback(guess, answer):
+    """Pattern code of a single guess."""
+    return encode_pattern(check_word(guess, answer))
+
+
+def _letter_codes(words, alphabet):
+    return np.array([[alphabet[c] for c in w] for w in words], dtype=np.uint8).reshape(len(words), -1)
+
+
+def compute_matrix(guesses, answers, chunk=None):
+    """
+    Feedback codes for every guess (rows) against every answer (columns).
+
+    Works on blocks of guesses with all answers at once. The only Python
+    loop is over letter positions, to hand out yellows left to right.
+    """
+    length = len(guesses[0])
+    alphabet = {c: i for i, c in enumerate(sorted(set("".join(guesses) + "".join(answers))))}
+    g_letters = _letter_codes(guesses, alphabet)
+    a_letters = _letter_codes(answers, alphabet)
+    dtype = pattern_dtype(length)
+    powers = (3 ** np.arange(length)).astype(np.uint32)
+    matrix = np.empty((len(guesses), len(answers)), dtype=dtype)
+    letters = np.arange(len(alphabet), dtype=np.uint8)
+    if chunk is None:
+        # ==== keep the (chunk, answers, length, alphabet) temporary around 16 MB
+        chunk = max(1, 2 ** 24 // (len(answers) * length * len(alphabet)))
+
+    for start in range(0, len(guesses), chunk):
+        g = g_letters[start:start + chunk]
+        green = g[:, None, :] == a_letters[None, :, :]
+        # ==== unused copies of each letter in the answer, per (guess, answer)
+        unmatched = np.where(green, 255, a_letters[None, :, :])
+        available = (unmatched[..., None] == letters).sum(axis=2, dtype=np.uint8)
+        digits = np.where(green, GREEN, GRAY).astype(np.uint32)
+        for position in range(length):
+            letter = np.broadcast_to(g[:, None, position, None], available.shape[:2] + (1,))
+            count = np.take_along_axis(available, letter, axis=2)[..., 0]
+            yellow = ~green[..., position] & (count > 0)
+            digits[..., position][yellow] = YELLOW
+            np.put_along_axis(available, letter, (count - yellow)[..., None], axis=2)
+        matrix[start:start + chunk] = (digits * powers).sum(axis=2)
+    return matrix
+
+
+def _cache_path(guesses, answers, cache_dir):
+    digest = hashlib.sha1(("\n".join(guesses) + "\0" + "\n".join(answers)).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, "feedback-%s.npy" % digest[:16])
+
+
+def load_matrix(guesses, answers, cache_dir=CACHE_DIR):
+    """Feedback matrix from the on-disk cache (memory-mapped), computing it on a miss."""
+    path = _cache_path(guesses, answers, cache_dir) if cache_dir else None
+    if path and os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    matrix = compute_matrix(guesses, answers)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = path + ".tmp.npy"
+        np.save(temporary, matrix)
+        os.replace(temporary, path)
+        return np.load(path, mmap_mode="r")
+    return matrix
+
+
+class WordleSolver:
+    """
+    Suggests guesses that maximise the expected information of the feedback.
+
+    Parameters:
+    -----------
+    guesses : list of str
+        Words the solver may play.
+    answers : list of str or None
+        Words that can be the secret, defaults to ``guesses``.
+    cache_dir : str or None
+        Where the feedback matrix is cached, None disables the cache.
+    """
+
+    def __init__(self, guesses, answers=None, cache_dir=CACHE_DIR):
+        self.guesses = list(guesses)
+        self.answers = list(answers) if answers is not None else self.guesses
+        self.length = len(self.guesses[0])
+        self.guess_index = {w: i for i, w in enumerate(self.guesses)}
+        self.answer_index = {w: i for i, w in enumerate(self.answers)}
+        self.matrix = load_matrix(self.guesses, self.answers, cache_dir)
+        self.solved_code = encode_pattern([GREEN] * self.length)
+        self.n_codes = 3 ** self.length
+        self._memo = {}
+
+    def candidates(self, history):
+        """Boolean mask over answers consistent with ``history``."""
+        mask = np.ones(len(self.answers), dtype=bool)
+        for guess, pattern in history:
+            code = encode_pattern(pattern)
+            if guess in self.guess_index:
+                mask &= self.matrix[self.guess_index[guess]] == code
+            else:
+                mask &= np.array([feedback(guess, a) == code for a in self.answers])
+        return mask
+
+    def entropies(self, candidates):
+        """Expected information in bits of every guess over the candidate answers."""
+        columns = np.flatnonzero(candidates)
+        block = np.asarray(self.matrix[:, columns], dtype=np.int64)
+        offsets = np.arange(len(self.guesses), dtype=np.int64)[:, None] * self.n_codes
+        counts = np.bincount((block + offsets).ravel(), minlength=len(self.guesses) * self.n_codes)
+        counts = counts.reshape(len(self.guesses), self.n_codes).astype(np.float64)
+        p = counts / len(columns)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1)
+
+    def suggest(self, history=()):
+        """
+        Best next guess for ``history``, a sequence of (guess, pattern).
+
+        Returns None when no answer is consistent with the history.
+        """
+        key = tuple((guess, encode_pattern(pattern)) for guess, pattern in history)
+        if key in self._memo:
+            return self._memo[key]
+        candidates = self.candidates(key)
+        remaining = np.flatnonzero(candidates)
+        if remaining.size == 0:
+            choice = None
+        elif remaining.size <= 2:
+            choice = self.answers[remaining[0]]
+        else:
+            score = self.entropies(candidates)
+            # ==== a guess that might itself be the answer wins a tie
+            in_candidates = np.zeros(len(self.guesses), dtype=bool)
+            for i in remaining:
+                index = self.guess_index.get(self.answers[i])
+                if index is not None:
+                    in_candidates[index] = True
+            choice = self.guesses[int(np.argmax(score + 1e-6 * in_candidates))]
+        self._memo[key] = choice
+        return choice
+
+    def solve(self, answer, max_guesses=None):
+        """Plays against ``answer`` and returns the list of guesses made."""
+        history = []
+        answer_column = self.answer_index.get(answer)
+        while max_guesses is None or len(history) < max_guesses:
+            guess = self.suggest(history)
+            if guess is None:
+                break
+            if answer_column is not None and guess in self.guess_index:
+                code = int(self.matrix[self.guess_index[guess], answer_column])
+            else:
+                code = feedback(guess, answer)
+            history.append((guess, code))
+            if code == self.solved_code:
+                break
+        return [guess for guess, code in history]
+
+    def evaluate(self, answers=None):
+        """Guess-count distribution and average over ``answers`` (all answers by default)."""
+        distribution = {}
+        for answer in (answers if answers is not None else self.answers):
+            n = len(self.solve(answer))
+            distribution[n] = distribution.get(n, 0) + 1
+        total = sum(distribution.values())
+        average = sum(n * c for n, c in distribution.items()) / total if total else 0.0
+        return {"distribution": dict(sorted(distribution.items())), "average": average}
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    start = time.perf_counter()
+    words = load_words(sys.argv[1], length=int(sys.argv[2]) if len(sys.argv) > 2 else 5)
+    solver = WordleSolver(words)
+    print("loaded %d words in %.2f s" % (len(words), time.perf_counter() - start))
+    print("first guess:", solver.suggest())
+    start = time.perf_counter()
+    print(solver.evaluate(), "in %.2f s" % (time.perf_counter() - start))
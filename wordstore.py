@@ -0,0 +1,250 @@
+"""
+Compiled, memory-mapped word lists.
+
+A raw list (one word per line, any language) is compiled once into a
+binary store and then opened with mmap, so startup costs a few reads no
+matter how large the list is. Layout, all integers little-endian uint32:
+
+    header      magic "WSTR", version, word count, hash slots, data size,
+                number of length groups
+    lengths     (length, first index, end index) per word length
+    offsets     word count + 1 offsets into the data block
+    slots       open-addressing hash table of word index + 1 (0 = empty)
+    data        UTF-8 words, sorted by (length in letters, UTF-8 bytes)
+
+Membership is one FNV-1a hash plus a few probes, prefix queries are a
+binary search within each length group.
+"""
+import datetime
+import mmap
+import os
+import random
+import struct
+import unicodedata
+from collections.abc import Sequence
+
+MAGIC = b"WSTR"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIII")
+GROUP = struct.Struct("<III")
+UINT = struct.Struct("<I")
+
+
+def normalize(word):
+    return unicodedata.normalize("NFC", word.strip().lower())
+
+
+def fnv1a(data):
+    h = 0x811C9DC5
+    for byte in data:
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def read_words(path):
+    """Normalized, alphabetic words of a raw list."""
+    with open(path, encoding="utf-8") as f:
+        return {w for w in (normalize(line) for line in f) if w and w.isalpha()}
+
+
+def compile_words(words, out_path):
+    """Writes ``words`` as a store to ``out_path``."""
+    ordered = sorted({normalize(w) for w in words}, key=lambda w: (len(w), w.encode("utf-8")))
+    encoded = [w.encode("utf-8") for w in ordered]
+
+    groups = []
+    for index, word in enumerate(ordered):
+        if not groups or groups[-1][0] != len(word):
+            groups.append([len(word), index, index])
+        groups[-1][2] = index + 1
+
+    slots = 1
+    while slots < 2 * len(encoded) + 1:
+        slots *= 2
+    table = [0] * slots
+    for index, data in enumerate(encoded):
+        slot = fnv1a(data) & (slots - 1)
+        while table[slot]:
+            slot = (slot + 1) & (slots - 1)
+        table[slot] = index + 1
+
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    temporary = out_path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(encoded), slots, offsets[-1], len(groups)))
+        f.write(b"".join(GROUP.pack(*group) for group in groups))
+        f.write(struct.pack("<%dI" % len(offsets), *offsets))
+        f.write(struct.pack("<%dI" % slots, *table))
+        f.write(b"".join(encoded))
+    os.replace(temporary, out_path)
+
+
+class WordStore:
+    """
+    Read-only view of a compiled store. The file is mapped on first use.
+
+    Parameters:
+    -----------
+    path : str
+        Path of a file written by compile_words.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+
+    def _open(self):
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, slots, data_size, group_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("%s is not a word store" % self.path)
+        self.count = count
+        self.slots = slots
+        position = HEADER.size
+        self.groups = {}
+        for i in range(group_count):
+            length, start, end = GROUP.unpack_from(self._map, position + i * GROUP.size)
+            self.groups[length] = (start, end)
+        position += group_count * GROUP.size
+        self._offsets = position
+        self._table = self._offsets + (count + 1) * UINT.size
+        self._data = self._table + slots * UINT.size
+
+    @property
+    def map(self):
+        if self._map is None:
+            self._open()
+        return self._map
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __len__(self):
+        self.map
+        return self.count
+
+    def _bytes(self, index):
+        start, end = struct.unpack_from("<II", self.map, self._offsets + index * UINT.size)
+        return self.map[self._data + start:self._data + end]
+
+    def word(self, index):
+        return self._bytes(index).decode("utf-8")
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.word(index)
+
+    def __contains__(self, word):
+        data = normalize(word).encode("utf-8")
+        m = self.map
+        mask = self.slots - 1
+        slot = fnv1a(data) & mask
+        while True:
+            entry = UINT.unpack_from(m, self._table + slot * UINT.size)[0]
+            if entry == 0:
+                return False
+            if self._bytes(entry - 1) == data:
+                return True
+            slot = (slot + 1) & mask
+
+    def words_of_length(self, length):
+        """Words with exactly ``length`` letters, in sorted order."""
+        self.map
+        start, end = self.groups.get(length, (0, 0))
+        return [self.word(i) for i in range(start, end)]
+
+    def count_of_length(self, length):
+        """Number of words with exactly ``length`` letters, without decoding them."""
+        self.map
+        start, end = self.groups.get(length, (0, 0))
+        return end - start
+
+    def group(self, length):
+        """Lazy sequence of the words with exactly ``length`` letters, decoded on access."""
+        self.map
+        return WordGroup(self, *self.groups.get(length, (0, 0)))
+
+    def _lower_bound(self, key, start, end):
+        while start < end:
+            middle = (start + end) // 2
+            if self._bytes(middle) < key:
+                start = middle + 1
+            else:
+                end = middle
+        return start
+
+    def prefix(self, prefix, length=None, limit=None):
+        """Words starting with ``prefix``, optionally only of ``length`` letters."""
+        key = normalize(prefix).encode("utf-8")
+        self.map
+        found = []
+        for group_length in sorted(self.groups):
+            if group_length < len(normalize(prefix)) or (length is not None and group_length != length):
+                continue
+            start, end = self.groups[group_length]
+            index = self._lower_bound(key, start, end)
+            while index < end:
+                data = self._bytes(index)
+                if not data.startswith(key):
+                    break
+                found.append(data.decode("utf-8"))
+                if limit is not None and len(found) >= limit:
+                    return found
+                index += 1
+        return found
+
+    def daily_word(self, length, date=None):
+        """Word of ``length`` letters picked by a seed derived from ``date`` (today by default)."""
+        self.map
+        start, end = self.groups.get(length, (0, 0))
+        if start == end:
+            return None
+        date = date or datetime.date.today()
+        return self.word(random.Random(date.toordinal()).randrange(start, end))
+
+
+class WordGroup(Sequence):
+    """Words ``start`` to ``end`` of a store as a read-only sequence, e.g. for random.choice."""
+
+    def __init__(self, store, start, end):
+        self.store = store
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("word index out of range")
+        return self.store.word(self.start + index)
+
+
+def open_store(source_path, store_path=None):
+    """
+    Opens the compiled store of a raw list, (re)compiling it first if the
+    store is missing or older than the list.
+    """
+    store_path = store_path or os.path.splitext(source_path)[0] + ".wstore"
+    if not os.path.exists(store_path) or (
+            os.path.exists(source_path) and os.path.getmtime(store_path) < os.path.getmtime(source_path)):
+        compile_words(read_words(source_path), store_path)
+    return WordStore(store_path)
+
+
+if __name__ == "__main__":
+    import sys
+    for source in sys.argv[1:]:
+        out = os.path.splitext(source)[0] + ".wstore"
+        compile_words(read_words(source), out)
+        print("%s -> %s (%d words)" % (source, out, len(WordStore(out))))